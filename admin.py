@@ -0,0 +1,60 @@
+import streamlit as st
+
+import figures
+import session_memory
+
+MB = session_memory.MB
+
+
+def _mb(nbytes):
+    return round(nbytes / MB, 2)
+
+
+def run_admin_module(ds):
+    """
+    Sunucu geneli bellek görünümü: oturum başına tutulan ve son çalıştırmada
+    ayrılan bellek, bütçe kısıtları ve oturumların paylaştığı yapılar.
+    """
+    st.title("🧮 Memory Accounting")
+    st.caption(
+        f"Per-session budget: {_mb(session_memory.SESSION_BUDGET_BYTES):,.0f} MB "
+        "(SESSION_MEMORY_BUDGET_MB). Sessions over budget switch to sampled or aggregated charts."
+    )
+
+    sessions = session_memory.sessions()
+    retained = sum(s["retained"] for s in sessions)
+    transient = sum(s["transient"] for s in sessions)
+    shared = ds.memory()
+    cache = figures.figure_cache().stats()
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Active Sessions", len(sessions))
+    col2.metric("Session State", f"{_mb(retained):,.1f} MB")
+    col3.metric("Last-Run Copies", f"{_mb(transient):,.1f} MB")
+    col4.metric("Over Budget", sum(s["degraded"] for s in sessions))
+
+    st.subheader("Sessions")
+    if sessions:
+        st.dataframe(
+            [{
+                "session": s["session"][:8],
+                "page": s["page"],
+                "state MB": _mb(s["retained"]),
+                "last run MB": _mb(s["transient"]),
+                "peak MB": _mb(s["peak"]),
+                "runs": s["runs"],
+                "over budget": s["degraded"],
+                "limited runs": s["degraded_runs"],
+            } for s in sessions],
+            hide_index=True,
+            use_container_width=True,
+        )
+    else:
+        st.info("No sessions recorded yet.")
+
+    st.subheader("Shared Structures")
+    st.caption("Built once per server and used by every session; not counted in any session's budget.")
+    shared_rows = [{"structure": name, "MB": _mb(nbytes)} for name, nbytes in shared.items()]
+    shared_rows.append({"structure": "figure cache", "MB": _mb(cache["bytes"])})
+    st.dataframe(shared_rows, hide_index=True, use_container_width=True)
+    st.caption(f"Total shared: {sum(r['MB'] for r in shared_rows):,.1f} MB")
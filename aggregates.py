@@ -0,0 +1,418 @@
+"""
+Veri setinden bir kez türetilen, önceden toplanmış yapılar.
+
+AggregateCube: (ilçe, semt, oda tipi, fiyat bandı) hücreleri için adet, toplam
+ve kareler toplamı. Treemap, en pahalı semtler grafiği ve Sankey gibi grup
+bazlı grafikler ham satırlar yerine bu hücrelerin toplanmasıyla çizilir.
+
+PriceHistogram: (oda tipi, ilçe) hücresi başına 1$ genişliğinde taban
+histogramlar. Histogram grafiği kullanıcının seçtiği kutu sayısını bu taban
+kutuları birleştirerek üretir; tarayıcıya ham fiyatlar değil kutular gider.
+
+CorrelationStats: (oda tipi, ilçe, yorum sayısı kovası) hücresi başına sayısal
+sütun çiftlerinin yeterli istatistikleri. Korelasyon matrisi satırlar yerine
+hücrelerin toplanmasıyla O(hücre × sütun²) sürede kurulur.
+
+HexBins: her satırın 200 m'lik altıgen hücresi yüklemede bir kez bulunur.
+3D doluluk haritası satırlar yerine hücre merkezleri ve toplamlarıyla çizilir.
+"""
+import numpy as np
+import pandas as pd
+
+from caching import memoized_method
+
+CUBE_DIMENSIONS = ['neighbourhood_group', 'neighbourhood', 'room_type']
+CUBE_MEASURES = ['price', 'number_of_reviews', 'availability_365', 'minimum_nights']
+
+# Fiyat bantları kantillerden seçilir; her bant satırların ~1/64'ünü tutar.
+# Bir fiyat aralığının tamamen kapsadığı bantlar küpten, sınırdaki en fazla iki
+# bant ise sıralı fiyat indeksinden alınan satırlardan toplanır (sonuç kesin).
+N_PRICE_BANDS = 64
+
+# Histogram fiyat kaydırıcısının üst sınırı; taban kutular 0..HIST_MAX_PRICE
+HIST_MAX_PRICE = 2000
+
+# Isı haritasının "Min Reviews" kaydırıcısı 0..100 arası 5'er adımlı; son kova
+# 100 ve üstünü tutar. Kova başına denk gelmeyen eşiklerde sınır kovası satırlardan toplanır.
+REVIEW_BUCKET_WIDTH = 5
+REVIEW_BUCKET_MAX = 100
+
+# Doluluk haritasındaki altıgen yarıçapı (metre; merkezden köşeye)
+HEX_RADIUS_M = 200
+EARTH_RADIUS_M = 6_371_008.8
+HEX_KEY_OFFSET = 1 << 30
+# deck.gl HexagonLayer varsayılanları: renk aralığı ve yükseklik aralığı
+HEX_COLOR_RANGE = [
+    [255, 255, 178], [254, 217, 118], [254, 178, 76],
+    [253, 141, 60], [240, 59, 32], [189, 0, 38],
+]
+HEX_ELEVATION_RANGE = 1000
+
+
+class AggregateCube:
+    """Kategori × fiyat bandı hücrelerinde adet, Σx ve Σx² ölçüleri."""
+
+    def __init__(self, frame, engine):
+        self._engine = engine
+        self._categories = {col: frame[col].cat.categories for col in CUBE_DIMENSIONS}
+        self._row_codes = {col: frame[col].cat.codes.to_numpy() for col in CUBE_DIMENSIONS}
+        self._row_values = {m: frame[m].to_numpy() for m in CUBE_MEASURES}
+
+        # Kantil bantları yüklemede türetilmiş sütun olarak hesaplandı (bkz. derived.py)
+        prices = frame['price'].to_numpy()
+        band = frame['price_band'].to_numpy().astype(np.int64)
+        n_bands = int(band.max()) + 1 if len(band) else 1
+        self.band_min = np.full(n_bands, np.inf)
+        self.band_max = np.full(n_bands, -np.inf)
+        np.minimum.at(self.band_min, band, prices)
+        np.maximum.at(self.band_max, band, prices)
+
+        # Hücre numarası: boyut kodlarının karışık tabanlı birleşimi
+        sizes = [len(self._categories[col]) for col in CUBE_DIMENSIONS] + [n_bands]
+        cell_id = np.zeros(len(prices), dtype=np.int64)
+        for col, size in zip(CUBE_DIMENSIONS, sizes):
+            cell_id = cell_id * size + self._row_codes[col]
+        cell_id = cell_id * n_bands + band
+        cells, inverse = np.unique(cell_id, return_inverse=True)
+
+        self.n_cells = len(cells)
+        self.cell_codes = {}
+        rest = cells
+        for col, size in reversed(list(zip(CUBE_DIMENSIONS + ['price_band'], sizes))):
+            self.cell_codes[col] = (rest % size).astype(np.int32)
+            rest = rest // size
+        self.count = np.bincount(inverse, minlength=self.n_cells).astype(np.int64)
+        self.sums = {}
+        self.sumsq = {}
+        for m in CUBE_MEASURES:
+            values = self._row_values[m].astype(np.float64)
+            self.sums[m] = np.bincount(inverse, weights=values, minlength=self.n_cells)
+            self.sumsq[m] = np.bincount(inverse, weights=values * values, minlength=self.n_cells)
+
+    def nbytes(self):
+        arrays = [self.count, *self.cell_codes.values(), *self.sums.values(), *self.sumsq.values()]
+        return sum(a.nbytes for a in arrays)
+
+    def rollup(self, by, price=None, **filters):
+        """
+        Seçilen hücreleri `by` boyutlarına göre toplar.
+
+        by: CUBE_DIMENSIONS içinden sütunlar; filters: kategorik sütun -> değer
+        listesi; price: (alt, üst) kapalı fiyat aralığı. Dönen tabloda etiket
+        sütunları, `count` ve her ölçü için `_sum`, `_sumsq`, `_mean` vardır.
+        """
+        low, high = price if price is not None else (None, None)
+        low = -np.inf if low is None else low
+        high = np.inf if high is None else high
+
+        keep = np.ones(self.n_cells, dtype=bool)
+        for col, values in filters.items():
+            if values is not None:
+                keep &= self._allowed(col, values)[self.cell_codes[col]]
+        full = (self.band_min >= low) & (self.band_max <= high)
+        partial = (self.band_max >= low) & (self.band_min <= high) & ~full
+
+        sel = keep & full[self.cell_codes['price_band']]
+        parts = [self._frame(by, [self.cell_codes[col][sel] for col in by], self.count[sel],
+                             {m: self.sums[m][sel] for m in CUBE_MEASURES},
+                             {m: self.sumsq[m][sel] for m in CUBE_MEASURES})]
+
+        # Sınır bantları: yalnızca aralığa düşen satırlar doğrudan toplanır
+        for b in np.flatnonzero(partial):
+            ids = self._engine.sorted.rows('price', max(low, self.band_min[b]), min(high, self.band_max[b]))
+            for col, values in filters.items():
+                if values is not None and len(ids):
+                    ids = ids[self._allowed(col, values)[self._row_codes[col][ids]]]
+            if not len(ids):
+                continue
+            row_values = {m: self._row_values[m][ids].astype(np.float64) for m in CUBE_MEASURES}
+            parts.append(self._frame(
+                by, [self._row_codes[col][ids] for col in by], np.ones(len(ids), dtype=np.int64),
+                row_values, {m: v * v for m, v in row_values.items()},
+            ))
+
+        result = pd.concat(parts, ignore_index=True).groupby(by, sort=False).sum().reset_index()
+        for col in by:
+            result[col] = self._categories[col].take(result[col].to_numpy())
+        for m in CUBE_MEASURES:
+            result[f'{m}_mean'] = result[f'{m}_sum'] / result['count']
+        return result
+
+    def _allowed(self, column, values):
+        """Kategori kodu -> seçildi mi tablosu."""
+        categories = self._categories[column]
+        return np.asarray(categories.isin(list(values)), dtype=bool)
+
+    @staticmethod
+    def _frame(by, keys, count, sums, sumsq):
+        data = {col: key for col, key in zip(by, keys)}
+        data['count'] = count
+        for m in CUBE_MEASURES:
+            data[f'{m}_sum'] = sums[m]
+            data[f'{m}_sumsq'] = sumsq[m]
+        return pd.DataFrame(data)
+
+
+class PriceHistogram:
+    """(oda tipi, ilçe) hücresi başına tam sayı fiyatlar için 1$'lık taban kutular."""
+
+    DIMENSIONS = ['room_type', 'neighbourhood_group']
+
+    def __init__(self, frame, max_price=HIST_MAX_PRICE):
+        self.max_price = max_price
+        self._categories = {col: frame[col].cat.categories for col in self.DIMENSIONS}
+        rooms = frame['room_type'].cat.codes.to_numpy().astype(np.int64)
+        boroughs = frame['neighbourhood_group'].cat.codes.to_numpy().astype(np.int64)
+        # Fiyatlar tam sayı olduğundan 1$'lık kutular her birleştirmede kesin sonuç verir
+        prices = np.floor(frame['price'].to_numpy()).astype(np.int64)
+        inside = (prices >= 0) & (prices <= max_price) & (rooms >= 0) & (boroughs >= 0)
+
+        shape = (len(self._categories['room_type']), len(self._categories['neighbourhood_group']), max_price + 1)
+        flat = (rooms[inside] * shape[1] + boroughs[inside]) * shape[2] + prices[inside]
+        self.counts = np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape).astype(np.int32)
+
+    def nbytes(self):
+        return self.counts.nbytes
+
+    def base_counts(self, room_types=None, boroughs=None):
+        """Seçilen hücrelerin toplam taban histogramı (indeks = fiyat)."""
+        counts = self.counts
+        if room_types is not None:
+            counts = counts[np.asarray(self._categories['room_type'].isin(list(room_types)), dtype=bool)]
+        if boroughs is not None:
+            counts = counts[:, np.asarray(self._categories['neighbourhood_group'].isin(list(boroughs)), dtype=bool)]
+        return counts.sum(axis=(0, 1), dtype=np.int64)
+
+    def query(self, bin_count, max_price, room_types=None, boroughs=None):
+        """
+        fiyat <= max_price olan seçili ilanların histogramı ve özet istatistikleri.
+        Kutu genişliği tam sayıdır (tam sayı fiyatlarda eşit olmayan kutu dolulukları
+        oluşmasın diye); kutu sayısı en fazla bin_count olur. Boşsa None.
+        """
+        upper = int(min(np.floor(max_price), self.max_price))
+        if upper < 0:
+            return None
+        base = self.base_counts(room_types, boroughs)[:upper + 1]
+        present = np.flatnonzero(base)
+        if not len(present):
+            return None
+        low, high = int(present[0]), int(present[-1])
+        width = max(1, -(-(high - low + 1) // bin_count))
+        n_bins = -(-(high - low + 1) // width)
+        prices = np.arange(low, high + 1)
+        counts = np.bincount((prices - low) // width, weights=base[low:high + 1], minlength=n_bins)
+
+        total = int(base.sum())
+        cumulative = np.cumsum(base)
+        # pandas ile aynı medyan: çift adette ortadaki iki değerin ortalaması
+        middle = np.searchsorted(cumulative, [(total - 1) // 2 + 1, total // 2 + 1])
+        return {
+            'edges': low + width * np.arange(n_bins + 1),
+            'counts': counts.astype(np.int64),
+            'width': width,
+            'total': total,
+            'mean': float(np.dot(np.arange(upper + 1), base) / total),
+            'median': float(middle.mean()),
+        }
+
+
+class CorrelationStats:
+    """
+    Hücre başına n, Σx, Σx² ve Σxy (her sütun çifti için, ikisinin de dolu
+    olduğu satırlarda). pandas .corr() ile aynı ikili-tam gözlem anlamı korunur.
+    Değerler sütun ortalamasıyla kaydırılarak toplanır (büyük kimlik sütunlarında
+    Σx² - (Σx)²/n çıkarmasındaki sayısal kaybı önler).
+    """
+
+    DIMENSIONS = ['room_type', 'neighbourhood_group']
+
+    def __init__(self, frame, engine, columns):
+        self._engine = engine
+        self.columns = list(columns)
+        self._categories = {col: frame[col].cat.categories for col in self.DIMENSIONS}
+        self._row_values = [frame[col].to_numpy() for col in self.columns]
+        self._shift = np.array([np.nanmean(v) if len(v) else 0.0 for v in self._row_values])
+
+        n_buckets = REVIEW_BUCKET_MAX // REVIEW_BUCKET_WIDTH + 1
+        bucket = frame['review_bucket'].to_numpy().astype(np.int64)
+        rooms = frame['room_type'].cat.codes.to_numpy().astype(np.int64)
+        boroughs = frame['neighbourhood_group'].cat.codes.to_numpy().astype(np.int64)
+        self.shape = (len(self._categories['room_type']), len(self._categories['neighbourhood_group']), n_buckets)
+
+        f = len(self.columns)
+        self.count = np.zeros(self.shape, dtype=np.int64)
+        self.sums = {name: np.zeros(self.shape + (f, f)) for name in ('n', 'x', 'xx', 'xy')}
+        cell = (rooms * self.shape[1] + boroughs) * self.shape[2] + bucket
+        cell[(rooms < 0) | (boroughs < 0)] = -1
+        order = np.argsort(cell, kind='stable')
+        starts = np.searchsorted(cell[order], np.arange(int(np.prod(self.shape)) + 1))
+        for c in range(int(np.prod(self.shape))):
+            ids = order[starts[c]:starts[c + 1]]
+            if not len(ids):
+                continue
+            index = np.unravel_index(c, self.shape)
+            self.count[index] = len(ids)
+            for name, value in self._pair_sums(ids).items():
+                self.sums[name][index] = value
+
+    def nbytes(self):
+        return self.count.nbytes + sum(a.nbytes for a in self.sums.values())
+
+    def _pair_sums(self, ids):
+        x = np.column_stack([v[ids].astype(np.float64) for v in self._row_values]) - self._shift
+        valid = ~np.isnan(x)
+        x0 = np.where(valid, x, 0.0)
+        v = valid.astype(np.float64)
+        # [i, j]: j'nin de dolu olduğu satırlarda x_i'nin toplamları
+        return {'n': v.T @ v, 'x': x0.T @ v, 'xx': (x0 * x0).T @ v, 'xy': x0.T @ x0}
+
+    def _allowed(self, column, values):
+        return np.asarray(self._categories[column].isin(list(values)), dtype=bool)
+
+    @memoized_method(maxsize=64)
+    def _merged(self, room_types, boroughs, min_reviews):
+        """Seçili hücrelerin toplamları: (n, {ad: f × f dizi}); örnek başına önbellekli, diziler salt okunur."""
+        rooms = self._allowed('room_type', room_types)
+        groups = self._allowed('neighbourhood_group', boroughs)
+        n_buckets = self.shape[2]
+        # Eşikten büyük ilk kova sınırı; son kova (100+) ancak eşik 100'e eşit ya da küçükse tam kapsanır
+        first = -(-int(np.ceil(min_reviews)) // REVIEW_BUCKET_WIDTH) if min_reviews > 0 else 0
+        if first * REVIEW_BUCKET_WIDTH > REVIEW_BUCKET_MAX:
+            first = n_buckets
+
+        def total(a):
+            return a[rooms][:, groups][:, :, first:].sum(axis=(0, 1, 2))
+
+        count = int(total(self.count))
+        merged = {name: total(a) for name, a in self.sums.items()}
+        # Eşik kova başına denk gelmiyorsa aradaki satırlar doğrudan eklenir
+        edge = first * REVIEW_BUCKET_WIDTH
+        if 0 < min_reviews < edge or first == n_buckets:
+            ids = self._engine.select(
+                room_type=list(room_types),
+                neighbourhood_group=list(boroughs),
+                number_of_reviews=(min_reviews, edge - 1 if first < n_buckets else None),
+            )
+            if len(ids):
+                count += len(ids)
+                for name, value in self._pair_sums(ids).items():
+                    merged[name] += value
+        return count, merged
+
+    def correlation(self, features, room_types, boroughs, min_reviews=0):
+        """
+        Seçili hücrelerin korelasyon matrisi ve satır sayısı: (DataFrame, n).
+        Sonuç önbellekten gelir; eşik ve renk değişiklikleri yeniden hesaplatmaz.
+        """
+        count, merged = self._merged(tuple(sorted(room_types)), tuple(sorted(boroughs)), min_reviews)
+        idx = [self.columns.index(col) for col in features]
+        sub = {name: a[np.ix_(idx, idx)] for name, a in merged.items()}
+        n, sx, sxx, sxy = sub['n'], sub['x'], sub['xx'], sub['xy']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = sxy - sx * sx.T / n
+            var_i = sxx - sx * sx / n
+            var_j = var_i.T
+            corr = cov / np.sqrt(var_i * var_j)
+        corr[(n < 2) | ~(var_i > 0) | ~(var_j > 0)] = np.nan
+        corr = np.clip(corr, -1.0, 1.0)
+        diagonal = np.diag_indices(len(idx))
+        corr[diagonal] = np.where(np.isnan(corr[diagonal]), np.nan, 1.0)
+        return pd.DataFrame(corr, index=list(features), columns=list(features)), count
+
+
+class HexBins:
+    """
+    Sivri tepeli altıgen ızgara (eksenel q, r koordinatları). Enlem/boylam,
+    veri setinin orta enleminde yerel metre düzlemine izdüşürülür; NYC
+    ölçeğinde deck.gl'in Web Mercator hex ızgarasıyla pratikte aynıdır.
+    """
+
+    def __init__(self, frame, engine, radius=HEX_RADIUS_M):
+        self._engine = engine
+        self.radius = radius
+        lat = frame['latitude'].to_numpy().astype(np.float64)
+        lon = frame['longitude'].to_numpy().astype(np.float64)
+        self._origin = (np.nanmean(lat), np.nanmean(lon)) if len(lat) else (0.0, 0.0)
+        x, y = self._to_meters(lat, lon)
+
+        # Eksenel koordinatlar ve küp yuvarlama
+        qf = (np.sqrt(3) / 3 * x - y / 3) / radius
+        rf = (2 / 3 * y) / radius
+        sf = -qf - rf
+        q, r, s = np.round(qf), np.round(rf), np.round(sf)
+        dq, dr, ds = np.abs(q - qf), np.abs(r - rf), np.abs(s - sf)
+        fix_q = (dq > dr) & (dq > ds)
+        fix_r = ~fix_q & (dr > ds)
+        q = np.where(fix_q, -r - s, q)
+        r = np.where(fix_r, -q - s, r)
+
+        valid = ~(np.isnan(lat) | np.isnan(lon))
+        # NaN koordinatlar tam sayıya çevrilmeden sıfırlanır (anahtarları zaten -1)
+        q, r = np.where(valid, q, 0), np.where(valid, r, 0)
+        # (q, r) tek bir int64 anahtara paketlenir; negatif koordinatlar için kaydırılır
+        keys = np.where(valid, ((q.astype(np.int64) + HEX_KEY_OFFSET) << 32) | (r.astype(np.int64) + HEX_KEY_OFFSET), -1)
+        cells, inverse = np.unique(keys, return_inverse=True)
+        # Geçersiz konumlar (NaN) ayrı bir hücreye düşer ve sorgularda atılır
+        self._invalid = int(inverse[~valid][0]) if (~valid).any() else -1
+        self.cell_of_row = inverse.astype(np.int32)
+        cq = ((cells >> 32) - HEX_KEY_OFFSET).astype(np.float64)
+        cr = ((cells & 0xFFFFFFFF) - HEX_KEY_OFFSET).astype(np.float64)
+        self.centers = np.column_stack(self._to_lonlat(
+            radius * np.sqrt(3) * (cq + cr / 2), radius * 1.5 * cr,
+        ))
+        self.occupied_days = frame['occupied_days'].to_numpy()
+
+    def _to_meters(self, lat, lon):
+        lat0, lon0 = self._origin
+        x = np.radians(lon - lon0) * EARTH_RADIUS_M * np.cos(np.radians(lat0))
+        y = np.radians(lat - lat0) * EARTH_RADIUS_M
+        return x, y
+
+    def _to_lonlat(self, x, y):
+        lat0, lon0 = self._origin
+        lon = lon0 + np.degrees(x / (EARTH_RADIUS_M * np.cos(np.radians(lat0))))
+        lat = lat0 + np.degrees(y / EARTH_RADIUS_M)
+        return lon, lat
+
+    def nbytes(self):
+        return self.cell_of_row.nbytes + self.centers.nbytes + self.occupied_days.nbytes
+
+    def query(self, boroughs, room_types, price=None):
+        """Filtreye uyan ilanların dolu hücreleri (filtre durumu başına önbellekli); bkz. _aggregate."""
+        return self._aggregate(tuple(sorted(boroughs)), tuple(sorted(room_types)),
+                               None if price is None else tuple(price))
+
+    @memoized_method(maxsize=64)
+    def _aggregate(self, boroughs, room_types, price):
+        """
+        Dolu hücre başına merkez, ilan sayısı, doluluk günleri toplamı ve
+        HexagonLayer'ın varsayılan ölçekleriyle hesaplanmış renk ve yükseklik.
+        Önbellek bu örnekte tutulur; her çağıran çerçevenin sığ kopyasını alır.
+        """
+        ids = self._engine.select(neighbourhood_group=list(boroughs), room_type=list(room_types), price=price)
+        cells = self.cell_of_row[ids]
+        n_cells = len(self.centers)
+        count = np.bincount(cells, minlength=n_cells)
+        total = np.bincount(cells, weights=self.occupied_days[ids], minlength=n_cells)
+        if self._invalid >= 0:
+            count[self._invalid] = 0
+        present = np.flatnonzero(count)
+        count, total = count[present], total[present]
+
+        result = pd.DataFrame({
+            'longitude': self.centers[present, 0].astype(np.float32),
+            'latitude': self.centers[present, 1].astype(np.float32),
+            'count': count.astype(np.int32),
+            'occupied_days': total.astype(np.float32),
+        })
+        if not len(result):
+            return result
+        # Renk: adet, eşit genişlikli 6 banda (quantize); yükseklik: toplam, [min, max] -> [0, 1000]
+        n_colors = len(HEX_COLOR_RANGE)
+        low, high = count.min(), count.max()
+        band = np.minimum((count - low) * n_colors // max(high - low, 1), n_colors - 1)
+        result['color'] = [HEX_COLOR_RANGE[b] for b in band]
+        low, high = total.min(), total.max()
+        result['elevation'] = ((total - low) / (high - low) * HEX_ELEVATION_RANGE if high > low
+                               else np.zeros(len(total))).astype(np.float32)
+        return result
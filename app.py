@@ -1,8 +1,13 @@
+import hmac
+import importlib
+import os
+
 import streamlit as st
-from data_loader import load_dataset
-import student_omer
-import student_mehmet
-import student_ahmet
+from data_loader import get_dataset
+import figures
+import profiling
+import session_memory
+import warmup
 
 # 1. Sayfa Ayarları
 st.set_page_config(
@@ -17,12 +22,81 @@ def apply_custom_css():
     with open('style.css') as f:
         st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
 
+# 3. Sayfa Kaydı
+def omer_filters(ds):
+    """Ömer'in sayfasının kenar çubuğu filtreleri; modüle giden ek argümanlar."""
+    st.sidebar.header("🎛️ Filters")
+    all_groups = ds.options('neighbourhood_group')
+    selected_groups = st.sidebar.multiselect(
+        "Neighborhood Groups",
+        all_groups,
+        default=all_groups,
+        help="Filter data by NYC boroughs"
+    )
+
+    # Filtreleme (bitmap indeksi üzerinden)
+    n_selected = ds.count(neighbourhood_group=selected_groups)
+
+    # İstatistik Badge
+    st.sidebar.markdown(f"""
+        <div style='background: rgba(16, 185, 129, 0.1);
+                    border: 1px solid rgba(16, 185, 129, 0.3);
+                    border-radius: 10px;
+                    padding: 1rem;
+                    margin-top: 1rem;
+                    text-align: center;'>
+            <div style='font-size: 1.5rem; font-weight: 700; color: #10b981;'>
+                {n_selected:,}
+            </div>
+            <div style='font-size: 0.8rem; color: #6ee7b7;'>
+                LISTINGS SELECTED
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    return (selected_groups,)
+
+
+# Sayfa adı -> (modül, giriş fonksiyonu, kenar çubuğu filtreleri). Modül ve ağır
+# bağımlılıkları (plotly.express, pydeck) sayfa ilk açıldığında içe aktarılır;
+# Ana Sayfa bunları hiç yüklemez.
+PAGES = {
+    "Ömer": ("student_omer", "run_omer_module", omer_filters),
+    "Mehmet": ("student_mehmet", "run_mehmet_module", None),
+    "Student3": ("student_ahmet", "run_ahmet_module", None),
+    # Yönetici sayfası: yalnızca ?admin=<DASHBOARD_ADMIN_TOKEN> ile açılır
+    "Admin": ("admin", "run_admin_module", None),
+}
+
+
+def admin_access():
+    """
+    ?admin= değeri DASHBOARD_ADMIN_TOKEN ortam değişkeniyle eşleşiyor mu?
+    Değişken tanımlı değilse yönetici sayfası kapalıdır.
+    """
+    token = os.environ.get("DASHBOARD_ADMIN_TOKEN", "")
+    return bool(token) and hmac.compare_digest(st.query_params.get("admin", ""), token)
+
+
+def run_page(name, ds):
+    if name == "Admin" and not admin_access():
+        st.error("The admin page requires a valid admin token.")
+        return
+    module_name, entry, filters = PAGES[name]
+    extra = filters(ds) if filters else ()
+    with profiling.stage(f"{module_name}.import"):
+        run = getattr(importlib.import_module(module_name), entry)
+    run(ds, *extra)
+
+
 def main():
+    profiling.begin_run()
     apply_custom_css()
+    figures.begin_run()
     
     # Oturum Durumu Yönetimi
     if 'current_page' not in st.session_state:
-        st.session_state.current_page = "Home"
+        st.session_state.current_page = "Admin" if admin_access() else "Home"
+    session_memory.begin_run(st.session_state.current_page)
 
     # Sayfa Değiştirme Fonksiyonu
     def set_page(page_name):
@@ -34,10 +108,17 @@ def main():
         st.markdown("<h1>🗽 NYC Airbnb Analytics</h1>", unsafe_allow_html=True)
         st.markdown("<p class='subtitle'>CEN445 - INTRODUCTION TO DATA VISUALIZATION</p>", unsafe_allow_html=True)
         
+        # Veri özeti yüklemede bir kez hesaplanır (önbellek meta dosyasında saklanır)
+        ds = get_dataset()
+        profile = ds.profile if ds is not None else None
+        # Grafiklerin ön ısıtması veri yüklenince arka planda başlar (sunucu başına bir kez)
+        warm = warmup.start(ds) if ds is not None else None
+        listings = f"{profile.rows:,} Airbnb listings" if profile is not None else "Airbnb listings"
+
         # Description with Glass Effect
         col_desc1, col_desc2, col_desc3 = st.columns([1, 2, 1])
         with col_desc2:
-            st.markdown("""
+            st.markdown(f"""
                 <div style='background: rgba(255, 255, 255, 0.05); 
                             backdrop-filter: blur(10px); 
                             border-radius: 15px; 
@@ -46,11 +127,12 @@ def main():
                             border: 1px solid rgba(255, 255, 255, 0.1);
                             margin-bottom: 3rem;'>
                     <p style='font-size: 1.1rem; color: #c7d2fe; line-height: 1.8;'>
-                        Explore <strong>48,895 Airbnb listings</strong> across New York City through 
+                        Explore <strong>{listings}</strong> across New York City through 
                         interactive visualizations. Select a student to view their unique analytical perspective.
                     </p>
                 </div>
             """, unsafe_allow_html=True)
+            warmup.status(warm)
         
         st.write("")
         
@@ -96,15 +178,14 @@ def main():
         st.markdown("<h3 style='text-align: center; margin-top: 3rem;'>📈 Dataset Overview</h3>", unsafe_allow_html=True)
         
         with st.expander("🔍 Explore Dataset Details", expanded=False):
-            df_preview = load_dataset()
-            if df_preview is not None:
+            if profile is not None:
                 # Stats Row
                 stat1, stat2, stat3, stat4 = st.columns(4)
                 
                 with stat1:
                     st.markdown(f"""
                         <div class='stat-box'>
-                            <div class='stat-number'>{len(df_preview):,}</div>
+                            <div class='stat-number'>{profile.rows:,}</div>
                             <div class='stat-label'>Total Listings</div>
                         </div>
                     """, unsafe_allow_html=True)
@@ -112,7 +193,7 @@ def main():
                 with stat2:
                     st.markdown(f"""
                         <div class='stat-box'>
-                            <div class='stat-number'>{df_preview['neighbourhood_group'].nunique()}</div>
+                            <div class='stat-number'>{profile.cardinality['neighbourhood_group']}</div>
                             <div class='stat-label'>Boroughs</div>
                         </div>
                     """, unsafe_allow_html=True)
@@ -120,7 +201,7 @@ def main():
                 with stat3:
                     st.markdown(f"""
                         <div class='stat-box'>
-                            <div class='stat-number'>${df_preview['price'].mean():.0f}</div>
+                            <div class='stat-number'>${profile.numeric['price']['mean']:.0f}</div>
                             <div class='stat-label'>Avg Price/Night</div>
                         </div>
                     """, unsafe_allow_html=True)
@@ -128,13 +209,13 @@ def main():
                 with stat4:
                     st.markdown(f"""
                         <div class='stat-box'>
-                            <div class='stat-number'>{df_preview['neighbourhood'].nunique()}</div>
+                            <div class='stat-number'>{profile.cardinality['neighbourhood']}</div>
                             <div class='stat-label'>Neighborhoods</div>
                         </div>
                     """, unsafe_allow_html=True)
                 
                 st.write("")
-                st.dataframe(df_preview.head(10), use_container_width=True, height=300)
+                figures.render_dataframe("home_preview", profile.preview_frame(), use_container_width=True, height=300)
 
     # --- 2. ÖĞRENCİ SAYFALARI ---
     else:
@@ -165,55 +246,18 @@ def main():
                     </div>
                 """, unsafe_allow_html=True)
         
-        # Veriyi Yükle
-        df = load_dataset()
-        if df is None:
+        # Veriyi Yükle (paylaşılan veri seti ve filtre indeksleri)
+        ds = get_dataset()
+        if ds is None:
             return
+        warmup.start(ds)
 
-        # --- ÖMER'İN SAYFASI ---
-        if st.session_state.current_page == "Ömer":
-            st.sidebar.header("🎛️ Filters")
-            all_groups = df['neighbourhood_group'].unique()
-            selected_groups = st.sidebar.multiselect(
-                "Neighborhood Groups", 
-                all_groups, 
-                default=all_groups,
-                help="Filter data by NYC boroughs"
-            )
-            
-            # Filtreleme
-            df_filtered = df[df['neighbourhood_group'].isin(selected_groups)]
-            
-            # İstatistik Badge
-            st.sidebar.markdown(f"""
-                <div style='background: rgba(16, 185, 129, 0.1); 
-                            border: 1px solid rgba(16, 185, 129, 0.3);
-                            border-radius: 10px; 
-                            padding: 1rem; 
-                            margin-top: 1rem;
-                            text-align: center;'>
-                    <div style='font-size: 1.5rem; font-weight: 700; color: #10b981;'>
-                        {len(df_filtered):,}
-                    </div>
-                    <div style='font-size: 0.8rem; color: #6ee7b7;'>
-                        LISTINGS SELECTED
-                    </div>
-                </div>
-            """, unsafe_allow_html=True)
-            
-            # Modülü Çalıştır
-            student_omer.run_omer_module(df_filtered)
-
-
-
-        # Mehmet Dora 
-        elif st.session_state.current_page == "Mehmet": 
-            student_mehmet.run_mehmet_module(df)
-
-        # --- Student 3 SAYFASI ---
-        elif st.session_state.current_page == "Student3":
-            student_ahmet.run_ahmet_module(df)
+        # --- ÖĞRENCİ MODÜLÜ ---
+        run_page(st.session_state.current_page, ds)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    figures.diagnostics_panel()
+    profiling.panel()
+    session_memory.end_run()
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+Bütün sayfaların başsız benchmark'ı: sentetik CSV ile uygulama AppTest altında
+çalıştırılır, her sayfada senaryodaki widget değişiklikleri sırayla uygulanır.
+Adım başına çalıştırma süresi, grafik bölümü süreleri, serileştirilmiş grafik
+boyutları ve en yüksek bellek (tracemalloc) JSON'a yazılır. --compare kayıtlı bir
+taban çizgisine göre gerilemeleri işaretler (varsa çıkış kodu 1).
+
+    python benchmarks/bench_app.py --rows 48895 1000000 --out baseline.json
+    python benchmarks/bench_app.py --rows 48895 1000000 --compare baseline.json
+
+Ağ bağlantısı ve gerçek CSV gerekmez. Her ölçek iki yeni süreçte çalışır: biri
+süre ve boyutlar, biri bellek için (tracemalloc süreleri şişirdiği için ayrı).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import write_csv  # noqa: E402
+
+DATA_FILE = "AB_NYC_2019.csv"
+
+# Sayfa -> adımlar: (adım, Mehmet sekmesi, widget türü, anahtar, değer). Widget
+# türü None ise aynı durumla yeniden çalıştırılır (sekme değişimi dahil).
+SCENARIOS = {
+    "Home": [
+        ("first run", None, None, None, None),
+        ("rerun", None, None, None, None),
+    ],
+    "Ömer": [
+        ("first run", None, None, None, None),
+        ("histogram top 90%", None, "slider", "hist_percentile", 90),
+        ("treemap price 50-300", None, "slider", "tree_price", (50, 300)),
+        ("treemap min listings", None, "slider", "tree_min", 10),
+        ("heatmap private rooms", None, "multiselect", "heat_room", ["Private room"]),
+    ],
+    "Mehmet": [
+        ("first run", "Price vs Popularity", None, None, None),
+        ("scatter max price 300", "Price vs Popularity", "slider", "scatter_max_price", 300),
+        ("open parallel tab", "Multidimensional Profile", None, None, None),
+        ("parallel 3000 rows", "Multidimensional Profile", "slider", "pc_max_rows", 3000),
+        ("open sankey tab", "Category Flow", None, None, None),
+        ("sankey min count 20", "Category Flow", "slider", "sankey_min_count", 20),
+    ],
+    "Student3": [
+        ("first run", None, None, None, None),
+        ("price range 0-300", None, "slider", "u3_price_slider", (0, 300)),
+        ("entire homes only", None, "multiselect", "u3_room_type_select", ["Entire home/apt"]),
+    ],
+}
+
+# Gerileme eşikleri: göreli artış ve gürültüyü ayıklayan mutlak alt sınır
+METRIC_FLOORS = {"ms": 20.0, "bytes": 16 * 1024, "peak_mb": 2.0}
+
+
+def _measured_run(at, memory):
+    """at.run(); (süre ms, en yüksek bellek MB ya da None)."""
+    if memory:
+        import tracemalloc
+        tracemalloc.start()
+    start = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - start) * 1000
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def worker(memory):
+    """Geçerli dizindeki CSV ile bütün senaryoları çalıştırır; adımları JSON olarak yazar."""
+    import logging
+
+    os.environ["DASHBOARD_DIAGNOSTICS"] = "1"
+    # Adımlar önbelleksiz yolu ölçer; arka plan ön ısıtması süreleri de karıştırırdı
+    os.environ["DASHBOARD_WARMUP"] = "0"
+    logging.disable(logging.WARNING)
+    from streamlit.testing.v1 import AppTest
+
+    import figures
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=600)
+    steps = []
+    for page, scenario in SCENARIOS.items():
+        for step, tab, kind, key, value in scenario:
+            at.session_state["current_page"] = page
+            if tab:
+                at.session_state["mehmet_tab"] = tab
+            if kind:
+                getattr(at, kind)(key=key).set_value(value)
+                # AppTest sekme durumunu kendi ağacından geri yazar
+                if tab:
+                    at.session_state["mehmet_tab"] = tab
+            wall_ms, peak_mb = _measured_run(at, memory)
+            if at.exception:
+                raise RuntimeError(f"{page} / {step}: {at.exception[0].message}")
+            state = at.session_state
+            sections = state[figures._SECTIONS_KEY] if figures._SECTIONS_KEY in state else []
+            charts = state[figures._STATS_KEY] if figures._STATS_KEY in state else []
+            steps.append({
+                "page": page,
+                "step": step,
+                "ms": round(wall_ms, 1),
+                "peak_mb": None if peak_mb is None else round(peak_mb, 2),
+                "sections": {s["section"]: s["ms"] for s in sections},
+                "bytes": {c["chart"]: c["bytes"] for c in charts},
+            })
+    json.dump(steps, sys.stdout)
+
+
+def _spawn(workdir, memory):
+    # Her süreç soğuk başlar: Parquet önbelleği silinir
+    for name in os.listdir(workdir):
+        if name.endswith((".parquet", ".cache.json")):
+            os.remove(os.path.join(workdir, name))
+    command = [sys.executable, os.path.abspath(__file__), "--worker"] + (["--memory"] if memory else [])
+    result = subprocess.run(command, cwd=workdir, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout)
+
+
+def run_scale(n_rows):
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        write_csv(os.path.join(workdir, DATA_FILE), n_rows)
+        os.symlink(os.path.join(ROOT, "style.css"), os.path.join(workdir, "style.css"))
+        print(f"\n{n_rows:,} rows (synthetic CSV in {time.perf_counter() - start:.1f}s)", file=sys.stderr)
+        steps = _spawn(workdir, memory=False)
+        for step, measured in zip(steps, _spawn(workdir, memory=True)):
+            step["peak_mb"] = measured["peak_mb"]
+    return {"rows": n_rows, "steps": steps}
+
+
+def print_scale(result):
+    print(f"\n{result['rows']:,} rows")
+    print(f"{'page':<10}{'step':<26}{'ms':>9}{'peak MB':>10}{'KB':>10}  slowest section")
+    for s in result["steps"]:
+        slowest = max(s["sections"].items(), key=lambda item: item[1], default=None)
+        section = f"{slowest[0]} {slowest[1]:.0f} ms" if slowest else ""
+        print(f"{s['page']:<10}{s['step']:<26}{s['ms']:>9.0f}{s['peak_mb']:>10.1f}"
+              f"{sum(s['bytes'].values()) / 1024:>10.1f}  {section}")
+
+
+def _metrics(results):
+    """(satır, sayfa, adım, ölçü) -> (değer, birim)."""
+    flat = {}
+    for result in results:
+        for s in result["steps"]:
+            key = (result["rows"], s["page"], s["step"])
+            flat[key + ("wall",)] = (s["ms"], "ms")
+            if s["peak_mb"] is not None:
+                flat[key + ("peak",)] = (s["peak_mb"], "peak_mb")
+            for name, ms in s["sections"].items():
+                flat[key + (name,)] = (ms, "ms")
+            for name, size in s["bytes"].items():
+                flat[key + (name + " bytes",)] = (size, "bytes")
+    return flat
+
+
+def compare(baseline, current, threshold):
+    """Taban çizgisine göre eşik üstü artışları yazdırır; gerileme sayısını döndürür."""
+    old, new = _metrics(baseline["results"]), _metrics(current["results"])
+    regressions = 0
+    print(f"\nregressions (> {threshold:.0%} and above noise floor)")
+    for key in sorted(set(old) & set(new), key=str):
+        (before, unit), (after, _) = old[key], new[key]
+        if after > before * (1 + threshold) and after - before > METRIC_FLOORS[unit]:
+            regressions += 1
+            rows, page, step, metric = key
+            print(f"  {rows:>10,}  {page:<10}{step:<26}{metric:<28}{before:>12,.1f} -> {after:,.1f} {unit}")
+    if not regressions:
+        print("  none")
+    missing = len(set(old) - set(new))
+    if missing:
+        print(f"  ({missing} baseline metrics not measured in this run)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[48_895])
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON written by --out")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative increase flagged as regression")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--memory", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        worker(args.memory)
+        return
+
+    current = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [run_scale(n) for n in args.rows],
+    }
+    for result in current["results"]:
+        print_scale(result)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(current, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, current, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
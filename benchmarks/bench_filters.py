@@ -0,0 +1,110 @@
+"""
+Bitmap/aralık filtre motoru ile modüllerdeki eski pandas maske kodunun karşılaştırması.
+
+    python benchmarks/bench_filters.py --rows 48895 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_listings  # noqa: E402
+from data_loader import clean_dataset  # noqa: E402
+from indexes import FilterEngine  # noqa: E402
+
+ALL_BOROUGHS = ["Manhattan", "Brooklyn", "Queens", "Bronx", "Staten Island"]
+ALL_ROOMS = ["Entire home/apt", "Private room", "Shared room"]
+
+# Modüllerin varsayılan ve tipik filtre durumları: (ad, pandas maskesi, motor kriterleri)
+SCENARIOS = [
+    ("omer_hist",
+     lambda df: (df['price'] <= 500) & df['room_type'].isin(ALL_ROOMS)
+     & df['neighbourhood_group'].isin(ALL_BOROUGHS),
+     dict(price=(None, 500), room_type=ALL_ROOMS, neighbourhood_group=ALL_BOROUGHS)),
+    ("omer_tree",
+     lambda df: df['neighbourhood_group'].isin(["Manhattan", "Brooklyn"])
+     & (df['price'] >= 50) & (df['price'] <= 300) & df['room_type'].isin(ALL_ROOMS[:2]),
+     dict(neighbourhood_group=["Manhattan", "Brooklyn"], price=(50, 300), room_type=ALL_ROOMS[:2])),
+    ("omer_heat",
+     lambda df: df['room_type'].isin(ALL_ROOMS) & df['neighbourhood_group'].isin(ALL_BOROUGHS)
+     & (df['number_of_reviews'] >= 20),
+     dict(room_type=ALL_ROOMS, neighbourhood_group=ALL_BOROUGHS, number_of_reviews=(20, None))),
+    ("mehmet_scatter",
+     lambda df: (df['price'] <= 500) & (df['number_of_reviews'] >= 0)
+     & df['neighbourhood_group'].isin(ALL_BOROUGHS),
+     dict(price=(None, 500), number_of_reviews=(0, None), neighbourhood_group=ALL_BOROUGHS)),
+    ("mehmet_sankey",
+     lambda df: df['neighbourhood_group'].isin(["Queens", "Bronx"]) & df['room_type'].isin(ALL_ROOMS)
+     & (df['price'] <= 500),
+     dict(neighbourhood_group=["Queens", "Bronx"], room_type=ALL_ROOMS, price=(None, 500))),
+    ("ahmet_sidebar",
+     lambda df: df['neighbourhood_group'].isin(["Staten Island"]) & df['room_type'].isin(["Shared room"])
+     & (df['price'] >= 0) & (df['price'] <= 10000),
+     dict(neighbourhood_group=["Staten Island"], room_type=["Shared room"], price=(0, 10000))),
+    # Kaydırıcıların dar aralıkları: sıralı indeks dilimi üzerinden çözülür
+    ("tree_price_high",
+     lambda df: df['neighbourhood_group'].isin(ALL_BOROUGHS) & (df['price'] >= 1000)
+     & (df['price'] <= 2000) & df['room_type'].isin(ALL_ROOMS),
+     dict(neighbourhood_group=ALL_BOROUGHS, price=(1000, 2000), room_type=ALL_ROOMS)),
+    ("scatter_reviews",
+     lambda df: (df['price'] <= 500) & (df['number_of_reviews'] >= 150)
+     & df['neighbourhood_group'].isin(["Manhattan"]),
+     dict(price=(None, 500), number_of_reviews=(150, None), neighbourhood_group=["Manhattan"])),
+    ("min_nights_30",
+     lambda df: (df['minimum_nights'] >= 31) & (df['availability_365'] >= 300),
+     dict(minimum_nights=(31, None), availability_365=(300, None))),
+    ("neighbourhoods",
+     lambda df: df['neighbourhood'].isin(["Brooklyn District 3", "Queens District 40"]),
+     dict(neighbourhood=["Brooklyn District 3", "Queens District 40"])),
+]
+
+
+def _best_of(fn, repeat, before=None):
+    times = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def _clear_memos(engine):
+    """Motorun memoize önbelleklerini boşaltır (soğuk ölçüm: ilk açılıştaki gibi)."""
+    for part in (engine, engine.bitmaps, engine.sorted):
+        for attr in [a for a in vars(part) if a.startswith("_memo_")]:
+            del part.__dict__[attr]
+
+
+def run(n_rows, repeat):
+    df = clean_dataset(make_listings(n_rows))
+    start = time.perf_counter()
+    engine = FilterEngine(df)
+    build = time.perf_counter() - start
+    print(f"\n{n_rows:,} rows  (index build {build * 1000:.1f} ms, "
+          f"bitmaps {engine.bitmaps.nbytes() / 1e6:.1f} MB, "
+          f"sorted {engine.sorted.nbytes() / 1e6:.1f} MB)")
+    # cold: column_bitmap önbelleği her tekrardan önce boşaltılır; warm: aynı kriterler yeniden sorulur
+    print(f"{'scenario':<16}{'pandas ms':>12}{'cold ms':>10}{'speedup':>10}"
+          f"{'warm ms':>10}{'speedup':>10}{'rows':>12}")
+    for name, pandas_mask, criteria in SCENARIOS:
+        t_pandas, expected = _best_of(lambda: np.flatnonzero(pandas_mask(df).to_numpy()), repeat)
+        t_cold, actual = _best_of(lambda: engine.select(**criteria), repeat, before=lambda: _clear_memos(engine))
+        t_warm, warm = _best_of(lambda: engine.select(**criteria), repeat)
+        assert np.array_equal(expected, actual) and np.array_equal(expected, warm), name
+        print(f"{name:<16}{t_pandas * 1000:>12.2f}{t_cold * 1000:>10.2f}{t_pandas / t_cold:>9.1f}x"
+              f"{t_warm * 1000:>10.2f}{t_pandas / t_warm:>9.1f}x{len(actual):>12,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[48_895, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for n in args.rows:
+        run(n, args.repeat)
@@ -0,0 +1,122 @@
+"""
+Grafik figürlerinin JSON listesi, tipli dizi (bdata) ve daraltılmış tipli dizi
+olarak serileştirme süresi ve boyutu.
+
+    python benchmarks/bench_payload.py --rows 48895 1000000
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+import pydeck as pdk
+from plotly.utils import PlotlyJSONEncoder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import figures  # noqa: E402
+from benchmarks.synthetic import make_listings  # noqa: E402
+from data_loader import Dataset, clean_dataset  # noqa: E402
+from student_mehmet import SCATTER_POINT_LIMIT, _density_scatter, _parallel_figure  # noqa: E402
+from student_omer import _heatmap_figure, _histogram_figure, _treemap_figure  # noqa: E402
+
+ALL_BOROUGHS = ["Manhattan", "Brooklyn", "Queens", "Bronx", "Staten Island"]
+ALL_ROOMS = ["Entire home/apt", "Private room", "Shared room"]
+FEATURES = ["price", "minimum_nights", "number_of_reviews", "reviews_per_month",
+            "calculated_host_listings_count", "availability_365"]
+
+
+def _scatter(ds):
+    # Modüldeki WebGL dalı (en fazla SCATTER_POINT_LIMIT nokta)
+    ids = ds.select(price=(None, 500))[:SCATTER_POINT_LIMIT]
+    frame = ds.rows(ids, ["price", "number_of_reviews", "neighbourhood_group", "name", "room_type", "neighbourhood"])
+    return px.scatter(frame, x="price", y="number_of_reviews", color="neighbourhood_group",
+                      hover_data=["name", "room_type", "neighbourhood"], render_mode="webgl")
+
+
+def _violin(ds):
+    # Modüldeki keman şekilleri (yoğunluk eğrilerinden dolu çokgenler)
+    fig = go.Figure()
+    for position, room in enumerate(ALL_ROOMS):
+        curve = ds.densities.violin(room, tuple(ALL_BOROUGHS), 0, 499)
+        if curve is None:
+            continue
+        half_width = 0.4 * curve['density'] / curve['density'].max()
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([position - half_width, (position + half_width)[::-1]]),
+            y=np.concatenate([curve['y'], curve['y'][::-1]]),
+            fill='toself', mode='lines', name=room,
+        ))
+    return fig
+
+
+# (ad, figür kurucu)
+FIGURES = [
+    ("omer_histogram", lambda ds: _histogram_figure(ds, 50, 500, False, ALL_ROOMS, ALL_BOROUGHS, 99)[0]),
+    ("omer_treemap", lambda ds: _treemap_figure(ds, "Listing Count", "Average Price", ALL_BOROUGHS,
+                                                (0, 500), ALL_ROOMS, 1, ALL_BOROUGHS)[0]),
+    ("omer_heatmap", lambda ds: _heatmap_figure(ds, FEATURES, "RdBu_r", True, ALL_ROOMS, ALL_BOROUGHS, 0, 0.0)[0]),
+    ("mehmet_scatter", _scatter),
+    ("mehmet_density", lambda ds: _density_scatter(
+        ds.rows(ds.select(price=(None, 500)), ["price", "number_of_reviews", "neighbourhood_group"]),
+        500, 0, False)[0]),
+    ("mehmet_parallel", lambda ds: _parallel_figure(ds, FEATURES[:4], ALL_ROOMS, 3000, 0)[0]),
+    ("ahmet_violin", _violin),
+]
+
+
+def _best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def _row(name, variant, seconds, payload):
+    data = payload.encode()
+    print(f"{name:<18}{variant:<10}{seconds * 1000:>10.2f}{len(data) / 1024:>12.1f}"
+          f"{len(gzip.compress(data)) / 1024:>12.1f}")
+
+
+def run(n_rows, repeat):
+    ds = Dataset(clean_dataset(make_listings(n_rows)), version="bench")
+    print(f"\n{n_rows:,} rows")
+    print(f"{'figure':<18}{'variant':<10}{'ms':>10}{'KB':>12}{'gzip KB':>12}")
+    for name, build in FIGURES:
+        fig = build(ds)
+        if fig is None:
+            continue
+        # JSON listesi: plotly<6 davranışı (diziler sayı listesi olarak yazılır)
+        seconds, payload = _best_of(lambda: json.dumps(fig.to_dict(), cls=PlotlyJSONEncoder), repeat)
+        _row(name, "lists", seconds, payload)
+        seconds, payload = _best_of(fig.to_json, repeat)
+        _row(name, "bdata", seconds, payload)
+        narrowed = build(ds)
+        seconds, payload = _best_of(lambda: figures.encode_arrays(narrowed).to_json(), repeat)
+        _row(name, "narrowed", seconds, payload)
+
+    hexes = ds.hex_bins.query(tuple(ALL_BOROUGHS), tuple(ALL_ROOMS), (0, 10_000))
+    columns = ("[longitude, latitude]", "elevation", "color", "{count} {occupied_days}")
+    deck = pdk.Deck(layers=[pdk.Layer("ColumnLayer", data=figures.project(hexes, *columns))])
+    seconds, payload = _best_of(deck.to_json, repeat)
+    _row("ahmet_hex_map", "pydeck", seconds, payload)
+    compact = figures.compact_deck(layers=[pdk.Layer(
+        "ColumnLayer", data=figures.compact_frame(figures.project(hexes, *columns)))])
+    seconds, payload = _best_of(compact.to_json, repeat)
+    _row("ahmet_hex_map", "compact", seconds, payload)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[48_895, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for n in args.rows:
+        run(n, args.repeat)
@@ -0,0 +1,161 @@
+"""
+Soğuk başlangıç ölçümü: app.py'nin içe aktarma süresi dökümü (-X importtime),
+her sayfanın yeni bir süreçteki ilk çalıştırma süresi (AppTest) ve ilk grafiğe
+kadar geçen süre. İlk grafik ölçümünde veri seti yüklendikten sonra sayfa açılır.
+Soğuk başlangıçta ön ısıtma kapalıdır (DASHBOARD_WARMUP=0). Isınmış başlangıçta
+sayfa, ön ısıtma bittikten sonra açılır; figür önbelleği ıskaları da yazılır.
+Isınmış açılışta ıska varsa warmup'taki bir durum widget varsayılanından
+ayrılmıştır.
+
+    python benchmarks/bench_startup.py --rows 48895
+    python benchmarks/bench_startup.py --eager   # sayfa modülleri de baştan yüklenirse
+
+Ağ bağlantısı ve gerçek CSV gerekmez: ölçümler geçici bir dizinde üretilen
+--rows satırlık sentetik CSV ile çalışır.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import write_csv  # noqa: E402
+
+DATA_FILE = "AB_NYC_2019.csv"
+PAGE_MODULES = ["student_omer", "student_mehmet", "student_ahmet"]
+PAGES = ["Home", "Ömer", "Mehmet", "Student3"]
+
+# Yorumlayıcının her süreçte yüklediği modüller (ölçüme katılmaz)
+_INTERPRETER = {"site", "encodings", "encodings.utf_8", "io", "zipimport", "_signal", "_frozen_importlib_external"}
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+# Yeni bir süreçte sayfanın ilk çalıştırması; süre saniye olarak yazdırılır
+_FIRST_RUN = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=300)
+at.session_state["current_page"] = {page!r}
+at.run()
+assert not at.exception, at.exception
+print(time.perf_counter() - start)
+"""
+
+# Yeni bir süreçte veri seti Ana Sayfa'da yüklenir, ön ısıtma açıksa bitmesi
+# beklenir, sonra sayfa açılır; sayfanın süresi ve figür önbelleği ıskaları yazdırılır
+_FIRST_CHART = """
+import json
+import time
+from streamlit.testing.v1 import AppTest
+import data_loader, figures, warmup
+AppTest.from_file({app!r}, default_timeout=300).run()
+warm = warmup.start(data_loader.get_dataset())
+if warm is not None:
+    warm.wait()
+at = AppTest.from_file({app!r}, default_timeout=300)
+at.session_state["current_page"] = {page!r}
+misses = figures.figure_cache().stats()["misses"]
+start = time.perf_counter()
+at.run()
+assert not at.exception, at.exception
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "warmup": None if warm is None else warm.seconds(),
+    "misses": figures.figure_cache().stats()["misses"] - misses,
+}}))
+"""
+
+
+def _env(warm):
+    # Alt süreçler geçici dizinde (sentetik CSV) çalışır, modüller depo kökünden
+    # içe aktarılır. Soğuk ölçümlerde ön ısıtma kapalı (sayfa süresine karışmasın)
+    return {**os.environ, "PYTHONPATH": ROOT, "DASHBOARD_WARMUP": "1" if warm else "0"}
+
+
+def import_breakdown(eager):
+    """
+    app'in ve doğrudan içe aktardığı modüllerin kümülatif süreleri (µs); eager
+    ise sayfa modülleri de. importtime alt modülleri üst modülden önce yazar.
+    """
+    statement = "import app" + "".join(f"; import {m}" for m in PAGE_MODULES if eager)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times, children = {}, {}
+    for match in _IMPORT_LINE.finditer(result.stderr):
+        _, cumulative, indent, name = match.groups()
+        if len(indent) == 1:
+            times[name] = int(cumulative)
+            if name == "app":
+                times.update(children)
+            children = {}
+        elif len(indent) == 3:
+            children[name] = int(cumulative)
+    return {name: micros for name, micros in times.items() if name not in _INTERPRETER}
+
+
+def first_run(workdir, page):
+    script = _FIRST_RUN.format(app=os.path.join(ROOT, "app.py"), page=page)
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=workdir, capture_output=True, text=True, env=_env(warm=False),
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def first_chart(workdir, page, warm):
+    """Veri yüklendikten sonra sayfanın ilk çalıştırması; warm ise ön ısıtma bittikten sonra."""
+    script = _FIRST_CHART.format(app=os.path.join(ROOT, "app.py"), page=page)
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=workdir, capture_output=True, text=True, env=_env(warm),
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(eager, repeat, limit, rows):
+    runs = [import_breakdown(eager) for _ in range(repeat)]
+    median = {name: statistics.median(r.get(name, 0) for r in runs) for name in runs[0]}
+    total = median["app"] + sum(median.get(m, 0) for m in PAGE_MODULES)
+    print(f"\nimport app{' + page modules' if eager else ''}: {total / 1000:.0f} ms (median of {repeat})")
+    print(f"{'module':<24}{'ms':>10}")
+    for name, micros in sorted(median.items(), key=lambda item: -item[1])[:limit]:
+        print(f"{name:<24}{micros / 1000:>10.1f}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        write_csv(os.path.join(workdir, DATA_FILE), rows)
+        os.symlink(os.path.join(ROOT, "style.css"), os.path.join(workdir, "style.css"))
+
+        print(f"\n{'first run':<24}{'s':>10}   ({rows:,} rows)")
+        for page in PAGES:
+            seconds = statistics.median(first_run(workdir, page) for _ in range(repeat))
+            print(f"{page:<24}{seconds:>10.2f}")
+
+        print(f"\n{'time to first chart':<24}{'cold s':>10}{'warm s':>10}{'misses':>10}")
+        warmup_seconds = []
+        for page in PAGES[1:]:
+            cold = statistics.median(first_chart(workdir, page, warm=False)["seconds"] for _ in range(repeat))
+            warm = [first_chart(workdir, page, warm=True) for _ in range(repeat)]
+            warmup_seconds.extend(w["warmup"] for w in warm)
+            print(f"{page:<24}{cold:>10.2f}{statistics.median(w['seconds'] for w in warm):>10.2f}"
+                  f"{max(w['misses'] for w in warm):>10}")
+        print(f"background warm-up: {statistics.median(warmup_seconds):.2f}s (median)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--eager", action="store_true", help="import the page modules up front as well")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=12, help="number of modules to list")
+    parser.add_argument("--rows", type=int, default=48_895, help="rows in the synthetic CSV")
+    args = parser.parse_args()
+    run(args.eager, args.repeat, args.limit, args.rows)
@@ -0,0 +1,81 @@
+"""
+Mehmet sayfasında etkileşim başına sunucu süresi: her sekmede bir widget
+değiştirilip sayfa yeniden çalıştırılır (AppTest). Tembel sekmelerde yalnızca
+açık sekmenin hesabı ve serileştirmesi yapılır; --eager bütün sekmelerin her
+çalıştırmada çizildiği eski davranışı (DASHBOARD_EAGER_TABS=1) karşılaştırma
+için ölçer.
+
+    python benchmarks/bench_tabs.py --interactions 10 --rows 48895
+    python benchmarks/bench_tabs.py --interactions 10 --rows 48895 --eager
+
+Ağ bağlantısı ve gerçek CSV gerekmez: uygulama geçici bir dizinde üretilen
+--rows satırlık sentetik CSV ile çalışır.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import write_csv  # noqa: E402
+
+DATA_FILE = "AB_NYC_2019.csv"
+
+# (sekme, widget türü, anahtar, sırayla verilen değerler)
+INTERACTIONS = [
+    ("Price vs Popularity", "multiselect", "scatter_groups",
+     [["Manhattan"], ["Brooklyn"], ["Queens"], ["Bronx"], ["Manhattan", "Brooklyn"]]),
+    ("Multidimensional Profile", "slider", "pc_min_reviews", [0, 5, 10, 15, 20, 25, 30, 35, 40, 45]),
+    ("Category Flow", "multiselect", "sankey_room_types",
+     [["Entire home/apt"], ["Private room"], ["Shared room"], ["Entire home/apt", "Private room"],
+      ["Private room", "Shared room"]]),
+]
+
+
+def run(interactions, rows, eager=False):
+    os.environ["DASHBOARD_EAGER_TABS"] = "1" if eager else "0"
+    with tempfile.TemporaryDirectory() as workdir:
+        write_csv(os.path.join(workdir, DATA_FILE), rows)
+        os.symlink(os.path.join(ROOT, "style.css"), os.path.join(workdir, "style.css"))
+        # Uygulama veri dosyasını ve style.css'i çalışma dizininde arar
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            _interact(interactions, rows, "eager" if eager else "lazy")
+        finally:
+            os.chdir(cwd)
+
+
+def _interact(interactions, rows, mode):
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=300)
+    at.session_state["current_page"] = "Mehmet"
+    at.run()
+    print(f"{'tab':<28}{'median ms':>12}{'max ms':>10}   ({rows:,} rows, {mode} tabs)")
+    for tab, kind, key, values in INTERACTIONS:
+        times = []
+        for i in range(interactions):
+            # AppTest sekme durumunu kendi ağacından geri yazar; her çalıştırmada yeniden seçilir
+            at.session_state["mehmet_tab"] = tab
+            at.run()
+            getattr(at, kind)(key=key).set_value(values[i % len(values)])
+            at.session_state["mehmet_tab"] = tab
+            start = time.perf_counter()
+            at.run()
+            times.append(time.perf_counter() - start)
+            assert not at.exception, at.exception
+        print(f"{tab:<28}{statistics.median(times) * 1000:>12.0f}{max(times) * 1000:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--interactions", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=48_895, help="rows in the synthetic CSV")
+    parser.add_argument("--eager", action="store_true", help="render every tab on each rerun (baseline)")
+    args = parser.parse_args()
+    run(args.interactions, args.rows, args.eager)
@@ -0,0 +1,143 @@
+"""
+AB_NYC_2019.csv şemasında sentetik veri üretir.
+Benchmark'lar ağ bağlantısı ya da gerçek CSV olmadan bu veriyle çalışır.
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# 2019 verisindeki yaklaşık oranlar
+BOROUGHS = {
+    "Manhattan": (0.443, 40.7831, -73.9712, 0.035, 32),
+    "Brooklyn": (0.411, 40.6782, -73.9442, 0.040, 47),
+    "Queens": (0.116, 40.7282, -73.7949, 0.050, 51),
+    "Bronx": (0.022, 40.8448, -73.8648, 0.030, 48),
+    "Staten Island": (0.008, 40.5795, -74.1502, 0.035, 43),
+}
+ROOM_TYPES = {
+    # oran, log-normal medyan fiyat, sigma
+    "Entire home/apt": (0.520, 160.0, 0.60),
+    "Private room": (0.457, 70.0, 0.55),
+    "Shared room": (0.023, 45.0, 0.65),
+}
+COLUMNS = [
+    "id", "name", "host_id", "host_name", "neighbourhood_group", "neighbourhood",
+    "latitude", "longitude", "room_type", "price", "minimum_nights",
+    "number_of_reviews", "last_review", "reviews_per_month",
+    "calculated_host_listings_count", "availability_365",
+]
+
+
+def make_listings(n_rows, seed=42):
+    """n_rows satırlık, gerçek veri setine benzeyen bir DataFrame döndürür."""
+    rng = np.random.default_rng(seed)
+
+    borough_names = list(BOROUGHS)
+    borough_p = np.array([v[0] for v in BOROUGHS.values()])
+    borough_idx = rng.choice(len(borough_names), size=n_rows, p=borough_p / borough_p.sum())
+
+    # Her ilçenin semtleri; semt payları Zipf benzeri (birkaç semt çok kalabalık).
+    # Metin sütunları bellek için kategori kodlarıyla üretilir (10M satırda bile
+    # milyonlarca Python string'i oluşmaz).
+    nb_names = []
+    nb_code = np.empty(n_rows, dtype=np.int32)
+    latitude = np.empty(n_rows)
+    longitude = np.empty(n_rows)
+    for b, name in enumerate(borough_names):
+        _, lat0, lon0, spread, n_nb = BOROUGHS[name]
+        rows = np.flatnonzero(borough_idx == b)
+        weights = 1.0 / np.arange(1, n_nb + 1) ** 0.9
+        nb = rng.choice(n_nb, size=len(rows), p=weights / weights.sum())
+        nb_code[rows] = len(nb_names) + nb
+        nb_names += [f"{name} District {i + 1}" for i in range(n_nb)]
+        # Semt merkezleri ilçe merkezinin etrafına dağılır
+        nb_lat = lat0 + rng.normal(0, spread, n_nb)
+        nb_lon = lon0 + rng.normal(0, spread, n_nb)
+        latitude[rows] = nb_lat[nb] + rng.normal(0, spread / 6, len(rows))
+        longitude[rows] = nb_lon[nb] + rng.normal(0, spread / 6, len(rows))
+
+    room_names = list(ROOM_TYPES)
+    room_p = np.array([v[0] for v in ROOM_TYPES.values()])
+    room_idx = rng.choice(len(room_names), size=n_rows, p=room_p / room_p.sum())
+    medians = np.array([v[1] for v in ROOM_TYPES.values()])
+    sigmas = np.array([v[2] for v in ROOM_TYPES.values()])
+    # Manhattan daha pahalı, Bronx/Staten Island daha ucuz
+    borough_factor = np.array([1.35, 0.95, 0.80, 0.70, 0.75])
+    price = rng.lognormal(np.log(medians[room_idx] * borough_factor[borough_idx]), sigmas[room_idx])
+    price = np.clip(np.round(price), 0, 10000).astype(np.int64)
+    # Gerçek veride birkaç 0$ ve 10000$ uç değer var
+    outliers = rng.random(n_rows) < 0.0005
+    price[outliers] = rng.choice([0, 10000, 9999, 5000], size=outliers.sum())
+
+    minimum_nights = np.where(
+        rng.random(n_rows) < 0.08, 30, rng.geometric(0.45, n_rows)
+    ).clip(1, 1250)
+    number_of_reviews = np.where(
+        rng.random(n_rows) < 0.2, 0, rng.negative_binomial(0.6, 0.025, n_rows)
+    ).clip(0, 629)
+    no_reviews = number_of_reviews == 0
+    reviews_per_month = np.round(number_of_reviews / rng.uniform(3, 60, n_rows), 2)
+    reviews_per_month[no_reviews] = np.nan
+    last_review = np.datetime64("2019-07-08") - rng.exponential(200, n_rows).astype("timedelta64[D]")
+    last_review[no_reviews] = np.datetime64("NaT")
+    availability_365 = np.where(rng.random(n_rows) < 0.36, 0, rng.integers(1, 366, n_rows))
+
+    # Ev sahiplerinin çoğu tek ilana sahip, birkaç şirket yüzlerce ilan yönetiyor
+    per_host = np.minimum(rng.zipf(3.0, n_rows), 330)
+    host_seq = np.repeat(np.arange(n_rows), per_host)[:n_rows]
+    rng.shuffle(host_seq)
+    host_id = rng.integers(2_000, 275_000_000, n_rows)[host_seq]
+    _, host_inverse, host_counts = np.unique(host_id, return_inverse=True, return_counts=True)
+    first_names = ["Michael", "David", "John", "Alex", "Sarah", "Maria", "Daniel",
+                   "Anna", "Jessica", "Sonder (NYC)", "Blueground", "Kara"]
+    adjectives = ["Cozy", "Sunny", "Spacious", "Modern", "Charming", "Quiet", "Bright",
+                  "Luxury", "Clean", "Private"]
+
+    # İlan adı = sıfat + oda tipi + semt; olası birleşimler kategori olarak tutulur
+    name_categories = [
+        f"{adj} {room} in {nb}" for adj in adjectives for room in room_names for nb in nb_names
+    ]
+    name_code = (
+        rng.integers(0, len(adjectives), n_rows) * len(room_names) + room_idx
+    ) * len(nb_names) + nb_code
+    host_name_code = host_id % len(first_names)
+    # Gerçek veride az sayıda boş isim var (kod -1 = NaN); "Unknown" kategorisi
+    # yükleyicinin fillna adımının kategori tipinde de çalışması için eklenir
+    name_code[rng.random(n_rows) < 0.0003] = -1
+    host_name_code[rng.random(n_rows) < 0.0004] = -1
+
+    return pd.DataFrame({
+        "id": np.arange(2539, 2539 + n_rows, dtype=np.int64),
+        "name": pd.Categorical.from_codes(name_code, name_categories + ["Unknown"]),
+        "host_id": host_id,
+        "host_name": pd.Categorical.from_codes(host_name_code, first_names + ["Unknown"]),
+        "neighbourhood_group": pd.Categorical.from_codes(borough_idx, borough_names),
+        "neighbourhood": pd.Categorical.from_codes(nb_code, nb_names),
+        "latitude": latitude.round(5),
+        "longitude": longitude.round(5),
+        "room_type": pd.Categorical.from_codes(room_idx, room_names),
+        "price": price,
+        "minimum_nights": minimum_nights,
+        "number_of_reviews": number_of_reviews,
+        "last_review": last_review.astype("datetime64[s]"),
+        "reviews_per_month": reviews_per_month,
+        "calculated_host_listings_count": host_counts[host_inverse],
+        "availability_365": availability_365,
+    }, columns=COLUMNS)
+
+
+def write_csv(path, n_rows, seed=42):
+    """Sentetik veriyi CSV olarak yazar ve yolunu döndürür."""
+    make_listings(n_rows, seed=seed).to_csv(path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic AB_NYC_2019.csv")
+    parser.add_argument("path", help="Output CSV path")
+    parser.add_argument("--rows", type=int, default=48_895)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    write_csv(args.path, args.rows, seed=args.seed)
+    print(f"Wrote {args.rows:,} rows to {args.path}")
@@ -0,0 +1,93 @@
+"""
+Örnek başına, boyutu sınırlı sorgu önbellekleri.
+
+functools.lru_cache bir metoda uygulanınca sınıf düzeyinde tek bir önbellek olur:
+self'e güçlü referans tutar (veri yeniden yüklenince eski yapılar bellekte kalır)
+ve bütün örnekler aynı yuvaları paylaşır. memoized_method önbelleği örneğin
+kendisinde tutar; örnekle birlikte atılır.
+
+Önbellekteki sonuçlar bütün oturumlara ve ön ısıtma iş parçacıklarına gider.
+Saklanırken diziler salt okunur yapılır; dönerken çerçeveler sığ kopya, sözlükler
+yeni sözlük olur (Copy-on-Write: çağıranın yazması önbelleği değiştirmez).
+"""
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+_MISSING = object()
+
+
+class LRUCache:
+    """İş parçacığı güvenli, en fazla maxsize kayıt tutan LRU sözlüğü."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+def freeze(value):
+    """Önbelleğe girecek sonucun dizilerini (iç içe sözlük/demetlerde de) salt okunur yapar."""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, dict):
+        for item in value.values():
+            freeze(item)
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            freeze(item)
+    return value
+
+
+def share(value):
+    """Önbellekteki sonucu çağırana verilecek biçimde döndürür (çerçeve ve sözlükler kopyalanır, diziler paylaşılır)."""
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=False)
+    if isinstance(value, dict):
+        return {key: share(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return tuple(share(item) for item in value)
+    return value
+
+
+def memoized_method(maxsize):
+    """
+    Metodun sonuçlarını örneğin kendi LRUCache'inde tutan dekoratör. Argümanlar
+    konumsal ve hashlenebilir olmalı (listeler yerine sıralı demetler).
+    """
+    def decorate(func):
+        attr = f"_memo_{func.__name__}"
+
+        @wraps(func)
+        def wrapper(self, *args):
+            cache = self.__dict__.get(attr)
+            if cache is None:
+                cache = self.__dict__.setdefault(attr, LRUCache(maxsize))
+            result = cache.get(args, _MISSING)
+            if result is _MISSING:
+                # Aynı anahtarı aynı anda isteyen iki çağrı iki kez hesaplayabilir; sonuç aynıdır
+                result = freeze(func(self, *args))
+                cache.put(args, result)
+            return share(result)
+        return wrapper
+    return decorate
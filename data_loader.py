@@ -1,21 +1,426 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
 import pandas as pd
 import streamlit as st
 
-@st.cache_data
-def load_dataset():
+import profiling
+import session_memory
+from aggregates import AggregateCube, CorrelationStats, HexBins, PriceHistogram
+from density import DensityEngine
+from derived import add_derived_columns, source_columns
+from indexes import FilterEngine
+from sampling import StratifiedSampler
+from sketches import CellSketches
+
+try:
+    import pyarrow  # noqa: F401  (Parquet önbelleği için gerekli)
+except ImportError:
+    pyarrow = None
+
+DATA_PATH = "AB_NYC_2019.csv"
+log = logging.getLogger(__name__)
+
+# Paylaşılan çerçeve pandas 3'ün Copy-on-Write davranışına dayanır (requirements.txt:
+# pandas>=3): ondan alınan dilimlere yazmak ortak veriyi değiştirmez, yalnızca o
+# dilimi kopyalar.
+
+# Kompakt şema: tekrar eden metinler kategori, sayılar en küçük uygun tipe
+# indirilir. Şema ya da türetilmiş sütunlar değişince SCHEMA_VERSION artırılmalı
+# (önbellek yenilenir).
+SCHEMA_VERSION = 3
+CATEGORY_COLUMNS = ['neighbourhood_group', 'neighbourhood', 'room_type', 'host_name']
+INTEGER_COLUMNS = [
+    'id', 'host_id', 'price', 'minimum_nights', 'number_of_reviews',
+    'calculated_host_listings_count', 'availability_365',
+]
+FLOAT32_COLUMNS = ['latitude', 'longitude', 'reviews_per_month']
+DATE_COLUMNS = ['last_review']
+PREVIEW_ROWS = 10
+
+
+def _cache_paths(csv_path):
+    """CSV'nin yanındaki Parquet önbelleği ve meta dosyasının yolları."""
+    base, _ = os.path.splitext(csv_path)
+    return base + ".parquet", base + ".cache.json"
+
+
+@profiling.profiled("load.fingerprint")
+def _csv_fingerprint(csv_path):
+    """Önbelleği geçersiz kılmak için CSV'nin boyutu, mtime'ı ve içerik özeti."""
+    stat = os.stat(csv_path)
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest.hexdigest(),
+        "schema_version": SCHEMA_VERSION,
+    }
+
+
+def _apply_schema(df):
+    """Sütunları kompakt tiplere çevirir; isin filtreleri kategori kodları üzerinde çalışır."""
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype('category')
+    for col in INTEGER_COLUMNS:
+        # İşaretli tip: 365 - availability gibi farklar taşmadan hesaplanır
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in FLOAT32_COLUMNS:
+        df[col] = df[col].astype('float32')
+    for col in DATE_COLUMNS:
+        df[col] = pd.to_datetime(df[col], errors='coerce')
+    return df
+
+
+def memory_report(df):
+    """Sütun başına tip ve bellek kullanımı (bayt) tablosu."""
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'dtype': df.dtypes.astype(str),
+        'bytes': usage,
+    })
+    report.index.name = 'column'
+    return report.sort_values('bytes', ascending=False)
+
+
+class DatasetProfile:
     """
-    Veri setini yükler ve temizler.
-    Tüm modüller bu fonksiyonu kullanarak veriyi çeker.
+    Yüklemede bir kez hesaplanan veri özeti: satır sayısı, kategori
+    kardinaliteleri, sayısal sütunların ortalama/min/max'ı, sütun başına eksik
+    değer sayısı ve önizleme dilimi. Önbellek meta dosyasında JSON olarak saklanır;
+    Ana Sayfa tam çerçeveye dokunmadan bundan çizilir.
+    """
+
+    def __init__(self, rows, cardinality, numeric, nulls, preview):
+        self.rows = rows
+        self.cardinality = cardinality
+        self.numeric = numeric
+        self.nulls = nulls
+        self.preview = preview
+
+    @classmethod
+    def from_frame(cls, df):
+        # Özet yalnızca kaynak sütunları kapsar; türetilmiş sütunlar gösterilmez
+        df = df[source_columns(df.columns)]
+        numeric = {}
+        for col in INTEGER_COLUMNS + FLOAT32_COLUMNS:
+            values = df[col]
+            numeric[col] = {
+                "mean": float(values.mean()),
+                "min": float(values.min()),
+                "max": float(values.max()),
+            }
+        head = df.head(PREVIEW_ROWS)
+        for col in DATE_COLUMNS:
+            head[col] = head[col].dt.strftime("%Y-%m-%d")
+        # Tarihler metne çevrildikten sonra: metin sütunu object olmazsa None yine NaN olur
+        head = head.astype(object)
+        return cls(
+            rows=len(df),
+            cardinality={col: int(df[col].nunique()) for col in CATEGORY_COLUMNS},
+            numeric=numeric,
+            nulls={col: int(n) for col, n in df.isna().sum().items()},
+            # JSON'a yazılabilsin diye eksikler None, sayılar Python tipleri
+            preview={
+                "columns": head.columns.tolist(),
+                "data": head.where(head.notna(), None).values.tolist(),
+            },
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "cardinality": self.cardinality,
+            "numeric": self.numeric,
+            "nulls": self.nulls,
+            "preview": self.preview,
+        }
+
+    def preview_frame(self):
+        """Önizleme dilimi (tarih sütunları metin olarak)."""
+        return pd.DataFrame(self.preview["data"], columns=self.preview["columns"])
+
+
+@profiling.profiled("load.parse_csv")
+def _parse_csv(csv_path):
+    """CSV'yi okur ve ortak temizlik kurallarını uygular."""
+    return clean_dataset(pd.read_csv(csv_path))
+
+
+def clean_dataset(df):
+    """Ham veriye ortak temizlik kurallarını ve kompakt şemayı uygular."""
+    # Eksik verileri doldurma (Ortak temizlik kuralları)
+    df.fillna({'reviews_per_month': 0}, inplace=True)
+    df.fillna({'name': 'Unknown', 'host_name': 'Unknown'}, inplace=True)
+
+    before = df.memory_usage(deep=True).sum()
+    df = _apply_schema(df)
+    df = add_derived_columns(df)
+    report = memory_report(df)
+    log.info(
+        "Kompakt şema: %.1f MB -> %.1f MB\n%s",
+        before / 1e6, report['bytes'].sum() / 1e6, report.to_string(),
+    )
+    return df
+
+
+@profiling.profiled("load.read_cache")
+def _read_cache(csv_path, fingerprint):
+    """Geçerli bir önbellek varsa onu okur, yoksa None döndürür."""
+    parquet_path, meta_path = _cache_paths(csv_path)
+    if pyarrow is None or not os.path.exists(parquet_path) or not os.path.exists(meta_path):
+        return None, None
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("fingerprint") != fingerprint:
+            return None, None
+        return pd.read_parquet(parquet_path), meta
+    except (OSError, ValueError) as e:
+        log.warning("Önbellek okunamadı, CSV'ye dönülüyor: %s", e)
+        return None, None
+
+
+@profiling.profiled("load.write_cache")
+def _write_cache(df, csv_path, fingerprint, parse_seconds, profile):
+    """Temizlenmiş veriyi tipleriyle birlikte Parquet olarak CSV'nin yanına, özeti meta dosyasına yazar."""
+    if pyarrow is None:
+        log.info("pyarrow yüklü değil, Parquet önbelleği atlanıyor.")
+        return
+    parquet_path, meta_path = _cache_paths(csv_path)
+    meta = {
+        "fingerprint": fingerprint,
+        "csv_parse_seconds": parse_seconds,
+        "profile": profile.to_dict(),
+    }
+    try:
+        # Yarım kalmış dosya okunmasın diye önce geçici dosyaya yazılır
+        df.to_parquet(parquet_path + ".tmp", index=False)
+        os.replace(parquet_path + ".tmp", parquet_path)
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + ".tmp", meta_path)
+    except OSError as e:
+        log.warning("Parquet önbelleği yazılamadı: %s", e)
+
+
+def _load_frame(csv_path):
+    """
+    Temizlenmiş veriyi önbellekten ya da CSV'den okur; (df, fingerprint, profile)
+    döndürür. Özeti olmayan eski meta dosyalarında özet yeniden hesaplanır.
+    """
+    fingerprint = _csv_fingerprint(csv_path)
+
+    start = time.perf_counter()
+    df, meta = _read_cache(csv_path, fingerprint)
+    if df is not None:
+        profiling.annotate(cache="parquet", rows_out=len(df))
+        cache_seconds = time.perf_counter() - start
+        csv_seconds = meta.get("csv_parse_seconds")
+        log.info(
+            "Parquet önbelleği: %.3fs (CSV okuma %.3fs, %.1fx hızlı)",
+            cache_seconds, csv_seconds, csv_seconds / max(cache_seconds, 1e-9),
+        )
+        if "profile" in meta:
+            return df, fingerprint, DatasetProfile.from_dict(meta["profile"])
+        return df, fingerprint, DatasetProfile.from_frame(df)
+
+    start = time.perf_counter()
+    df = _parse_csv(csv_path)
+    profiling.annotate(cache="csv", rows_out=len(df))
+    parse_seconds = time.perf_counter() - start
+    log.info("CSV okuma: %.3fs, Parquet önbelleği yazılıyor", parse_seconds)
+    profile = DatasetProfile.from_frame(df)
+    _write_cache(df, csv_path, fingerprint, parse_seconds, profile)
+    return df, fingerprint, profile
+
+
+class Dataset:
+    """
+    Süreç genelinde paylaşılan, salt okunur veri seti.
+    Bütün oturumlar aynı nesneyi kullanır; modüller veriyi kopyalamadan dilimler.
+    """
+
+    def __init__(self, frame, version, profile=None):
+        self._frame = frame
+        # CSV içeriğine bağlı sürüm; veriden türetilen önbelleklerin anahtarı
+        self.version = version
+        # Filtre indeksleri yüklemede bir kez kurulur
+        with profiling.stage("load.filter_indexes", rows_in=len(frame)):
+            self.filters = FilterEngine(frame)
+        self._options = {
+            col: frame[col].dropna().unique().tolist() for col in CATEGORY_COLUMNS
+        }
+        self._numeric_columns = source_columns(frame.select_dtypes(include='number').columns)
+        self._row_bytes = {}
+        # Ağır türetilmiş yapılar (küp vb.) ilk kullanımda bir kez kurulur
+        self._derived = {}
+        self._derived_locks = {}
+        self._lock = threading.Lock()
+        if profile is not None:
+            self._derived['profile'] = profile
+
+    def __len__(self):
+        return len(self._frame)
+
+    def options(self, column):
+        """Kategorik sütunun değerleri (veride ilk görülme sırasıyla)."""
+        return list(self._options[column])
+
+    def numeric_columns(self):
+        """Sayısal kaynak sütunlar (türetilmiş sütunlar hariç); özellik seçicileri için."""
+        return self._numeric_columns
+
+    def select(self, **criteria):
+        """Kriterleri sağlayan satır numaraları; bkz. FilterEngine."""
+        return self.filters.select(**criteria)
+
+    def count(self, **criteria):
+        return self.filters.count(**criteria)
+
+    def rows(self, row_ids, columns=None):
+        """
+        Seçilen satırlar (ve istenirse yalnızca gereken sütunlar) için yeni çerçeve.
+        Kopyanın tahmini boyutu oturumun bellek hesabına yazılır.
+        """
+        frame = self._frame if columns is None else self._frame[columns]
+        session_memory.charge(len(row_ids) * self.row_bytes(frame.columns))
+        return frame.take(row_ids)
+
+    def row_bytes(self, columns):
+        """
+        rows() kopyasında satır başına yaklaşık bayt (dizin dahil). Kategorilerde
+        yalnızca kodlar kopyalanır; metin sütunlarında ~10.000 satırlık eşit aralıklı
+        örneğin ortalama derin boyutu alınır.
+        """
+        total = 8
+        for col in columns:
+            if col not in self._row_bytes:
+                series = self._frame[col]
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    size = series.cat.codes.dtype.itemsize
+                else:
+                    sample = series.iloc[::max(len(series) // 10_000, 1)]
+                    size = sample.memory_usage(deep=True, index=False) / max(len(sample), 1)
+                self._row_bytes[col] = size
+            total += self._row_bytes[col]
+        return total
+
+    def memory(self):
+        """Paylaşılan yapıların bellek boyutları (bayt): çerçeve, indeksler ve kurulmuş türetilmiş yapılar."""
+        sizes = {
+            'frame': int(self._frame.memory_usage(deep=True).sum()),
+            'filters': self.filters.nbytes(),
+        }
+        for name, value in list(self._derived.items()):
+            if hasattr(value, 'nbytes'):
+                sizes[name] = int(value.nbytes())
+        return sizes
+
+    def derived(self, name, builder):
+        """
+        Veriden bir kez türetilen yapıyı döndürür; yoksa builder(frame) ile kurar.
+        Aynı yapıyı aynı anda isteyen oturumlar tek kurulumu bekler.
+        """
+        if name in self._derived:
+            return self._derived[name]
+        with self._lock:
+            lock = self._derived_locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._derived:
+                start = time.perf_counter()
+                with profiling.stage(f"derived.{name}", rows_in=len(self._frame), cache="miss"):
+                    self._derived[name] = builder(self._frame)
+                log.info("%s kuruldu: %.3fs", name, time.perf_counter() - start)
+        return self._derived[name]
+
+    @property
+    def profile(self):
+        """Veri özeti; önbellekten gelmediyse ilk kullanımda hesaplanır."""
+        return self.derived('profile', DatasetProfile.from_frame)
+
+    @property
+    def cube(self):
+        """İlçe × semt × oda tipi × fiyat bandı toplam küpü."""
+        return self.derived('cube', lambda frame: AggregateCube(frame, self.filters))
+
+    @property
+    def price_histogram(self):
+        """(oda tipi, ilçe) başına 1$'lık taban fiyat histogramları."""
+        return self.derived('price_histogram', PriceHistogram)
+
+    @property
+    def correlation_stats(self):
+        """(oda tipi, ilçe, yorum kovası) başına korelasyon yeterli istatistikleri."""
+        return self.derived('correlation_stats', lambda frame: CorrelationStats(frame, self.filters, self._numeric_columns))
+
+    @property
+    def densities(self):
+        """Taban fiyat histogramlarından önbellekli keman yoğunlukları."""
+        return self.derived('densities', lambda frame: DensityEngine(self.price_histogram))
+
+    @property
+    def hex_bins(self):
+        """Her ilanın 200 m'lik altıgen hücresi; doluluk haritası bunlardan toplanır."""
+        return self.derived('hex_bins', lambda frame: HexBins(frame, self.filters))
+
+    @property
+    def sampler(self):
+        """(oda tipi, ilçe) katmanlı, uç değerleri koruyan deterministik örnekleyici."""
+        return self.derived('sampler', lambda frame: StratifiedSampler(frame, self.filters))
+
+    @property
+    def price_sketches(self):
+        """(oda tipi, ilçe) başına fiyat kantil özetleri (KLL)."""
+        return self.derived('price_sketches', CellSketches.from_frame)
+
+    @property
+    def df(self):
+        """
+        Paylaşılan çerçevenin sığ kopyası. Tamponlar ortaktır; Copy-on-Write
+        sayesinde bir modülün yaptığı yazma yalnızca kendi kopyasını değiştirir.
+        """
+        return self._frame.copy(deep=False)
+
+
+@st.cache_resource(show_spinner="Loading dataset...")
+def _shared_dataset(csv_path):
+    df, fingerprint, profile = _load_frame(csv_path)
+    return Dataset(df, version=fingerprint["sha256"][:16], profile=profile)
+
+
+def get_dataset():
+    """
+    Paylaşılan veri setini döndürür (sunucu başına bir kez yüklenir).
+    Dosya yoksa hata mesajı gösterip None döndürür.
     """
     try:
-        df = pd.read_csv("AB_NYC_2019.csv")
-        
-        # Eksik verileri doldurma (Ortak temizlik kuralları)
-        df.fillna({'reviews_per_month': 0}, inplace=True)
-        df.fillna({'name': 'Unknown', 'host_name': 'Unknown'}, inplace=True)
-        
-        return df
-        
+        # Süreç önbelleğinden geliyorsa "hit"; yüklenirse _load_frame "parquet"/"csv" yazar
+        with profiling.stage("load_dataset", cache="hit") as stage:
+            ds = _shared_dataset(DATA_PATH)
+            stage.set(rows_out=len(ds))
+            return ds
     except FileNotFoundError:
         st.error("Hata: 'AB_NYC_2019.csv' dosyası bulunamadı. Lütfen proje klasörüne ekleyin.")
-        return None
\ No newline at end of file
+        return None
+
+
+def load_dataset():
+    """
+    Veri setini yükler ve temizler.
+    Tüm modüller bu fonksiyonu kullanarak veriyi çeker; dönen çerçeve paylaşılan
+    verinin kopyasız görünümüdür.
+    """
+    ds = get_dataset()
+    return None if ds is None else ds.df
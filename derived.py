@@ -0,0 +1,54 @@
+"""
+Yüklemede bir kez, vektörel NumPy ile hesaplanan türetilmiş sütunlar.
+
+Sütunlar temizlenmiş çerçeveye eklenir ve Parquet önbelleğiyle birlikte
+saklanır; modüller ve toplam yapıları bunları okur, her yeniden çalıştırmada
+kopya çıkarıp yazmaz. Yeni bir sütun eklenince data_loader.SCHEMA_VERSION
+artırılmalı.
+"""
+import numpy as np
+
+from aggregates import N_PRICE_BANDS, REVIEW_BUCKET_MAX, REVIEW_BUCKET_WIDTH
+
+
+def occupied_days(df):
+    """Yıl içinde dolu gün sayısı (365 - availability_365; uygunluğu eksik ilanlarda 0)."""
+    return (365 - df['availability_365']).fillna(0).astype(np.int16)
+
+
+def price_band(df):
+    """
+    Fiyatın kantil bandı (0..N_PRICE_BANDS-1). Bantlar fiyat değerine göre
+    ayrıktır: aynı fiyat hep aynı bantta.
+    """
+    prices = df['price'].to_numpy()
+    if not len(prices):
+        return np.zeros(0, dtype=np.int8)
+    edges = np.unique(np.quantile(prices, np.linspace(0, 1, N_PRICE_BANDS + 1)))
+    return np.searchsorted(edges[1:-1], prices, side='right').astype(np.int8)
+
+
+def review_bucket(df):
+    """Yorum sayısı kovası (REVIEW_BUCKET_WIDTH genişliğinde; son kova üstünü tutar)."""
+    n_buckets = REVIEW_BUCKET_MAX // REVIEW_BUCKET_WIDTH + 1
+    return np.minimum(df['number_of_reviews'].to_numpy() // REVIEW_BUCKET_WIDTH, n_buckets - 1).astype(np.int8)
+
+
+# Sütun adı -> hesaplayan fonksiyon (sırayla eklenir)
+DERIVED_COLUMNS = {
+    'occupied_days': occupied_days,
+    'price_band': price_band,
+    'review_bucket': review_bucket,
+}
+
+
+def add_derived_columns(df):
+    """Kayıtlı türetilmiş sütunları çerçeveye ekler."""
+    for name, compute in DERIVED_COLUMNS.items():
+        df[name] = compute(df)
+    return df
+
+
+def source_columns(columns):
+    """Türetilmiş sütunlar dışındaki sütunlar (seçicilerde gösterilenler)."""
+    return [col for col in columns if col not in DERIVED_COLUMNS]
@@ -0,0 +1,428 @@
+"""
+Grafik çizim katmanı.
+
+Bütün grafikler st.plotly_chart / st.pydeck_chart / st.dataframe yerine buradaki
+render_* fonksiyonlarıyla çizilir. Tanılama açıksa her grafiğin serileştirilmiş
+boyutu, satır sayısı ve serileştirme süresi kaydedilir; kenar çubuğundaki
+panelde gösterilir ve log'a yazılır. Açmak için: ?diagnostics=1 ya da
+DASHBOARD_DIAGNOSTICS=1 ortam değişkeni.
+
+cached_figure: figürler (veri sürümü, grafik kimliği, widget durumu) anahtarıyla
+süreç genelindeki bir önbellekte serileştirilmiş JSON olarak tutulur. Bütün
+oturumlar paylaşır; toplam bayt sınırı aşılınca en eski kullanılan atılır.
+İsabette JSON st.plotly_chart'a doğrudan verilir (FigureSpec); figür yeniden kurulmaz.
+prerender, warmup'ın varsayılan durumdaki figürleri önceden çizdiği işleri kurar.
+
+encode_arrays: izlerin sayısal dizileri kayıpsız olarak en dar tipe (int8..int32,
+float32) indirilir. plotly>=6 numpy dizilerini base64 tipli dizi ("bdata") olarak
+yazar ve plotly.js bunları doğrudan çözer; eski plotly'de aynı diziler JSON
+listesi olarak gider. pydeck ikili aktarımı Streamlit'te desteklenmediği için
+harita verisi compact_frame ile kısa ondalık gösterimlere indirilir ve compact_deck
+girintisiz JSON yazar.
+
+chart_section: her grafik bölümü (kontroller + figür) bağımsız yeniden çalışan bir
+st.fragment olur; bölümün widget'ı değişince yalnızca o bölüm çalışır. Her
+çalışmanın süresi ve kapsamı (fragment / full) log'a yazılır.
+"""
+import base64
+import copy
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache, wraps
+
+import numpy as np
+import streamlit as st
+from plotly.basedatatypes import BaseFigure
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import profiling
+import session_memory
+
+log = logging.getLogger(__name__)
+
+_STATS_KEY = "_figure_stats"
+_SECTIONS_KEY = "_section_stats"
+# Figür önbelleğinin toplam boyut sınırı (serileştirilmiş JSON baytları)
+FIGURE_CACHE_BYTES = 64 * 1024 * 1024
+
+# Sayısal dizi taşıyan iz özellikleri; bunlar ikili tipli diziye çevrilir
+ARRAY_PROPERTIES = [
+    "x", "y", "z", "customdata", "values",
+    "marker.color", "marker.size", "line.color",
+    "link.source", "link.target", "link.value",
+]
+# Bundan kısa listeler olduğu gibi bırakılır (base64 başlığı kazançtan büyük)
+MIN_ENCODED_LENGTH = 16
+_INTEGER_TYPES = [np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32]
+_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def diagnostics_enabled():
+    if os.environ.get("DASHBOARD_DIAGNOSTICS", "") not in ("", "0"):
+        return True
+    return st.query_params.get("diagnostics", "0") not in ("", "0")
+
+
+def begin_run():
+    """Her yeniden çalıştırmanın başında önceki ölçümleri temizler."""
+    st.session_state[_STATS_KEY] = []
+    st.session_state[_SECTIONS_KEY] = []
+
+
+def _fragment_run():
+    """Bu çalıştırma yalnızca fragment'ları mı çalıştırıyor (kısmi yeniden çalıştırma)?"""
+    ctx = get_script_run_ctx()
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+
+def chart_section(name):
+    """
+    Bölüm fonksiyonunu st.fragment yapar: içindeki bir widget değişince yalnızca
+    bu bölüm yeniden çalışır. Argümanlar son tam çalıştırmadakilerdir; her
+    çalışmanın süresi log'a (tanılama açıksa panele) yazılır.
+    """
+    def decorate(func):
+        @wraps(func)
+        def timed(*args, **kwargs):
+            fragment = _fragment_run()
+            if fragment:
+                # Yalnızca fragment çalışıyor: app.main atlandığı için ölçümler burada açılır
+                profiling.begin_run("fragment")
+                session_memory.begin_run()
+            start = time.perf_counter()
+            try:
+                with profiling.stage(name):
+                    return func(*args, **kwargs)
+            finally:
+                if fragment:
+                    session_memory.end_run()
+                elapsed = (time.perf_counter() - start) * 1000
+                scope = "fragment" if fragment else "full"
+                log.info("%s bölümü (%s): %.1f ms", name, scope, elapsed)
+                if diagnostics_enabled():
+                    st.session_state.setdefault(_SECTIONS_KEY, []).append(
+                        {"section": name, "scope": scope, "ms": round(elapsed, 1)}
+                    )
+        return st.fragment(timed)
+    return decorate
+
+
+def project(frame, *encodings):
+    """
+    Çerçeveyi grafiğin gerçekten kodladığı sütunlara indirir. encodings: sütun
+    adları, sütun listeleri ya da pydeck ifadeleri ('[longitude, latitude]',
+    'Listings: {count}'); ifadelerde geçen sütun adları seçilir.
+    """
+    wanted = []
+    for encoding in encodings:
+        if encoding is None:
+            continue
+        names = [encoding] if isinstance(encoding, str) else list(encoding)
+        for name in names:
+            tokens = [name] if name in frame.columns else _NAME.findall(str(name))
+            wanted.extend(t for t in tokens if t in frame.columns)
+    return frame[list(dict.fromkeys(wanted))]
+
+
+def narrow(values):
+    """
+    Sayısal diziyi değerlerini değiştirmeden en dar tipe indirir: tam sayılar (ve
+    tam sayı değerli, NaN içermeyen ondalıklar) int8..int32'ye, float32'de aynen
+    temsil edilebilen ondalıklar float32'ye. Sayısal olmayanlar aynen döner.
+    """
+    if isinstance(values, (list, tuple)):
+        if len(values) < MIN_ENCODED_LENGTH or not all(
+            isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in values
+        ):
+            return values
+        values = np.asarray(values)
+    if not isinstance(values, np.ndarray) or values.dtype.kind not in "iuf" or values.size < MIN_ENCODED_LENGTH:
+        return values
+
+    if values.dtype.kind == "f":
+        with np.errstate(invalid="ignore"):
+            integral = np.isfinite(values).all() and np.array_equal(values, np.round(values))
+        if not integral:
+            as32 = values.astype(np.float32)
+            if values.dtype != np.float32 and np.array_equal(as32.astype(values.dtype), values, equal_nan=True):
+                return as32
+            return values
+
+    low, high = values.min(), values.max()
+    for dtype in _INTEGER_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values if values.dtype == dtype else values.astype(dtype)
+    return values
+
+
+def encode_arrays(fig):
+    """Figürün izlerindeki sayısal dizileri yerinde daraltır; figürü döndürür."""
+    for trace in fig.data:
+        for prop in ARRAY_PROPERTIES:
+            *parents, leaf = prop.split(".")
+            holder = trace
+            for parent in parents:
+                holder = holder[parent] if parent in holder else None
+                if holder is None:
+                    break
+            if holder is not None and leaf in holder:
+                _assign(holder, leaf, holder[leaf])
+        if trace.type == "parcoords":
+            for dimension in trace.dimensions:
+                _assign(dimension, "values", dimension.values)
+    return fig
+
+
+def _assign(obj, prop, value):
+    narrowed = narrow(value)
+    if narrowed is value:
+        return
+    # plotly, değerce eşit diziyi yeniden atamayı yok sayar; tip değişsin diye önce silinir
+    obj[prop] = None
+    obj[prop] = narrowed
+
+
+def compact_frame(frame):
+    """
+    JSON'a yazılacak çerçevenin ondalık sütunlarını kısaltır: tam sayı değerliler
+    int olur, float32 sütunlar float32'nin en kısa ondalık gösterimine
+    (40.84492111206055 yerine 40.844921) çevrilir. Değerler float32 hassasiyetinde korunur.
+    """
+    columns = {}
+    for name in frame.columns:
+        values = frame[name].to_numpy()
+        if values.dtype.kind != "f" or not len(values):
+            continue
+        if np.isfinite(values).all() and np.array_equal(values, np.round(values)):
+            columns[name] = values.astype(np.int64)
+        elif values.dtype == np.float32:
+            columns[name] = values.astype(str).astype(np.float64)
+    return frame.assign(**columns) if columns else frame
+
+
+@lru_cache(maxsize=None)
+def _compact_deck_class():
+    # pydeck yalnızca harita çizen sayfada içe aktarılır (Ana Sayfa'nın açılışını yavaşlatmaz)
+    import pydeck as pdk
+    from pydeck.bindings.json_tools import default_serialize
+
+    class CompactDeck(pdk.Deck):
+        def to_json(self):
+            return json.dumps(self, sort_keys=True, default=default_serialize, separators=(",", ":"))
+
+    return CompactDeck
+
+
+def compact_deck(**kwargs):
+    """pydeck.Deck(**kwargs); JSON'u girintisiz yazar (pydeck'in varsayılanı indent=2)."""
+    return _compact_deck_class()(**kwargs)
+
+
+def _record(chart_id, kind, count_rows, serialize):
+    if not diagnostics_enabled():
+        return
+    rows = count_rows()
+    start = time.perf_counter()
+    size = serialize()
+    elapsed = time.perf_counter() - start
+    entry = {"chart": chart_id, "kind": kind, "rows": rows, "bytes": size, "serialize_ms": elapsed * 1000}
+    st.session_state.setdefault(_STATS_KEY, []).append(entry)
+    log.info("%s (%s): %d satır, %d bayt, %.1f ms", chart_id, kind, rows, size, elapsed * 1000)
+
+
+def _array_length(value):
+    """Dizi, liste ya da ikili tipli dizinin ({"dtype", "bdata"}) eleman sayısı."""
+    if value is None:
+        return 0
+    if isinstance(value, dict) and "bdata" in value:
+        return len(base64.b64decode(value["bdata"])) // np.dtype(value["dtype"]).itemsize
+    return int(np.size(value))
+
+
+def _plotly_rows(fig):
+    """Figürün izlerindeki toplam veri noktası sayısı."""
+    rows = 0
+    for trace in fig.to_dict().get("data", []):
+        kind = trace.get("type")
+        if kind == "parcoords":
+            dimensions = trace.get("dimensions") or []
+            rows += _array_length(dimensions[0].get("values")) if dimensions else 0
+        elif kind == "sankey":
+            rows += _array_length(trace.get("link", {}).get("value"))
+        else:
+            for attr in ("z", "values", "x", "y"):
+                if trace.get(attr) is not None:
+                    rows += _array_length(trace[attr])
+                    break
+    return rows
+
+
+class FigureSpec(BaseFigure):
+    """
+    Önbellekteki figürün hazır JSON'u. st.plotly_chart figür nesnelerini doğrulanmış
+    sayar ve yalnızca to_dict'i çağırır; go.Figure yeniden kurulmaz. Her to_dict
+    yeni bir sözlük döndürür, önbellekteki metin değişmez. Yalnızca render_plotly'ye verilir:
+    BaseFigure.__init__ çalışmadığı için diğer figür metotları kullanılamaz.
+    tests/test_figures.py bunu gerçek st.plotly_chart üzerinden çizer; Streamlit ya da
+    plotly figür nesnelerini farklı okursa test kırılır.
+    """
+
+    def __init__(self, spec):
+        # BaseFigure.__init__ izleri doğrulayarak kurar; burada atlanır
+        object.__setattr__(self, "_spec", spec)
+
+    def to_dict(self):
+        return json.loads(self._spec)
+
+    def to_json(self, *args, **kwargs):
+        return self._spec
+
+
+def render_plotly(chart_id, fig, **kwargs):
+    """st.plotly_chart; diziler daraltılır, tanılama açıksa figürün JSON boyutu kaydedilir."""
+    with profiling.stage(f"{chart_id}.render"):
+        if not isinstance(fig, FigureSpec):
+            encode_arrays(fig)
+        _record(chart_id, "plotly", lambda: _plotly_rows(fig), lambda: len(fig.to_json()))
+        return st.plotly_chart(fig, **kwargs)
+
+
+def render_deck(chart_id, deck, **kwargs):
+    """st.pydeck_chart; tanılama açıksa deck JSON boyutunu kaydeder."""
+    with profiling.stage(f"{chart_id}.render"):
+        _record(chart_id, "pydeck", lambda: sum(len(layer.data) for layer in deck.layers),
+                lambda: len(deck.to_json()))
+        return st.pydeck_chart(deck, **kwargs)
+
+
+def render_dataframe(chart_id, frame, **kwargs):
+    """st.dataframe; tanılama açıksa tablonun bellek boyutunu kaydeder."""
+    with profiling.stage(f"{chart_id}.render", rows_in=len(frame)):
+        _record(chart_id, "dataframe", lambda: len(frame), lambda: int(frame.memory_usage(deep=True).sum()))
+        return st.dataframe(frame, **kwargs)
+
+
+class FigureCache:
+    """Toplam bayt sınırlı, iş parçacığı güvenli LRU önbellek; isabet/ıska/atma sayaçlı."""
+
+    def __init__(self, max_bytes=FIGURE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size):
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries), "bytes": self.bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions,
+            }
+
+
+@st.cache_resource
+def figure_cache():
+    """Bütün oturumların paylaştığı figür önbelleği."""
+    return FigureCache()
+
+
+def selection(values):
+    """
+    Sırası anlamsız çoklu seçimi (ilçeler, oda tipleri) sıralı listeye çevirir;
+    aynı seçenekler farklı sırada seçilince aynı önbellek kaydı kullanılır. Sırası
+    anlamlı seçimlere (ısı haritası özellikleri, paralel koordinat boyutları) uygulanmaz.
+    """
+    return sorted(values)
+
+
+def _state_key(state):
+    """Widget durumunu sıralı, karşılaştırılabilir bir metne çevirir."""
+    return json.dumps(state, sort_keys=True, default=lambda v: v.item() if hasattr(v, "item") else str(v))
+
+
+def cached_figure(chart_id, version, state, build):
+    """
+    (figür, meta) döndürür. build() saf olmalıdır: sonucu yalnızca veri sürümüne
+    ve `state`e bağlı, (go.Figure ya da None, JSON'a çevrilebilir meta) döner.
+    İsabette build çağrılmaz; figür önbellekteki JSON'u taşıyan bir FigureSpec'tir.
+    meta her çağırana kopya olarak verilir.
+    """
+    cache = figure_cache()
+    key = (version, chart_id, _state_key(state))
+    with profiling.stage(f"{chart_id}.cached_figure") as stage:
+        entry = cache.get(key)
+        if entry is None:
+            stage.set(cache="miss")
+            with profiling.stage(f"{chart_id}.build"):
+                fig, meta = build()
+            with profiling.stage(f"{chart_id}.serialize"):
+                spec = None if fig is None else encode_arrays(fig).to_json()
+            entry = (spec, meta)
+            cache.put(key, entry, len(spec or "") + len(_state_key(meta)))
+            return fig, copy.deepcopy(meta)
+        stage.set(cache="hit")
+        spec, meta = entry
+        return (None if spec is None else FigureSpec(spec)), copy.deepcopy(meta)
+
+
+def prerender(chart_id, ds, builder, state):
+    """Figürü `state` durumunda kurup önbelleğe koyan iş (warmup); builder(ds, **state)."""
+    return lambda: cached_figure(chart_id, ds.version, state, lambda: builder(ds, **state))
+
+
+def diagnostics_panel():
+    """Bu çalıştırmada çizilen grafiklerin ölçümleri (tanılama açıksa)."""
+    stats = st.session_state.get(_STATS_KEY, [])
+    if not diagnostics_enabled() or not stats:
+        return
+    with st.sidebar.expander("📦 Payload diagnostics", expanded=False):
+        sections = st.session_state.get(_SECTIONS_KEY, [])
+        if sections:
+            st.dataframe(sections, hide_index=True, use_container_width=True)
+        st.dataframe(
+            [{**s, "KB": round(s["bytes"] / 1024, 1), "serialize_ms": round(s["serialize_ms"], 1)} for s in stats],
+            column_order=["chart", "kind", "rows", "KB", "serialize_ms"],
+            hide_index=True,
+            use_container_width=True,
+        )
+        total = sum(s["bytes"] for s in stats)
+        st.caption(f"Total: {total / 1024:,.1f} KB across {len(stats)} charts")
+        cache = figure_cache().stats()
+        st.caption(
+            f"Figure cache: {cache['entries']} entries, {cache['bytes'] / 1024:,.0f} KB, "
+            f"{cache['hits']} hits / {cache['misses']} misses, {cache['evictions']} evictions"
+        )
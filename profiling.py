@@ -0,0 +1,201 @@
+"""
+Sıcak yol profil katmanı.
+
+profiling.stage(name) bir aşamanın (veri yükleme, filtreleme/toplama, figür
+kurulumu, serileştirme) süresini kaydeder; aşamaya giren/çıkan satır sayısı ve
+önbellek isabeti alan olarak eklenir. Kayıtlar yeniden çalıştırma başına bir izde
+toplanır, kenar çubuğundaki panelde gösterilir ve Chrome trace-event JSON'u olarak
+indirilir (chrome://tracing ya da ui.perfetto.dev). Açmak için: ?profile=1 ya da
+DASHBOARD_PROFILE=1 ortam değişkeni.
+
+Kapalıyken stage() paylaşılan boş bir nesne döndürür; maliyet bir thread-local
+okumasıdır. İz, çalıştırmayı yürüten iş parçacığına bağlıdır: arka plan iş
+parçacıklarındaki aşamalar kaydedilmez.
+"""
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+import streamlit as st
+
+_TRACES_KEY = "_profile_traces"
+# Oturum başına saklanan son izler (tam ve fragment çalıştırmaları)
+TRACE_HISTORY = 10
+
+_local = threading.local()
+
+
+def enabled():
+    if os.environ.get("DASHBOARD_PROFILE", "") not in ("", "0"):
+        return True
+    return st.query_params.get("profile", "0") not in ("", "0")
+
+
+class Trace:
+    """Bir yeniden çalıştırmanın aşama kayıtları (başlangıca göre saniye)."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.created = time.time()
+        self.origin = time.perf_counter()
+        self.events = []
+        self.open = []
+
+    def total_ms(self):
+        # Yalnızca en dıştaki aşamalar toplanır (iç içe aşamalar iki kez sayılmaz)
+        return sum(e["dur"] for e in self.events if e["depth"] == 0) * 1000
+
+    def table(self):
+        """Panel için başlangıç sırasına göre aşamalar."""
+        rows = []
+        for e in sorted(self.events, key=lambda e: e["start"]):
+            rows.append({
+                "stage": "· " * e["depth"] + e["name"],
+                "ms": round(e["dur"] * 1000, 2),
+                "rows_in": e["fields"].get("rows_in"),
+                "rows_out": e["fields"].get("rows_out"),
+                "cache": e["fields"].get("cache"),
+            })
+        return rows
+
+    def chrome_events(self):
+        """Chrome trace-event biçimi: her aşama bir "X" (tam) olayı, süreler µs."""
+        return [{
+            "name": e["name"],
+            "cat": e["name"].split(".")[0],
+            "ph": "X",
+            "ts": round((self.created + e["start"]) * 1e6, 1),
+            "dur": round(e["dur"] * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": e["tid"],
+            "args": {"scope": self.scope, **{k: v for k, v in e["fields"].items() if v is not None}},
+        } for e in self.events]
+
+
+def chrome_trace(traces):
+    """İzleri tek bir Chrome trace JSON'unda birleştirir (zaman damgaları mutlak)."""
+    events = [event for trace in traces for event in trace.chrome_events()]
+    return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+
+class _Stage:
+    __slots__ = ("trace", "name", "fields", "start", "depth")
+
+    def __init__(self, trace, name, fields):
+        self.trace = trace
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.depth = len(self.trace.open)
+        self.trace.open.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.trace.open.pop()
+        self.trace.events.append({
+            "name": self.name,
+            "start": self.start - self.trace.origin,
+            "dur": end - self.start,
+            "depth": self.depth,
+            "tid": threading.get_ident(),
+            "fields": self.fields,
+        })
+        return False
+
+
+class _NoStage:
+    """Profil kapalıyken stage()'in döndürdüğü boş bağlam."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **fields):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+def begin_run(scope="full"):
+    """
+    Yeniden çalıştırmanın başında yeni iz açar; profil kapalıysa önceki izi
+    kapatır. Tam çalıştırmada app, fragment çalıştırmasında chart_section çağırır.
+    """
+    if not enabled():
+        _local.trace = None
+        return
+    trace = Trace(scope)
+    _local.trace = trace
+    traces = st.session_state.setdefault(_TRACES_KEY, [])
+    traces.append(trace)
+    del traces[:-TRACE_HISTORY]
+
+
+def stage(name, **fields):
+    """with profiling.stage("ad", rows_in=n) as s: ...; s.set(rows_out=m)"""
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        return _NO_STAGE
+    return _Stage(trace, name, fields)
+
+
+def annotate(**fields):
+    """Açık olan en içteki aşamaya alan ekler (ör. önbellek isabeti)."""
+    trace = getattr(_local, "trace", None)
+    if trace is not None and trace.open:
+        trace.open[-1].fields.update(fields)
+
+
+def profiled(name):
+    """Fonksiyonun her çağrısını bir aşama olarak kaydeden dekoratör."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = getattr(_local, "trace", None)
+            if trace is None:
+                return func(*args, **kwargs)
+            with _Stage(trace, name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def panel():
+    """
+    Bu çalıştırmanın aşama tablosu, son çalıştırmaların toplamları ve Chrome trace
+    indirme (profil açıksa). Fragment çalıştırmaları bir sonraki tam çalıştırmada
+    listede görünür.
+    """
+    traces = st.session_state.get(_TRACES_KEY, [])
+    if not enabled() or not traces:
+        return
+    with st.sidebar.expander("⏱️ Profile", expanded=False):
+        current = traces[-1]
+        st.dataframe(current.table(), hide_index=True, use_container_width=True)
+        st.caption(f"This run: {current.total_ms():,.1f} ms across {len(current.events)} stages")
+        st.dataframe(
+            [{"run": i + 1, "scope": t.scope, "ms": round(t.total_ms(), 1), "stages": len(t.events)}
+             for i, t in enumerate(traces)],
+            hide_index=True,
+            use_container_width=True,
+        )
+        st.download_button(
+            f"Download Chrome trace ({len(traces)} runs)",
+            data=chrome_trace(traces),
+            file_name=f"trace-{int(current.created)}.json",
+            mime="application/json",
+            on_click="ignore",
+        )
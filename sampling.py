@@ -0,0 +1,155 @@
+"""
+Paralel koordinatlar gibi satır satır çizilen grafikler için katmanlı örnekleme.
+
+Her satıra yüklemede sabit tohumlu rastgele bir öncelik verilir. (oda tipi, ilçe)
+katmanının satırları önceliğe göre sıralı bir rezervuarda tutulur: sıranın ilk m
+elemanı katmanın düzgün rastgele bir örneğidir. Filtreler değişince de aynı
+öncelikler kullanıldığından örnek deterministik kalır, yalnızca filtreyi
+geçmeyen satırlar düşer. Ayrıca her katmanda her sayısal sütunun en küçük ve en
+büyük değerli satırları saklanır; aykırı ilanlar örnekte kaybolmaz.
+"""
+import numpy as np
+
+STRATA = ['room_type', 'neighbourhood_group']
+
+# Katman başına önceliğe göre saklanan en fazla satır (grafiğin üst sınırı 3000)
+RESERVOIR_SIZE = 10_000
+# Katman ve sütun başına saklanan uç satır sayısı (alt ve üst ayrı ayrı); örneğe
+# de sütun başına en fazla bu kadar eklenir
+EXTREMES_PER_DIMENSION = 5
+# Seçilen her dolu katmandan örneğe girecek en az satır (nadir oda tipleri için)
+MIN_PER_STRATUM = 5
+# Uç satırlar örneğin en fazla bu oranını kaplar
+MAX_EXTREME_FRACTION = 0.1
+SEED = 42
+
+
+class StratifiedSampler:
+    """Katman rezervuarları ve uç değer kümeleri üzerinden O(örnek) örnekleme."""
+
+    def __init__(self, frame, engine, seed=SEED):
+        self._engine = engine
+        self._categories = {col: frame[col].cat.categories for col in STRATA}
+        numeric = frame.select_dtypes(include=[np.number]).columns
+        self._values = {col: frame[col].to_numpy() for col in numeric}
+        self.priority = np.random.default_rng(seed).random(len(frame)).astype(np.float32)
+
+        rooms = frame['room_type'].cat.codes.to_numpy().astype(np.int64)
+        boroughs = frame['neighbourhood_group'].cat.codes.to_numpy().astype(np.int64)
+        stratum = rooms * len(self._categories['neighbourhood_group']) + boroughs
+        stratum[(rooms < 0) | (boroughs < 0)] = -1
+        # Önce katmana, katman içinde önceliğe göre sırala
+        order = np.lexsort((self.priority, stratum))
+        order = order[stratum[order] >= 0]
+        sorted_strata = stratum[order]
+
+        index_dtype = np.int32 if len(frame) < 2 ** 31 else np.int64
+        self.sizes = {}
+        self.reservoirs = {}
+        self.extremes = {}
+        for code in np.unique(sorted_strata):
+            start, stop = np.searchsorted(sorted_strata, [code, code + 1])
+            rows = order[start:stop]
+            key = (
+                self._categories['room_type'][code // len(self._categories['neighbourhood_group'])],
+                self._categories['neighbourhood_group'][code % len(self._categories['neighbourhood_group'])],
+            )
+            self.sizes[key] = len(rows)
+            self.reservoirs[key] = rows[:RESERVOIR_SIZE].astype(index_dtype)
+            self.extremes[key] = {
+                col: self._extreme_rows(values[rows], rows).astype(index_dtype)
+                for col, values in self._values.items()
+            }
+
+    @staticmethod
+    def _extreme_rows(values, rows):
+        k = EXTREMES_PER_DIMENSION
+        valid = ~np.isnan(values) if values.dtype.kind == 'f' else np.ones(len(values), dtype=bool)
+        values, rows = values[valid], rows[valid]
+        if len(values) <= 2 * k:
+            return rows
+        order = np.argsort(values, kind='stable')
+        return rows[np.concatenate([order[:k], order[-k:]])]
+
+    def nbytes(self):
+        return self.priority.nbytes + sum(r.nbytes for r in self.reservoirs.values()) + sum(
+            ids.nbytes for cols in self.extremes.values() for ids in cols.values()
+        )
+
+    def _stratum_rows(self, key, criteria):
+        """Katmanın filtreyi geçen satırları, öncelik sırasıyla (tahmini toplamla birlikte)."""
+        reservoir = self.reservoirs[key]
+        passing = reservoir[self._engine.matches(reservoir, **criteria)]
+        if len(reservoir) == self.sizes[key]:
+            return passing, len(passing)
+        # Rezervuar katmanın bir önekidir: geçme oranı katman toplamını tahmin eder
+        return passing, len(passing) * self.sizes[key] / len(reservoir)
+
+    def _stratum_all(self, key, criteria):
+        """Rezervuar yetmediğinde katmanın tamamından öncelik sıralı satırlar."""
+        room, borough = key
+        ids = self._engine.select(room_type=[room], neighbourhood_group=[borough], **criteria)
+        return ids[np.argsort(self.priority[ids], kind='stable')]
+
+    def sample(self, size, room_types=None, boroughs=None, dimensions=(), **criteria):
+        """
+        Filtreleri sağlayan satırlardan en fazla `size` satırlık örnek (satır numaraları, artan).
+        Katmanlara eleman sayılarıyla orantılı pay verilir, her dolu katmandan en az
+        MIN_PER_STRATUM satır alınır; `dimensions` sütunlarının uç satırları eklenir.
+        """
+        keys = [
+            key for key in self.reservoirs
+            if (room_types is None or key[0] in room_types) and (boroughs is None or key[1] in boroughs)
+        ]
+        candidates = {key: self._stratum_rows(key, criteria) for key in keys}
+        candidates = {key: value for key, value in candidates.items() if value[1] > 0}
+        if not candidates or size <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        extreme_ids = self._extremes(candidates, dimensions, criteria)[:int(size * MAX_EXTREME_FRACTION)]
+        quota = self._allocate(size - len(extreme_ids), {key: value[1] for key, value in candidates.items()})
+        parts = [extreme_ids]
+        for key, count in quota.items():
+            rows, total = candidates[key]
+            if count > len(rows) and total > len(rows):
+                rows = self._stratum_all(key, criteria)
+            # Uç satır olarak zaten alınanlar katman payından düşülmez
+            parts.append(rows[~np.isin(rows, extreme_ids)][:count])
+        ids = np.concatenate(parts)
+        if len(ids) > size:
+            # Katman tabanları toplamı aşarsa fazlası en düşük öncelikliden atılır
+            ids = ids[np.argsort(self.priority[ids], kind='stable')[:size]]
+        return np.sort(ids)
+
+    def _extremes(self, candidates, dimensions, criteria):
+        """Seçili katmanlarda filtreyi geçen, her sütunun en küçük/en büyük değerli satırları."""
+        k = EXTREMES_PER_DIMENSION
+        chosen = []
+        for col in dimensions:
+            pool = np.concatenate([self.extremes[key][col] for key in candidates if col in self.extremes[key]]
+                                  or [np.empty(0, dtype=np.int64)])
+            pool = pool[self._engine.matches(pool, **criteria)]
+            if len(pool) > 2 * k:
+                order = np.argsort(self._values[col][pool], kind='stable')
+                pool = pool[np.concatenate([order[:k], order[-k:]])]
+            chosen.append(pool)
+        ids = np.unique(np.concatenate(chosen or [np.empty(0, dtype=np.int64)]))
+        return ids[np.argsort(self.priority[ids], kind='stable')]
+
+    @staticmethod
+    def _allocate(size, totals):
+        """Katman payları: orantılı, her katmana en az MIN_PER_STRATUM (varsa)."""
+        total = sum(totals.values())
+        if total <= size:
+            return {key: int(np.ceil(t)) for key, t in totals.items()}
+        floor = {key: int(min(MIN_PER_STRATUM, np.ceil(t))) for key, t in totals.items()}
+        remaining = max(size - sum(floor.values()), 0)
+        rest = {key: max(t - floor[key], 0) for key, t in totals.items()}
+        rest_total = sum(rest.values()) or 1
+        exact = {key: remaining * r / rest_total for key, r in rest.items()}
+        quota = {key: floor[key] + int(e) for key, e in exact.items()}
+        # En büyük kalanlar yöntemiyle toplamı tamamla
+        leftover = size - sum(quota.values())
+        for key in sorted(exact, key=lambda k: exact[k] - int(exact[k]), reverse=True)[:max(leftover, 0)]:
+            quota[key] += 1
+        return quota
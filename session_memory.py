@@ -0,0 +1,143 @@
+"""
+Oturum başına bellek muhasebesi ve bütçe.
+
+Bir oturumun belleği iki kısımdır: yeniden çalıştırma sırasında paylaşılan
+çerçeveden kopyalanan satırlar (Dataset.rows, charge() ile sayılır; boyut satır
+başına bayt tahminiyle hesaplanır) ve çalıştırmalar arasında oturum durumunda
+kalan değerler (çalıştırma sonunda estimate_size ile tahmin edilir). Ölçümler
+süreç genelindeki bir kayıtta toplanır; yönetici sayfası bunları gösterir.
+Sayfa ?admin=<DASHBOARD_ADMIN_TOKEN> ile açılır (hmac.compare_digest ile
+karşılaştırılır); değişken tanımlı değilse kapalıdır.
+
+Bütçe SESSION_MEMORY_BUDGET_MB ortam değişkeniyle ayarlanır (varsayılan 64).
+Sayfalar satır kopyalamadan önce limit_rows() ile sığan satır sayısını sorar;
+bütçe dolmuşsa örneklenmiş ya da toplanmış çizime geçer ve çalıştırma "kısıtlı"
+olarak kaydedilir. tracemalloc süreç geneli ölçtüğü (oturumları ayıramadığı) ve
+her ayırmayı yavaşlattığı için kullanılmaz.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+MB = 1 << 20
+SESSION_BUDGET_BYTES = int(float(os.environ.get("SESSION_MEMORY_BUDGET_MB", "64")) * MB)
+# Sunucu çalışma zamanı yoksa (AppTest, bare mode) bu süre görülmeyen oturumlar atılır
+SESSION_TTL = 30 * 60
+# estimate_size'ın iç içe kaplara inme derinliği
+_MAX_DEPTH = 4
+
+log = logging.getLogger(__name__)
+_local = threading.local()
+_lock = threading.Lock()
+_sessions = {}
+
+
+def estimate_size(obj, _depth=0):
+    """Nesnenin yaklaşık bellek boyutu (bayt); çerçeve ve dizilerde tam."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if _depth >= _MAX_DEPTH:
+        return size
+    if isinstance(obj, dict):
+        return size + sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(v, _depth + 1) for v in obj)
+    if hasattr(obj, "__dict__"):
+        return size + estimate_size(vars(obj), _depth + 1)
+    return size
+
+
+def begin_run(page=None):
+    """
+    Çalıştırma ölçümünü başlatır. Tam çalıştırmada app sayfa adıyla, fragment
+    çalıştırmasında chart_section sayfa adı olmadan çağırır.
+    """
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        _local.run = None
+        return
+    with _lock:
+        previous = _sessions.get(ctx.session_id)
+    _local.run = {
+        "session": ctx.session_id,
+        "page": page or (previous["page"] if previous else None),
+        # Bütçeden önce düşülen kısım: önceki çalıştırmadan kalan oturum durumu
+        "retained": previous["retained"] if previous else 0,
+        "transient": 0,
+        "degraded": False,
+    }
+
+
+def charge(nbytes):
+    """Bu çalıştırmada oturum için ayrılan geçici belleği sayar."""
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run["transient"] += int(nbytes)
+
+
+def limit_rows(n_rows, bytes_per_row):
+    """
+    Bütçeye sığan en fazla satır sayısı (en çok n_rows). Sınır devreye girerse
+    çalıştırma kısıtlı olarak işaretlenir; çağıran örneklenmiş çizime geçer.
+    """
+    run = getattr(_local, "run", None)
+    if run is None or bytes_per_row <= 0:
+        return n_rows
+    free = SESSION_BUDGET_BYTES - run["retained"] - run["transient"]
+    allowed = max(int(free // bytes_per_row), 0)
+    if allowed >= n_rows:
+        return n_rows
+    if not run["degraded"]:
+        log.info("Oturum %s bellek bütçesine ulaştı: %d satır yerine %d", run["session"][:8], n_rows, allowed)
+    run["degraded"] = True
+    return allowed
+
+
+def end_run():
+    """Oturum durumunun boyutunu tahmin eder ve ölçümü kayda yazar."""
+    run = getattr(_local, "run", None)
+    if run is None:
+        return
+    _local.run = None
+    retained = sum(estimate_size(st.session_state[key]) for key in list(st.session_state))
+    now = time.time()
+    with _lock:
+        entry = _sessions.setdefault(run["session"], {"runs": 0, "peak": 0, "degraded_runs": 0})
+        entry["runs"] += 1
+        entry["page"] = run["page"]
+        entry["retained"] = retained
+        entry["transient"] = run["transient"]
+        entry["peak"] = max(entry["peak"], run["retained"] + run["transient"], retained)
+        entry["degraded"] = run["degraded"]
+        entry["degraded_runs"] += run["degraded"]
+        entry["last_seen"] = now
+        for session_id in [s for s, e in _sessions.items() if now - e["last_seen"] > SESSION_TTL]:
+            del _sessions[session_id]
+
+
+def _active(session_id):
+    if runtime.exists():
+        return runtime.get_instance().is_active_session(session_id)
+    return True
+
+
+def sessions():
+    """Etkin oturumların ölçümleri (en çok bellek tutan önce)."""
+    with _lock:
+        for session_id in [s for s in _sessions if not _active(s)]:
+            del _sessions[session_id]
+        rows = [{"session": s, **e} for s, e in _sessions.items()]
+    return sorted(rows, key=lambda r: -(r["retained"] + r["transient"]))
@@ -0,0 +1,190 @@
+"""
+Birleştirilebilir kantil özetleri (KLL sketch).
+
+Her (oda tipi, ilçe) hücresi için fiyatların bir KLL özeti tutulur. Yüzdelik
+kesim, medyan ve kutu grafiği çeyrekleri, aktif filtrelerin seçtiği hücrelerin
+özetleri birleştirilerek sıralama yapmadan hesaplanır.
+
+Hata sınırı: k=200 ile bir kantilin sıra (rank) hatası, ilgili hücrelerdeki
+toplam n satırın yaklaşık %1.65'i kadardır (%99 güvenle; Karnin-Lang-Liberty,
+DataSketches KLL tabloları). k'dan az değer tutan hücreler kesin sonuç verir.
+Bir fiyat aralığıyla sınırlanmış kantillerde hata yine hücrelerin toplam n'ine
+göredir; dar aralıklarda göreli hata bu yüzden büyür.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_K = 200
+# Seviye kapasitelerinin geometrik azalma oranı (KLL makalesindeki c)
+CAPACITY_RATIO = 2 / 3
+
+
+class KLLSketch:
+    """Tek bir sayı akışının KLL özeti; güncelleme ve birleştirme desteklenir."""
+
+    def __init__(self, k=DEFAULT_K, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.min = np.inf
+        self.max = -np.inf
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def n(self):
+        """Özetlenen toplam değer sayısı (sıkıştırma ağırlığı korur)."""
+        return int(sum(len(level) << h for h, level in enumerate(self.levels)))
+
+    def update(self, values):
+        """Bir değer yığınını özete ekler (akış halinde parça parça çağrılabilir)."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Başka bir özeti bu özete katar (seviye seviye birleştirip sıkıştırır)."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def weighted_items(self):
+        """Özetteki değerler ve ağırlıkları (seviye h'deki öğe 2^h değeri temsil eder)."""
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 1 << h, dtype=np.int64)
+                                  for h, level in enumerate(self.levels)])
+        return values, weights
+
+    def _capacity(self, h):
+        depth = len(self.levels) - 1 - h
+        return max(2, int(np.ceil(self.k * CAPACITY_RATIO ** depth)))
+
+    def _compress(self):
+        # Kapasiteyi aşan en alt seviye sıralanır, rastgele tek/çift konumdaki
+        # yarısı bir üst seviyeye (iki kat ağırlıkla) taşınır.
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) <= self._capacity(h):
+                h += 1
+                continue
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            level = np.sort(level)
+            keep = level[:len(level) % 2]
+            level = level[len(level) % 2:]
+            promoted = level[self._rng.integers(2)::2]
+            self.levels[h] = keep
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h = 0
+
+
+def weighted_quantile(values, weights, q):
+    """Ağırlıklı öğelerden q kantili (values sıralı olmayabilir)."""
+    if not len(values):
+        return np.nan
+    order = np.argsort(values, kind='stable')
+    values, cumulative = values[order], np.cumsum(weights[order])
+    target = q * cumulative[-1]
+    return float(values[min(np.searchsorted(cumulative, target, side='left'), len(values) - 1)])
+
+
+class CellSketches:
+    """(oda tipi, ilçe) hücresi başına bir sütunun KLL özetleri."""
+
+    DIMENSIONS = ['room_type', 'neighbourhood_group']
+
+    def __init__(self, column='price', k=DEFAULT_K):
+        self.column = column
+        self.k = k
+        self.sketches = {}
+
+    @classmethod
+    def from_frame(cls, frame, column='price', k=DEFAULT_K):
+        return cls(column, k).update(frame)
+
+    @classmethod
+    def from_csv(cls, path, column='price', k=DEFAULT_K, chunksize=500_000):
+        """Belleğe sığmayan veri setleri için CSV'yi tek geçişte parça parça özetler."""
+        sketches = cls(column, k)
+        for chunk in pd.read_csv(path, usecols=cls.DIMENSIONS + [column], chunksize=chunksize):
+            sketches.update(chunk)
+        return sketches
+
+    def update(self, frame):
+        """Bir veri parçasındaki değerleri ilgili hücre özetlerine ekler."""
+        grouped = frame.groupby(self.DIMENSIONS, observed=True, sort=False)[self.column]
+        for key, values in grouped:
+            if key not in self.sketches:
+                # Tohum hücreden türetilir: aynı veri her seferinde aynı özeti üretir
+                self.sketches[key] = KLLSketch(self.k, seed=len(self.sketches))
+            self.sketches[key].update(values.to_numpy())
+        return self
+
+    def nbytes(self):
+        return sum(level.nbytes for s in self.sketches.values() for level in s.levels)
+
+    def _selected(self, room_types, boroughs):
+        return [
+            sketch for (room, borough), sketch in self.sketches.items()
+            if (room_types is None or room in room_types)
+            and (boroughs is None or borough in boroughs)
+        ]
+
+    def quantiles(self, qs, room_types=None, boroughs=None, low=None, high=None):
+        """
+        Seçili hücrelerde [low, high] aralığındaki değerlerin qs kantilleri.
+        0 ve 1 kantilleri tutulan gerçek min/max'tan kesin döner. Boşsa None.
+        """
+        selected = self._selected(room_types, boroughs)
+        if not selected:
+            return None
+        values = np.concatenate([s.weighted_items()[0] for s in selected])
+        weights = np.concatenate([s.weighted_items()[1] for s in selected])
+        lowest = min(s.min for s in selected)
+        highest = max(s.max for s in selected)
+        inside = np.ones(len(values), dtype=bool)
+        if low is not None:
+            inside &= values >= low
+            lowest = max(lowest, low)
+        if high is not None:
+            inside &= values <= high
+            highest = min(highest, high)
+        if not inside.any():
+            return None
+        values, weights = values[inside], weights[inside]
+        results = []
+        for q in np.atleast_1d(qs):
+            if q <= 0:
+                results.append(float(values.min()) if low is not None else float(lowest))
+            elif q >= 1:
+                results.append(float(values.max()) if high is not None else float(highest))
+            else:
+                results.append(weighted_quantile(values, weights, q))
+        return results
+
+    def quantile(self, q, room_types=None, boroughs=None, low=None, high=None):
+        result = self.quantiles([q], room_types, boroughs, low, high)
+        return None if result is None else result[0]
+
+    def box_stats(self, room_types=None, boroughs=None, low=None, high=None):
+        """Kutu grafiği istatistikleri: çeyrekler ve 1.5*IQR bıyıkları."""
+        result = self.quantiles([0, 0.25, 0.5, 0.75, 1], room_types, boroughs, low, high)
+        if result is None:
+            return None
+        minimum, q1, median, q3, maximum = result
+        iqr = q3 - q1
+        return {
+            'q1': q1, 'median': median, 'q3': q3,
+            'lowerfence': max(minimum, q1 - 1.5 * iqr),
+            'upperfence': min(maximum, q3 + 1.5 * iqr),
+        }
@@ -1,69 +1,33 @@
+import logging
+
 import streamlit as st
 import plotly.express as px
+import plotly.graph_objects as go
 import pydeck as pdk
 import pandas as pd
 import numpy as np
 
+import figures
+import profiling
 
-def run_ahmet_module(data):
-    """
-
-
-    1. Bar Chart
-    2. Violin Plot
-    3. 3D Hexagon Map
-    """
-
-    # Veri kopyalama
-    df = data.copy()
+log = logging.getLogger(__name__)
 
-    with st.sidebar:
-        st.markdown("Filters")
 
-        selected_groups = st.multiselect(
-            "Choose Borough ",
-            options=df['neighbourhood_group'].unique(),
-            default=df['neighbourhood_group'].unique(),
-            key="u3_region_select"
-        )
+# Grafik kurucuları saftır: sonuç yalnızca veri setine ve kenar çubuğu filtrelerine
+# bağlıdır; figures.cached_figure bunları (sürüm, grafik, durum) anahtarıyla önbellekler.
 
-        selected_room_types = st.multiselect(
-            "Choose Room Types",
-            options=df['room_type'].unique(),
-            default=df['room_type'].unique(),
-            key="u3_room_type_select"
-        )
-
-        price_range = st.slider(
-            "Price Range ($)",
-            int(df['price'].min()),
-            int(df['price'].max()),
-            (int(df['price'].min()), int(df['price'].max())),
-            key="u3_price_slider"
-        )
-
-    filtered_df = df[
-        (df['neighbourhood_group'].isin(selected_groups)) &
-        (df['room_type'].isin(selected_room_types)) &
-        (df['price'] >= price_range[0]) &
-        (df['price'] <= price_range[1])
-        ]
-
-    if filtered_df.empty:
-        st.warning("Veri yok.")
-        return
-
-    st.markdown("Airbnb market analysis")
+def _bar_figure(ds, groups, room_types, price_range):
     compact_margin = dict(l=0, r=0, t=30, b=0)
-
-    # ---------------------------------------------------------
-    # GRAFİK 1: En Pahalı Semtler (BAR CHART)
-    # ---------------------------------------------------------
-    st.markdown("#### 1. Which Neighborhoods Are the Most Expensive? ")
-    st.caption("Sorting neighborhoods by average nightly prices.")
-
-    top_expensive = filtered_df.groupby('neighbourhood')['price'].mean().sort_values(ascending=False).head(
-        10).reset_index()
+    # Semt ortalamaları toplam küpünden (ham satırlar taranmaz)
+    with profiling.stage("ahmet_top_neighbourhoods.aggregate", rows_in=len(ds)) as stage:
+        top_expensive = ds.cube.rollup(
+            ['neighbourhood'],
+            price=price_range,
+            neighbourhood_group=groups,
+            room_type=room_types,
+        ).rename(columns={'price_mean': 'price'})[['neighbourhood', 'price']]
+        stage.set(rows_out=len(top_expensive))
+    top_expensive = top_expensive.sort_values('price', ascending=False).head(10).reset_index(drop=True)
 
     fig1 = px.bar(
         top_expensive,
@@ -77,55 +41,122 @@ def run_ahmet_module(data):
         height=500
     )
     fig1.update_layout(yaxis=dict(autorange="reversed"), margin=compact_margin)
-    st.plotly_chart(fig1, use_container_width=True)
-
-    st.markdown("---")
-
-    # ---------------------------------------------------------
-    # GRAFİK 2: Fiyat Dağılımı (VIOLIN PLOT)
-    # ---------------------------------------------------------
-    st.markdown("#### 2.Price distribution by room tpyes. 🎻")
-    st.caption("Ranges where prices are concentrated (Violin Chart).")
-
-    # Outlier temizliği (500$ altı)
-    violin_df = filtered_df[filtered_df['price'] < 500]
-
-    fig2 = px.violin(
-        violin_df,
-        x="room_type",
-        y="price",
-        color="room_type",
-        box=True,
-        points=False,
-        hover_data=violin_df.columns
-    )
+    return fig1, None
+
+
+def _violin_figure(ds, groups, room_types, price_range):
+    # Outlier temizliği (500$ altı). Yoğunluklar ve kutu istatistikleri sunucuda
+    # hesaplanır; figüre satırlar değil oda tipi başına birkaç yüz nokta girer.
+    violin_low, violin_high = price_range[0], min(price_range[1], 499)
+    boroughs_key = tuple(sorted(groups))
+    room_order = [r for r in ds.options('room_type') if r in room_types]
+    colors = px.colors.qualitative.Plotly
+
+    fig2 = go.Figure()
+    violin_rooms = []
+    violin_rows = 0
+    for room in room_order:
+        with profiling.stage("ahmet_violin.density", rows_in=len(ds)) as stage:
+            curve = ds.densities.violin(room, boroughs_key, violin_low, violin_high)
+            stage.set(rows_out=0 if curve is None else curve['n'])
+        if curve is None:
+            continue
+        position = len(violin_rooms)
+        color = colors[position % len(colors)]
+        violin_rooms.append(room)
+        violin_rows += curve['n']
+        half_width = 0.4 * curve['density'] / curve['density'].max()
+        fig2.add_trace(go.Scatter(
+            x=np.concatenate([position - half_width, (position + half_width)[::-1]]),
+            y=np.concatenate([curve['y'], curve['y'][::-1]]),
+            fill='toself',
+            mode='lines',
+            line=dict(color=color, width=1),
+            opacity=0.6,
+            name=room,
+            hoverinfo='skip',
+        ))
+
+        # Kutu çeyrekleri ham fiyatları sıralamak yerine kantil özetlerinden gelir
+        with profiling.stage("ahmet_violin.box_stats"):
+            stats = ds.price_sketches.box_stats(
+                room_types=[room],
+                boroughs=groups,
+                low=violin_low,
+                high=violin_high,
+            )
+        if stats is None:
+            continue
+        fig2.add_trace(go.Box(
+            x=[position],
+            q1=[stats['q1']],
+            median=[stats['median']],
+            q3=[stats['q3']],
+            lowerfence=[stats['lowerfence']],
+            upperfence=[stats['upperfence']],
+            name=room,
+            width=0.08,
+            fillcolor='rgba(255,255,255,0.6)',
+            line_color=color,
+            hoverinfo='y',
+        ))
+
+    if log.isEnabledFor(logging.INFO):
+        log.info("violin: %d satır -> %d bayt figür", violin_rows, len(fig2.to_json()))
 
     fig2.update_layout(
         yaxis_title="Gecelik Fiyat ($)",
         xaxis_title="Oda Tipi",
+        xaxis=dict(tickmode='array', tickvals=list(range(len(violin_rooms))), ticktext=violin_rooms),
         showlegend=False,
         height=550,
         margin=dict(l=20, r=20, t=40, b=20)
     )
-    st.plotly_chart(fig2, use_container_width=True)
+    return fig2, None
 
-    st.markdown("---")
 
-    # ---------------------------------------------------------
-    # GRAFİK 3: 3D Bölgesel Doluluk Haritası (PYDECK HEXAGON)
-    # ---------------------------------------------------------
-    st.markdown("#### 3. 3D Borough Demand/Occupancy Map 🧊")
+# Bölümlerin kendi widget'ı yok (kenar çubuğu filtreleri tam yeniden çalıştırma
+# yapar); fragment olmaları gerekmez, süreleri profiling.stage ile ayrı ölçülür.
+def _bar_section(ds, selected_groups, selected_room_types, price_range):
+    st.markdown("#### 1. Which Neighborhoods Are the Most Expensive? ")
+    st.caption("Sorting neighborhoods by average nightly prices.")
 
+    bar_state = dict(
+        groups=figures.selection(selected_groups),
+        room_types=figures.selection(selected_room_types),
+        price_range=price_range,
+    )
+    fig1, _ = figures.cached_figure(
+        "ahmet_top_neighbourhoods", ds.version, bar_state, lambda: _bar_figure(ds, **bar_state)
+    )
+    figures.render_plotly("ahmet_top_neighbourhoods", fig1, use_container_width=True)
 
 
-    # 1. Doluluk Hesabı
-    filtered_df['occupied_days'] = 365 - filtered_df['availability_365']
+def _violin_section(ds, selected_groups, selected_room_types, price_range):
+    st.markdown("#### 2.Price distribution by room tpyes. 🎻")
+    st.caption("Ranges where prices are concentrated (Violin Chart).")
 
-    # 2. NaN Temizliği
-    filtered_df['occupied_days'] = filtered_df['occupied_days'].fillna(0)
+    violin_state = dict(
+        groups=figures.selection(selected_groups),
+        room_types=figures.selection(selected_room_types),
+        price_range=price_range,
+    )
+    fig2, _ = figures.cached_figure(
+        "ahmet_violin", ds.version, violin_state, lambda: _violin_figure(ds, **violin_state)
+    )
+    figures.render_plotly("ahmet_violin", fig2, use_container_width=True)
 
-    # 3. Veri Tipi Zorlama
-    filtered_df['occupied_days'] = filtered_df['occupied_days'].astype(float)
+
+def _hex_section(ds, selected_groups, selected_room_types, price_range):
+    st.markdown("#### 3. 3D Borough Demand/Occupancy Map 🧊")
+
+
+
+    # Doluluk (365 - availability_365) altıgen başına sunucuda toplanır; haritaya
+    # satırlar yerine yalnızca dolu hücrelerin merkezleri ve toplamları gider
+    with profiling.stage("ahmet_hex_map.aggregate", rows_in=len(ds)) as stage:
+        hex_cells = ds.hex_bins.query(selected_groups, selected_room_types, price_range)
+        stage.set(rows_out=len(hex_cells))
 
     # Harita Başlangıç Açısı
     view_state = pdk.ViewState(
@@ -137,15 +168,22 @@ def run_ahmet_module(data):
     )
 
 
+    hex_tooltip = {"text": "Listings: {count}\nOccupied days: {occupied_days}"}
+
+    # HexagonLayer görünümü: 6 köşeli sütunlar, sivri tepe yukarı (angle=90)
     layer = pdk.Layer(
-        "HexagonLayer",
-        data=filtered_df,
+        "ColumnLayer",
+        data=figures.compact_frame(
+            figures.project(hex_cells, '[longitude, latitude]', 'elevation', 'color', hex_tooltip["text"])
+        ),
         get_position='[longitude, latitude]',
-        radius=200,
+        radius=ds.hex_bins.radius,
+        disk_resolution=6,
+        angle=90,
 
-        # Yükseklik Ayarları
-        get_elevation_weight='occupied_days',
-        elevation_aggregation='SUM',
+        # Yükseklik Ayarları (toplam doluluk günleri önceden ölçeklendi)
+        get_elevation='elevation',
+        get_fill_color='color',
 
         elevation_scale=300,
 
@@ -155,8 +193,102 @@ def run_ahmet_module(data):
         auto_highlight=True,
     )
 
-    st.pydeck_chart(pdk.Deck(
+    figures.render_deck("ahmet_hex_map", figures.compact_deck(
         map_style=None,  #
         initial_view_state=view_state,
         layers=[layer],
+        tooltip=hex_tooltip,
     ))
+
+
+def run_ahmet_module(ds):
+    """
+
+
+    1. Bar Chart
+    2. Violin Plot
+    3. 3D Hexagon Map
+    """
+
+    # Paylaşılan veri kopyalanmaz; filtreler bitmap indeksinden çözülür ve
+    # seçilen dilimler Copy-on-Write ile ortak veriden ayrışır
+    price_min, price_max = ds.filters.value_range('price')
+
+    with st.sidebar:
+        st.markdown("Filters")
+
+        selected_groups = st.multiselect(
+            "Choose Borough ",
+            options=ds.options('neighbourhood_group'),
+            default=ds.options('neighbourhood_group'),
+            key="u3_region_select"
+        )
+
+        selected_room_types = st.multiselect(
+            "Choose Room Types",
+            options=ds.options('room_type'),
+            default=ds.options('room_type'),
+            key="u3_room_type_select"
+        )
+
+        price_range = st.slider(
+            "Price Range ($)",
+            int(price_min),
+            int(price_max),
+            (int(price_min), int(price_max)),
+            key="u3_price_slider"
+        )
+
+    # Grafikler önceden toplanmış yapılardan çizilir; satırlar kopyalanmaz
+    with profiling.stage("ahmet.filter", rows_in=len(ds)) as stage:
+        n_filtered = ds.count(
+            neighbourhood_group=selected_groups,
+            room_type=selected_room_types,
+            price=price_range,
+        )
+        stage.set(rows_out=n_filtered)
+
+    if n_filtered == 0:
+        st.warning("Veri yok.")
+        return
+
+    st.markdown("Airbnb market analysis")
+
+    # ---------------------------------------------------------
+    # GRAFİK 1: En Pahalı Semtler (BAR CHART)
+    # ---------------------------------------------------------
+    with profiling.stage("ahmet_top_neighbourhoods"):
+        _bar_section(ds, selected_groups, selected_room_types, price_range)
+
+    st.markdown("---")
+
+    # ---------------------------------------------------------
+    # GRAFİK 2: Fiyat Dağılımı (VIOLIN PLOT)
+    # ---------------------------------------------------------
+    with profiling.stage("ahmet_violin"):
+        _violin_section(ds, selected_groups, selected_room_types, price_range)
+
+    st.markdown("---")
+
+    # ---------------------------------------------------------
+    # GRAFİK 3: 3D Bölgesel Doluluk Haritası (PYDECK HEXAGON)
+    # ---------------------------------------------------------
+    with profiling.stage("ahmet_hex_map"):
+        _hex_section(ds, selected_groups, selected_room_types, price_range)
+
+
+def default_figures(ds):
+    """
+    Varsayılan kenar çubuğu filtreleriyle (bütün ilçeler, oda tipleri ve fiyatlar)
+    ön çizim işleri (warmup). Harita pydeck olduğu için figür önbelleğine girmez;
+    yalnızca altıgen toplamı (HexBins önbelleği) önceden hesaplanır.
+    """
+    groups = figures.selection(ds.options('neighbourhood_group'))
+    room_types = figures.selection(ds.options('room_type'))
+    price_min, price_max = ds.filters.value_range('price')
+    state = dict(groups=groups, room_types=room_types, price_range=(int(price_min), int(price_max)))
+    return {
+        "ahmet_top_neighbourhoods": figures.prerender("ahmet_top_neighbourhoods", ds, _bar_figure, state),
+        "ahmet_violin": figures.prerender("ahmet_violin", ds, _violin_figure, state),
+        "ahmet_hex_map": lambda: ds.hex_bins.query(groups, room_types, state['price_range']),
+    }
@@ -1,426 +1,731 @@
+import os
+
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 import pandas as pd
 
-def run_mehmet_module(df):
-    st.header("Mehmet Dora's Analysis")
-    st.markdown("""
-    This section analyzes **Price vs Popularity**, **Multidimensional Feature Profiles**, 
-    and **Category Flows** with interactive controls.
-    """)
-    st.divider()
-    
-    st.markdown("""
-        <style>
-        div[data-baseweb="tab-list"] {
-            justify-content: center;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
-    # Navbar
-    tab1, tab2, tab3 = st.tabs([
-        "Price vs Popularity",
-        "Multidimensional Profile",
-        "Category Flow"
-    ])
-    
-    # scatter plot
-    with tab1:
-        st.subheader("1. Price vs Popularity (Scatter Plot)")
-        st.info("""
-            **Related Questions:**
-            - Do cheaper properties have higher review counts?
-            - Does the number of reviews decrease as price increases?
-            - Are some neighborhoods both expensive and popular?
-            - Are there outliers? (For example, listings at $1000 with 0 reviews)
-        """)    
-        
-        st.markdown("**Chart Data Filter**")
-        col_f1, col_f2 = st.columns(2)
-        
-        with col_f1:
-            selected_groups_scatter = st.multiselect(
-                "Neighbourhood Group:",
-                options=sorted(df['neighbourhood_group'].dropna().unique().tolist()),
-                default=sorted(df['neighbourhood_group'].dropna().unique().tolist()),
-                key="scatter_groups",
-                help=(
-                    "Select which neighborhoods to include in the scatter plot. "
-                    "By removing certain neighbourhood_group values, you can focus on "
-                    "the price-review relationship for specific areas."
-                )
-            )
-        
-        with col_f2:
-            max_price_scatter = st.slider(
-                "Max Price Filter ($)",
-                min_value=50,
-                max_value=int(min(2000, df['price'].max())),
-                value=500,
-                step=50,
-                help=(
-                    "This value determines the maximum price displayed in the chart. "
-                    "Listings with prices above this threshold are filtered out. "
-                    "Use this to exclude extremely expensive (outlier) listings."
+import figures
+import profiling
+import session_memory
+from density import density_image
+
+# Bu sayının üstünde dağılım grafiği noktalar yerine yoğunluk görüntüsü olarak çizilir
+SCATTER_POINT_LIMIT = 20_000
+# Seçilen bölge için tabloda gösterilen en fazla ilan
+SCATTER_DETAIL_ROWS = 500
+# Yoğunluk görüntüsünde hover için kullanılan kaba ızgaranın hücre boyu (piksel)
+SCATTER_HOVER_CELL = 10
+# Nokta modunda ve yoğunluk görüntüsünde kopyalanan sütunlar
+SCATTER_COLUMNS = ["price", "number_of_reviews", "neighbourhood_group", "name", "room_type", "neighbourhood"]
+DENSITY_COLUMNS = ["price", "number_of_reviews", "neighbourhood_group"]
+
+
+# Grafik kurucuları saftır: sonuç yalnızca veri setine ve verilen widget durumuna
+# bağlıdır; figures.cached_figure bunları (sürüm, grafik, durum) anahtarıyla önbellekler.
+
+def _parallel_figure(ds, dims, room_types, max_rows, min_reviews):
+    # Katmanlı örnek: nadir oda tipleri ve uç ilanlar korunur, yalnızca örnek satırlar kopyalanır
+    with profiling.stage("mehmet_parallel.sample", rows_in=len(ds)) as stage:
+        pc_ids = ds.sampler.sample(
+            max_rows,
+            room_types=room_types,
+            dimensions=dims,
+            number_of_reviews=(min_reviews, None),
+        )
+        df_pc = ds.rows(pc_ids, dims + ["room_type"]).dropna()
+        stage.set(rows_out=len(df_pc))
+    if df_pc.empty:
+        return None, None
+
+    unique_room_types = df_pc["room_type"].unique().tolist()
+    room_type_map = {rt: i for i, rt in enumerate(unique_room_types)}
+    df_pc["room_type_code"] = df_pc["room_type"].map(room_type_map).astype(int)
+
+    num_types = len(room_type_map)
+    qualitative_colors = px.colors.qualitative.Set1
+    color_scale = []
+    legend = []
+
+    for i, (rt, code) in enumerate(room_type_map.items()):
+        color = qualitative_colors[i % len(qualitative_colors)]
+        t0 = code / max(num_types - 1, 1)
+        t1 = code / max(num_types - 1, 1)
+        color_scale.append([t0, color])
+        color_scale.append([t1, color])
+        legend.append((rt, color))
+
+    fig_pc = go.Figure(
+        data=go.Parcoords(
+            line=dict(
+                color=df_pc["room_type_code"],
+                colorscale=color_scale,
+                cmin=0,
+                cmax=max(num_types - 1, 1),
+                showscale=False
+            ),
+            dimensions=[
+                dict(
+                    label=dim.replace("_", " ").title(),
+                    values=df_pc[dim]
                 )
-            )
-        
-        min_reviews_scatter = st.slider(
-            "Min Reviews:",
-            min_value=0,
-            max_value=int(df['number_of_reviews'].max()),
-            value=0,
-            step=5,
+                for dim in dims
+            ]
+        )
+    )
+    fig_pc.update_layout(
+        margin=dict(l=80, r=80, t=60, b=50)
+    )
+    fig_pc.update_traces(
+        labelfont=dict(size=12),
+        rangefont=dict(size=10),
+        tickfont=dict(size=10),
+    )
+    return fig_pc, {'legend': legend, 'n': len(df_pc)}
+
+
+def _sankey_figure(ds, groups, room_types, max_price, min_count):
+    """Veri yoksa (None, None), akışların hepsi eşikte elenirse (None, meta)."""
+    # Akış adetleri ham satırlar yerine toplam küpünden toplanır
+    with profiling.stage("mehmet_sankey.aggregate", rows_in=len(ds)) as stage:
+        df_sankey = ds.cube.rollup(
+            ["neighbourhood_group", "room_type"],
+            price=(None, max_price),
+            neighbourhood_group=groups,
+            room_type=room_types,
+        )[["neighbourhood_group", "room_type", "count"]]
+        stage.set(rows_out=len(df_sankey))
+    if df_sankey.empty:
+        return None, None
+
+    grouped = df_sankey[df_sankey["count"] >= min_count]
+    meta = {'flows': len(grouped), 'listings': int(df_sankey['count'].sum())}
+    if grouped.empty:
+        return None, meta
+
+    group_labels = sorted(grouped["neighbourhood_group"].unique().tolist())
+    room_labels = sorted(grouped["room_type"].unique().tolist())
+    labels = group_labels + room_labels
+
+    label_to_index = {label: i for i, label in enumerate(labels)}
+
+    sources, targets, values = [], [], []
+    for _, row in grouped.iterrows():
+        s = label_to_index[row["neighbourhood_group"]]
+        t = label_to_index[row["room_type"]]
+        v = int(row["count"])
+        sources.append(s)
+        targets.append(t)
+        values.append(v)
+
+    fig_sankey = go.Figure(data=[go.Sankey(
+        node=dict(
+            pad=15,
+            thickness=20,
+            label=labels
+        ),
+        link=dict(
+            source=sources,
+            target=targets,
+            value=values
+        )
+    )])
+    fig_sankey.update_layout(
+        title_text="Flow of Listings from Neighbourhood Group to Room Type",
+        font_size=12,
+        height=600
+    )
+    return fig_sankey, meta
+
+
+def _point_scatter(df_points, max_price, use_log_y):
+    """
+    Fiyat-yorum noktaları, ilçe başına bir WebGL izi (renkler yoğunluk görüntüsüyle
+    aynı). Ayrıntılar tek boyutlu hovertext'te: plotly iç içe customdata
+    dizilerini çok daha yavaş serileştirir.
+    """
+    groups = df_points['neighbourhood_group'].cat
+    colors = px.colors.qualitative.Plotly
+    codes = groups.codes.to_numpy()
+    details = (
+        df_points['name'].astype(str) + "<br>" + df_points['room_type'].astype(str)
+        + " · " + df_points['neighbourhood'].astype(str)
+    ).to_numpy(dtype=object)
+    price = df_points['price'].to_numpy()
+    reviews = df_points['number_of_reviews'].to_numpy()
+
+    fig = go.Figure()
+    for code, name in enumerate(groups.categories):
+        rows = np.flatnonzero(codes == code)
+        if not len(rows):
+            continue
+        fig.add_trace(go.Scattergl(
+            x=price[rows], y=reviews[rows], hovertext=details[rows],
+            mode='markers', name=name, opacity=0.7,
+            marker=dict(color=colors[code % len(colors)]),
+            hovertemplate="%{hovertext}<br>Price: $%{x}<br>Reviews: %{y}<extra>%{fullData.name}</extra>",
+        ))
+    fig.update_layout(
+        title=f"Price vs Number of Reviews (≤ ${max_price})",
+        xaxis_title="Price ($)",
+        yaxis_title="Number of Reviews (log scale)" if use_log_y else "Number of Reviews",
+        legend_title="Neighbourhood Group",
+    )
+    if use_log_y:
+        fig.update_yaxes(type="log")
+    return fig
+
+
+def _density_scatter(df_points, max_price, min_reviews, use_log_y):
+    """
+    Fiyat-yorum noktalarının ilçe renkli yoğunluk görüntüsü. Log ölçekte y ekseni
+    log1p(yorum) uzayında kutulanır (bkz. _axis_to_reviews).
+    """
+    groups = df_points['neighbourhood_group'].cat
+    colors = px.colors.qualitative.Plotly
+    palette = [px.colors.hex_to_rgb(colors[k % len(colors)]) for k in range(len(groups.categories))]
+
+    reviews = df_points['number_of_reviews'].to_numpy().astype(np.float64)
+    y = np.log1p(reviews) if use_log_y else reviews
+    y_range = (np.log1p(min_reviews), np.log1p(reviews.max())) if use_log_y else (min_reviews, reviews.max())
+    y_range = (y_range[0], max(y_range[1], y_range[0] + 1))
+    x_range = (0, max_price)
+    source, counts = density_image(
+        df_points['price'].to_numpy().astype(np.float64), y, groups.codes.to_numpy(), palette, x_range, y_range,
+    )
+
+    fig = go.Figure()
+    # Kaba ızgarada saydam ısı haritası: hover'da hücre başına ilan sayısı
+    cell = SCATTER_HOVER_CELL
+    k, height, width = counts.shape
+    coarse = counts.sum(axis=0).reshape(height // cell, cell, width // cell, cell).sum(axis=(1, 3))
+    x_step = (x_range[1] - x_range[0]) / (width // cell)
+    y_step = (y_range[1] - y_range[0]) / (height // cell)
+    y_centers = y_range[0] + y_step * (np.arange(height // cell) + 0.5)
+    fig.add_trace(go.Heatmap(
+        z=np.where(coarse > 0, coarse, np.nan).astype(np.float32),
+        x=x_range[0] + x_step * (np.arange(width // cell) + 0.5),
+        y=y_centers,
+        customdata=np.repeat((np.expm1(y_centers) if use_log_y else y_centers).round().astype(np.int32)[:, None], width // cell, axis=1),
+        opacity=0,
+        showscale=False,
+        hovertemplate="Price ≈ $%{x:.0f}<br>Reviews ≈ %{customdata:.0f}<br>Listings: %{z}<extra></extra>",
+    ))
+    # Lejant için boş izler
+    present = counts.sum(axis=(1, 2)) > 0
+    for code, name in enumerate(groups.categories):
+        if present[code]:
+            fig.add_trace(go.Scatter(
+                x=[None], y=[None], mode='markers', name=name,
+                marker=dict(color=colors[code % len(colors)], size=8),
+            ))
+
+    fig.add_layout_image(
+        source=source, xref="x", yref="y",
+        x=x_range[0], y=y_range[1],
+        sizex=x_range[1] - x_range[0], sizey=y_range[1] - y_range[0],
+        sizing="stretch", layer="below",
+    )
+    fig.update_layout(
+        title=f"Price vs Number of Reviews (≤ ${max_price})",
+        xaxis=dict(title="Price ($)", range=list(x_range)),
+        yaxis=dict(
+            title="Number of Reviews (log scale)" if use_log_y else "Number of Reviews",
+            range=list(y_range),
+        ),
+        legend_title="Neighbourhood Group",
+        dragmode="select",
+    )
+    if use_log_y:
+        ticks = np.array([t for t in [0, 1, 3, 10, 30, 100, 300, 1000, 3000]
+                          if y_range[0] <= np.log1p(t) <= y_range[1]])
+        fig.update_yaxes(tickmode="array", tickvals=np.log1p(ticks), ticktext=[str(t) for t in ticks])
+    return fig
+
+
+def _axis_to_reviews(use_log_y):
+    """Yoğunluk figürünün y ekseni değerini yorum sayısına çeviren fonksiyon."""
+    if use_log_y:
+        return lambda value: float(np.expm1(value))
+    return float
+
+
+def _density_figure(ds, groups, max_price, min_reviews, use_log_y, sample_rows):
+    """
+    Yoğunluk görüntüsü ve çizilen satırların ortalamaları. sample_rows verilirse
+    (oturum bellek bütçesi) eşit aralıklı bir örnek çizilir.
+    """
+    density_ids = ds.select(
+        price=(None, max_price),
+        number_of_reviews=(min_reviews, None),
+        neighbourhood_group=groups,
+    )
+    if sample_rows is not None and sample_rows < len(density_ids):
+        density_ids = density_ids[::-(-len(density_ids) // max(sample_rows, 1))]
+    df_points = ds.rows(density_ids, DENSITY_COLUMNS)
+    with profiling.stage("mehmet_scatter.density", rows_in=len(df_points)):
+        fig = _density_scatter(df_points, max_price, min_reviews, use_log_y)
+    return fig, {
+        'rows': len(df_points),
+        'avg_price': float(df_points['price'].mean()),
+        'avg_reviews': float(df_points['number_of_reviews'].mean()),
+    }
+
+
+def _keep_widget_state(keys):
+    """
+    Streamlit, bir çalıştırmada çizilmeyen widget'ların durumunu siler. Kapalı
+    sekmenin değerleri oturum durumuna yeniden yazılır; sekme açılınca widget'lar
+    kaldıkları değerden başlar.
+    """
+    for key in keys:
+        if key in st.session_state:
+            st.session_state[key] = st.session_state[key]
+
+
+def _default_dims(numeric_cols):
+    """Paralel koordinatlarda varsayılan olarak seçili boyutlar."""
+    candidate_dims = [
+        col for col in ["price", "minimum_nights", "availability_365", "number_of_reviews"]
+        if col in numeric_cols
+    ]
+    return candidate_dims if len(candidate_dims) >= 3 else numeric_cols[:4]
+
+
+@figures.chart_section("mehmet_scatter")
+def _scatter_tab(ds):
+    price_max = ds.filters.value_range('price')[1]
+    reviews_max = ds.filters.value_range('number_of_reviews')[1]
+    st.subheader("1. Price vs Popularity (Scatter Plot)")
+    st.info("""
+        **Related Questions:**
+        - Do cheaper properties have higher review counts?
+        - Does the number of reviews decrease as price increases?
+        - Are some neighborhoods both expensive and popular?
+        - Are there outliers? (For example, listings at $1000 with 0 reviews)
+    """)    
+
+    st.markdown("**Chart Data Filter**")
+    col_f1, col_f2 = st.columns(2)
+
+    with col_f1:
+        selected_groups_scatter = st.multiselect(
+            "Neighbourhood Group:",
+            options=sorted(ds.options('neighbourhood_group')),
+            default=sorted(ds.options('neighbourhood_group')),
+            key="scatter_groups",
             help=(
-                "Sets the minimum number of reviews that listings must have to be displayed. "
-                "Listings with fewer reviews than this value are filtered out. "
-                "This allows you to focus on more popular listings."
+                "Select which neighborhoods to include in the scatter plot. "
+                "By removing certain neighbourhood_group values, you can focus on "
+                "the price-review relationship for specific areas."
             )
         )
-        
-        use_log_y = st.checkbox(
-            "Use Log Scale for Reviews",
-            value=False,
+
+    with col_f2:
+        max_price_scatter = st.slider(
+            "Max Price Filter ($)",
+            min_value=50,
+            max_value=int(min(2000, price_max)),
+            value=500,
+            step=50,
+            key="scatter_max_price",
             help=(
-                "Converts the Y-axis (review count) to a logarithmic scale. "
-                "When some listings have very high and others have very low review counts, "
-                "this makes the differences more readable. It doesn't change the data, "
-                "only the axis scale."
+                "This value determines the maximum price displayed in the chart. "
+                "Listings with prices above this threshold are filtered out. "
+                "Use this to exclude extremely expensive (outlier) listings."
             )
         )
-        
-        st.divider()
-        
-        df_scatter = df[
-            (df['price'] <= max_price_scatter) &
-            (df['number_of_reviews'] >= min_reviews_scatter) &
-            (df['neighbourhood_group'].isin(selected_groups_scatter))
-        ]
-        
-        if df_scatter.empty:
-            st.warning("No data matches the selected filters. Please adjust the filters.")
-        else:
-            fig_scatter = px.scatter(
-                df_scatter,
-                x="price",
-                y="number_of_reviews",
-                color="neighbourhood_group",
-                hover_data=["name", "room_type", "neighbourhood"],
-                title=f"Price vs Number of Reviews (≤ ${max_price_scatter})",
-                opacity=0.7,
+
+    min_reviews_scatter = st.slider(
+        "Min Reviews:",
+        min_value=0,
+        max_value=int(reviews_max),
+        value=0,
+        step=5,
+        key="scatter_min_reviews",
+        help=(
+            "Sets the minimum number of reviews that listings must have to be displayed. "
+            "Listings with fewer reviews than this value are filtered out. "
+            "This allows you to focus on more popular listings."
+        )
+    )
+
+    use_log_y = st.checkbox(
+        "Use Log Scale for Reviews",
+        value=False,
+        key="scatter_log_y",
+        help=(
+            "Converts the Y-axis (review count) to a logarithmic scale. "
+            "When some listings have very high and others have very low review counts, "
+            "this makes the differences more readable. It doesn't change the data, "
+            "only the axis scale."
+        )
+    )
+
+    st.divider()
+
+    with profiling.stage("mehmet_scatter.filter", rows_in=len(ds)) as stage:
+        scatter_ids = ds.select(
+            price=(None, max_price_scatter),
+            number_of_reviews=(min_reviews_scatter, None),
+            neighbourhood_group=selected_groups_scatter,
+        )
+        stage.set(rows_out=len(scatter_ids))
+
+    # Oturum bellek bütçesi dolmuşsa noktalar yerine yoğunluk görüntüsü çizilir
+    point_mode = len(scatter_ids) <= SCATTER_POINT_LIMIT and session_memory.limit_rows(
+        len(scatter_ids), ds.row_bytes(SCATTER_COLUMNS)
+    ) == len(scatter_ids)
+
+    if not len(scatter_ids):
+        st.warning("No data matches the selected filters. Please adjust the filters.")
+    elif point_mode:
+        # Az nokta: WebGL ile tek tek çizilir, ayrıntılar hover'da
+        df_scatter = ds.rows(scatter_ids, SCATTER_COLUMNS)
+        with profiling.stage("mehmet_scatter.figure", rows_in=len(df_scatter)):
+            fig_scatter = _point_scatter(df_scatter, max_price_scatter, use_log_y)
+
+        figures.render_plotly("mehmet_scatter", fig_scatter, use_container_width=True)
+        avg_price, avg_reviews = df_scatter['price'].mean(), df_scatter['number_of_reviews'].mean()
+    else:
+        # Çok nokta: sunucuda yoğunluk görüntüsüne işlenir; ayrıntılar seçilen kutu için sorgulanır.
+        # Bütçe tüm satırlara yetmezse eşit aralıklı bir örnek kullanılır.
+        allowed = session_memory.limit_rows(len(scatter_ids), ds.row_bytes(DENSITY_COLUMNS))
+        density_state = dict(
+            groups=figures.selection(selected_groups_scatter),
+            max_price=max_price_scatter,
+            min_reviews=min_reviews_scatter,
+            use_log_y=use_log_y,
+            sample_rows=allowed if allowed < len(scatter_ids) else None,
+        )
+        fig_scatter, density_meta = figures.cached_figure(
+            "mehmet_scatter_density", ds.version, density_state, lambda: _density_figure(ds, **density_state)
+        )
+        to_reviews = _axis_to_reviews(use_log_y)
+        avg_price, avg_reviews = density_meta['avg_price'], density_meta['avg_reviews']
+        event = figures.render_plotly(
+            "mehmet_scatter_density",
+            fig_scatter,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="box",
+            key="scatter_density",
+        )
+        st.caption(
+            f"{len(scatter_ids):,} listings are drawn as a density image. "
+            "Drag a box on the chart to list the listings inside it."
+        )
+        if density_meta['rows'] < len(scatter_ids):
+            st.caption(
+                f"Session memory budget reached: the image and statistics use an even sample of "
+                f"{density_meta['rows']:,} listings."
             )
-            fig_scatter.update_layout(
-                xaxis_title="Price ($)",
-                yaxis_title="Number of Reviews (log scale)" if use_log_y else "Number of Reviews",
-                legend_title="Neighbourhood Group"
+        boxes = event.selection.get("box", []) if event else []
+        if boxes:
+            box_x, box_y = boxes[-1]["x"], boxes[-1]["y"]
+            detail_ids = ds.select(
+                price=(max(min(box_x), 0), min(max(box_x), max_price_scatter)),
+                number_of_reviews=(max(to_reviews(min(box_y)), min_reviews_scatter), to_reviews(max(box_y))),
+                neighbourhood_group=selected_groups_scatter,
             )
-            
-            if use_log_y:
-                fig_scatter.update_yaxes(type="log")
-            
-            st.plotly_chart(fig_scatter, use_container_width=True)
-            
-            # Statistics
-            col_stat1, col_stat2, col_stat3 = st.columns(3)
-            col_stat1.metric("Total Listings", f"{len(df_scatter):,}")
-            col_stat2.metric("Avg Price", f"${df_scatter['price'].mean():.2f}")
-            col_stat3.metric("Avg Reviews", f"{df_scatter['number_of_reviews'].mean():.2f}")
-    
-    # paralell coordinates
-    with tab2:
-        st.subheader("2. Multidimensional Feature Profile (Parallel Coordinates)")
-        st.info("""
-            **Related Questions:**
-            - Entire home → generally expensive + high minimum nights?
-            - Private room → cheap but highly available?
-            - Shared room → low price but low review count?
-            - Which room type has "heavy line clusters"?
-        """)
-        
-        st.markdown("**Chart Data Filter**")
-        col_f1, col_f2, col_f3 = st.columns(3)
-        
-        candidate_dims = [
-            col for col in ["price", "minimum_nights", "availability_365", "number_of_reviews"]
-            if col in df.columns
-        ]
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        
-        with col_f1:
-            selected_dims = st.multiselect(
-                "Select Dimensions:",
-                options=numeric_cols,
-                default=candidate_dims if len(candidate_dims) >= 3 else numeric_cols[:4],
-                help=(
-                    "Choose numerical columns to compare in the Parallel Coordinates chart.\n"
-                    "- You must select at least **3 columns**.\n"
-                    "- These form the vertical axes that the lines pass through.\n"
-                    "- Example: price, minimum_nights, availability_365, number_of_reviews."
-                )
+            st.markdown(f"**Selected region:** {len(detail_ids):,} listings")
+            detail_columns = ["name", "neighbourhood_group", "neighbourhood", "room_type", "price", "number_of_reviews"]
+            detail_rows = session_memory.limit_rows(min(len(detail_ids), SCATTER_DETAIL_ROWS), ds.row_bytes(detail_columns))
+            figures.render_dataframe(
+                "mehmet_scatter_selection",
+                ds.rows(detail_ids[:detail_rows], detail_columns),
+                hide_index=True,
+                use_container_width=True,
             )
-        
-        with col_f2:
-            selected_room_types_pc = st.multiselect(
-                "Room Types:",
-                options=sorted(df['room_type'].dropna().unique().tolist()),
-                default=sorted(df['room_type'].dropna().unique().tolist()),
-                key="pc_room_types",
-                help=(
-                    "Select which room types to display in the chart.\n"
-                    "- Each room type is shown in a different color.\n"
-                    "- Example: Entire home, Private room, Shared room.\n"
-                    "This filter lets you examine the multidimensional profile of specific room types."
-                )
+
+    if len(scatter_ids):
+        # Statistics
+        col_stat1, col_stat2, col_stat3 = st.columns(3)
+        col_stat1.metric("Total Listings", f"{len(scatter_ids):,}")
+        col_stat2.metric("Avg Price", f"${avg_price:.2f}")
+        col_stat3.metric("Avg Reviews", f"{avg_reviews:.2f}")
+
+
+@figures.chart_section("mehmet_parallel")
+def _parallel_tab(ds):
+    reviews_max = ds.filters.value_range('number_of_reviews')[1]
+    st.subheader("2. Multidimensional Feature Profile (Parallel Coordinates)")
+    st.info("""
+        **Related Questions:**
+        - Entire home → generally expensive + high minimum nights?
+        - Private room → cheap but highly available?
+        - Shared room → low price but low review count?
+        - Which room type has "heavy line clusters"?
+    """)
+
+    st.markdown("**Chart Data Filter**")
+    col_f1, col_f2, col_f3 = st.columns(3)
+
+    # Sayısal kaynak sütunlar yüklemede bir kez belirlenir (türetilmiş sütunlar hariç)
+    numeric_cols = ds.numeric_columns()
+
+    with col_f1:
+        selected_dims = st.multiselect(
+            "Select Dimensions:",
+            options=numeric_cols,
+            default=_default_dims(numeric_cols),
+            key="pc_dims",
+            help=(
+                "Choose numerical columns to compare in the Parallel Coordinates chart.\n"
+                "- You must select at least **3 columns**.\n"
+                "- These form the vertical axes that the lines pass through.\n"
+                "- Example: price, minimum_nights, availability_365, number_of_reviews."
             )
-        
-        with col_f3:
-            max_rows_pc = st.slider(
-                "Max Listings (sampling):",
-                min_value=100,
-                max_value=3000,
-                value=1000,
-                step=100,
-                help=(
-                    "Maximum number of listings displayed in the chart.\n"
-                    "- Parallel Coordinates can become cluttered with too many lines.\n"
-                    "- If data exceeds this number, random sampling is applied.\n"
-                    "- Example: If data has 6000 records and you select 1000, "
-                    "1000 random records will be shown."
-                )
+        )
+
+    with col_f2:
+        selected_room_types_pc = st.multiselect(
+            "Room Types:",
+            options=sorted(ds.options('room_type')),
+            default=sorted(ds.options('room_type')),
+            key="pc_room_types",
+            help=(
+                "Select which room types to display in the chart.\n"
+                "- Each room type is shown in a different color.\n"
+                "- Example: Entire home, Private room, Shared room.\n"
+                "This filter lets you examine the multidimensional profile of specific room types."
             )
-        
-        min_reviews_pc = st.slider(
-            "Min Reviews:",
-            min_value=0,
-            max_value=int(df['number_of_reviews'].max()),
-            value=0,
-            step=5,
-            key="pc_min_reviews",
+        )
+
+    with col_f3:
+        max_rows_pc = st.slider(
+            "Max Listings (sampling):",
+            min_value=100,
+            max_value=3000,
+            value=1000,
+            step=100,
+            key="pc_max_rows",
             help=(
-                "Minimum review count filter.\n"
-                "- Listings with fewer reviews than this value are filtered out.\n"
-                "- This lets you examine the multidimensional profile of more popular listings."
+                "Maximum number of listings displayed in the chart.\n"
+                "- Parallel Coordinates can become cluttered with too many lines.\n"
+                "- If data exceeds this number, a stratified sample is shown: every room type "
+                "and borough keeps its share, and the extreme listings of each dimension are kept.\n"
+                "- Example: If data has 6000 records and you select 1000, "
+                "1000 representative records will be shown."
             )
         )
-        
-        st.divider()
-        
-        if len(selected_dims) < 3:
-            st.warning("Please select at least 3 numerical dimensions.")
+
+    min_reviews_pc = st.slider(
+        "Min Reviews:",
+        min_value=0,
+        max_value=int(reviews_max),
+        value=0,
+        step=5,
+        key="pc_min_reviews",
+        help=(
+            "Minimum review count filter.\n"
+            "- Listings with fewer reviews than this value are filtered out.\n"
+            "- This lets you examine the multidimensional profile of more popular listings."
+        )
+    )
+
+    st.divider()
+
+    if len(selected_dims) < 3:
+        st.warning("Please select at least 3 numerical dimensions.")
+    else:
+        # Oturum bellek bütçesi dolmuşsa daha küçük bir örnek çizilir
+        pc_rows = session_memory.limit_rows(max_rows_pc, ds.row_bytes(selected_dims + ["room_type"]))
+        if pc_rows < max_rows_pc:
+            st.caption(f"Session memory budget reached: sampling {pc_rows:,} listings instead of {max_rows_pc:,}.")
+        pc_state = dict(
+            dims=selected_dims,
+            room_types=figures.selection(selected_room_types_pc),
+            max_rows=pc_rows,
+            min_reviews=min_reviews_pc,
+        )
+        fig_pc, pc_meta = figures.cached_figure(
+            "mehmet_parallel", ds.version, pc_state, lambda: _parallel_figure(ds, **pc_state)
+        )
+
+        if fig_pc is None:
+            st.warning("No data matches the selected filters. Please adjust the filters.")
         else:
-            df_pc = df[
-                (df['room_type'].isin(selected_room_types_pc)) &
-                (df['number_of_reviews'] >= min_reviews_pc)
-            ]
-            
-            if df_pc.empty:
-                st.warning("No data matches the selected filters. Please adjust the filters.")
-            else:
-                df_pc = df_pc[selected_dims + ["room_type"]].dropna()
-                
-                if len(df_pc) > max_rows_pc:
-                    df_pc = df_pc.sample(n=max_rows_pc, random_state=42)
-                
-                unique_room_types = df_pc["room_type"].unique().tolist()
-                room_type_map = {rt: i for i, rt in enumerate(unique_room_types)}
-                df_pc["room_type_code"] = df_pc["room_type"].map(room_type_map)
-                
-                num_types = len(room_type_map)
-                qualitative_colors = px.colors.qualitative.Set1
-                color_scale = []
-                
-                for i, (rt, code) in enumerate(room_type_map.items()):
-                    color = qualitative_colors[i % len(qualitative_colors)]
-                    t0 = code / max(num_types - 1, 1)
-                    t1 = code / max(num_types - 1, 1)
-                    color_scale.append([t0, color])
-                    color_scale.append([t1, color])
-                
-                fig_pc = go.Figure(
-                    data=go.Parcoords(
-                        line=dict(
-                            color=df_pc["room_type_code"],
-                            colorscale=color_scale,
-                            cmin=0,
-                            cmax=max(num_types - 1, 1),
-                            showscale=False
-                        ),
-                        dimensions=[
-                            dict(
-                                label=dim.replace("_", " ").title(),
-                                values=df_pc[dim]
-                            )
-                            for dim in selected_dims
-                        ]
-                    )
-                )
-                
-                fig_pc.update_layout(
-                    margin=dict(l=80, r=80, t=60, b=50)
-                )
-                fig_pc.update_traces(
-                    labelfont=dict(size=12),
-                    rangefont=dict(size=10),
-                    tickfont=dict(size=10),
-                )
-                
-                legend_items = []
-                for i, (rt, code) in enumerate(room_type_map.items()):
-                    color = qualitative_colors[i % len(qualitative_colors)]
-                    legend_items.append(f"""
-                        <span style="display:inline-flex;align-items:center;
-                                    margin-right:10px;margin-bottom:4px;">
-                            <span style="width:14px;height:14px;background:{color};
-                                        display:inline-block;margin-right:5px;
-                                        border:1px solid #333;border-radius:3px;"></span>
-                            <span>{rt}</span>
-                        </span>
-                    """)
-                
-                st.markdown("**Color Encoding (room_type):**", unsafe_allow_html=True)
-                st.markdown("".join(legend_items), unsafe_allow_html=True)
-                st.plotly_chart(fig_pc, use_container_width=True)
-                st.markdown(f"**Listings Visualized:** {len(df_pc):,}")
-    
+            legend_items = []
+            for rt, color in pc_meta['legend']:
+                legend_items.append(f"""
+                    <span style="display:inline-flex;align-items:center;
+                                margin-right:10px;margin-bottom:4px;">
+                        <span style="width:14px;height:14px;background:{color};
+                                    display:inline-block;margin-right:5px;
+                                    border:1px solid #333;border-radius:3px;"></span>
+                        <span>{rt}</span>
+                    </span>
+                """)
 
-    # sankey
-    with tab3:
-        st.subheader("3. Category Flow: Neighbourhood Group → Room Type (Sankey Diagram)")
-        st.info("""
-            **Related Questions:**
-            - Is Entire home dominant in Manhattan?
-            - Is Private room prevalent in Brooklyn?
-            - Is Shared room proportion low in Queens?
-        """)
-        
-        st.markdown("**Chart Data Filter**")
-        col_f1, col_f2, col_f3 = st.columns(3)
-        
-        with col_f1:
-            selected_groups_sankey = st.multiselect(
-                "Neighbourhood Group:",
-                options=sorted(df['neighbourhood_group'].dropna().unique().tolist()),
-                default=sorted(df['neighbourhood_group'].dropna().unique().tolist()),
-                key="sankey_groups",
-                help=(
-                    "Select which boroughs (neighbourhood_group) to display in the Sankey diagram.\n"
-                    "- Only flows from the selected neighborhoods to room types are drawn.\n"
-                    "- For example, if you select only Manhattan and Brooklyn, "
-                    "flows from other boroughs are hidden."
-                )
-            )
-        
-        with col_f2:
-            selected_room_types_sankey = st.multiselect(
-                "Room Types:",
-                options=sorted(df['room_type'].dropna().unique().tolist()),
-                default=sorted(df['room_type'].dropna().unique().tolist()),
-                key="sankey_room_types",
-                help=(
-                    "Select which room types to display in the Sankey diagram.\n"
-                    "- Each room type appears as a target node receiving flows from boroughs.\n"
-                    "- For example, if you select only Entire home and Private room, "
-                    "Shared room flows are hidden."
-                )
+            st.markdown("**Color Encoding (room_type):**", unsafe_allow_html=True)
+            st.markdown("".join(legend_items), unsafe_allow_html=True)
+            figures.render_plotly("mehmet_parallel", fig_pc, use_container_width=True)
+            st.markdown(f"**Listings Visualized:** {pc_meta['n']:,}")
+
+
+@figures.chart_section("mehmet_sankey")
+def _sankey_tab(ds):
+    price_max = ds.filters.value_range('price')[1]
+    st.subheader("3. Category Flow: Neighbourhood Group → Room Type (Sankey Diagram)")
+    st.info("""
+        **Related Questions:**
+        - Is Entire home dominant in Manhattan?
+        - Is Private room prevalent in Brooklyn?
+        - Is Shared room proportion low in Queens?
+    """)
+
+    st.markdown("**Chart Data Filter**")
+    col_f1, col_f2, col_f3 = st.columns(3)
+
+    with col_f1:
+        selected_groups_sankey = st.multiselect(
+            "Neighbourhood Group:",
+            options=sorted(ds.options('neighbourhood_group')),
+            default=sorted(ds.options('neighbourhood_group')),
+            key="sankey_groups",
+            help=(
+                "Select which boroughs (neighbourhood_group) to display in the Sankey diagram.\n"
+                "- Only flows from the selected neighborhoods to room types are drawn.\n"
+                "- For example, if you select only Manhattan and Brooklyn, "
+                "flows from other boroughs are hidden."
             )
-        
-        with col_f3:
-            max_price_sankey = st.slider(
-                "Max Price ($):",
-                min_value=50,
-                max_value=int(min(1500, df['price'].max())),
-                value=int(min(500, df['price'].max())),
-                step=50,
-                help=(
-                    "Sets the maximum price to include in the Sankey diagram.\n"
-                    "- Listings with prices above this threshold are completely filtered out.\n"
-                    "- This prevents extremely expensive (outlier) listings from skewing "
-                    "the flow distribution, and helps you focus on more 'typical' price ranges."
-                )
+        )
+
+    with col_f2:
+        selected_room_types_sankey = st.multiselect(
+            "Room Types:",
+            options=sorted(ds.options('room_type')),
+            default=sorted(ds.options('room_type')),
+            key="sankey_room_types",
+            help=(
+                "Select which room types to display in the Sankey diagram.\n"
+                "- Each room type appears as a target node receiving flows from boroughs.\n"
+                "- For example, if you select only Entire home and Private room, "
+                "Shared room flows are hidden."
             )
-        
-        min_count_sankey = st.slider(
-            "Min Listings per Flow:",
-            min_value=1,
-            max_value=100,
-            value=5,
-            step=1,
+        )
+
+    with col_f3:
+        max_price_sankey = st.slider(
+            "Max Price ($):",
+            min_value=50,
+            max_value=int(min(1500, price_max)),
+            value=int(min(500, price_max)),
+            step=50,
+            key="sankey_max_price",
             help=(
-                "Sets the minimum number of listings required for a borough → room_type "
-                "flow to be drawn.\n"
-                "- Flows with fewer listings than this value are removed from the diagram.\n"
-                "- This makes the diagram cleaner and lets you focus on strong flows "
-                "(important combinations)."
+                "Sets the maximum price to include in the Sankey diagram.\n"
+                "- Listings with prices above this threshold are completely filtered out.\n"
+                "- This prevents extremely expensive (outlier) listings from skewing "
+                "the flow distribution, and helps you focus on more 'typical' price ranges."
             )
         )
-        
-        st.divider()
-        
-        df_sankey = df[
-            (df['neighbourhood_group'].isin(selected_groups_sankey)) &
-            (df['room_type'].isin(selected_room_types_sankey)) &
-            (df['price'] <= max_price_sankey)
-        ]
-        
-        if df_sankey.empty:
-            st.warning("No data matches the selected filters. Please adjust the filters.")
+
+    min_count_sankey = st.slider(
+        "Min Listings per Flow:",
+        min_value=1,
+        max_value=100,
+        value=5,
+        step=1,
+        key="sankey_min_count",
+        help=(
+            "Sets the minimum number of listings required for a borough → room_type "
+            "flow to be drawn.\n"
+            "- Flows with fewer listings than this value are removed from the diagram.\n"
+            "- This makes the diagram cleaner and lets you focus on strong flows "
+            "(important combinations)."
+        )
+    )
+
+    st.divider()
+
+    sankey_state = dict(
+        groups=figures.selection(selected_groups_sankey),
+        room_types=figures.selection(selected_room_types_sankey),
+        max_price=max_price_sankey,
+        min_count=min_count_sankey,
+    )
+    fig_sankey, sankey_meta = figures.cached_figure(
+        "mehmet_sankey", ds.version, sankey_state, lambda: _sankey_figure(ds, **sankey_state)
+    )
+
+    if sankey_meta is None:
+        st.warning("No data matches the selected filters. Please adjust the filters.")
+    elif fig_sankey is None:
+        st.warning(
+            "All flows were filtered out by 'Min Listings per Flow'. "
+            "Try lowering the threshold."
+        )
+    else:
+        figures.render_plotly("mehmet_sankey", fig_sankey, use_container_width=True)
+
+        # Statistics
+        col_stat1, col_stat2 = st.columns(2)
+        col_stat1.metric("Total Flows", f"{sankey_meta['flows']:,}")
+        col_stat2.metric("Total Listings (after filters)", f"{sankey_meta['listings']:,}")
+
+
+# Sekme adı -> (çizim fonksiyonu, sekmedeki widget anahtarları)
+TABS = {
+    "Price vs Popularity": (
+        _scatter_tab, ["scatter_groups", "scatter_max_price", "scatter_min_reviews", "scatter_log_y"],
+    ),
+    "Multidimensional Profile": (
+        _parallel_tab, ["pc_dims", "pc_room_types", "pc_max_rows", "pc_min_reviews"],
+    ),
+    "Category Flow": (
+        _sankey_tab, ["sankey_groups", "sankey_room_types", "sankey_max_price", "sankey_min_count"],
+    ),
+}
+
+
+def run_mehmet_module(ds):
+    st.header("Mehmet Dora's Analysis")
+    st.markdown("""
+    This section analyzes **Price vs Popularity**, **Multidimensional Feature Profiles**, 
+    and **Category Flows** with interactive controls.
+    """)
+    st.divider()
+    
+    st.markdown("""
+        <style>
+        div[data-baseweb="tab-list"] {
+            justify-content: center;
+        }
+        </style>
+    """, unsafe_allow_html=True)
+    
+    # Navbar: yalnızca açık sekme çalışır; kapalı sekmelerin widget değerleri korunur.
+    # DASHBOARD_EAGER_TABS=1 bütün sekmeleri her çalıştırmada çizer (karşılaştırma için)
+    eager = os.environ.get("DASHBOARD_EAGER_TABS", "") not in ("", "0")
+    tabs = st.tabs(list(TABS), key="mehmet_tab", on_change="rerun")
+    for tab, (render, widget_keys) in zip(tabs, TABS.values()):
+        if tab.open or eager:
+            with tab:
+                render(ds)
         else:
-            grouped = (
-                df_sankey
-                .groupby(["neighbourhood_group", "room_type"])
-                .size()
-                .reset_index(name="count")
-            )
-            grouped = grouped[grouped["count"] >= min_count_sankey]
-            
-            if grouped.empty:
-                st.warning(
-                    "All flows were filtered out by 'Min Listings per Flow'. "
-                    "Try lowering the threshold."
-                )
-            else:
-                groups = sorted(grouped["neighbourhood_group"].unique().tolist())
-                room_types = sorted(grouped["room_type"].unique().tolist())
-                labels = groups + room_types
-                
-                label_to_index = {label: i for i, label in enumerate(labels)}
-                
-                sources, targets, values = [], [], []
-                for _, row in grouped.iterrows():
-                    s = label_to_index[row["neighbourhood_group"]]
-                    t = label_to_index[row["room_type"]]
-                    v = int(row["count"])
-                    sources.append(s)
-                    targets.append(t)
-                    values.append(v)
-                
-                fig_sankey = go.Figure(data=[go.Sankey(
-                    node=dict(
-                        pad=15,
-                        thickness=20,
-                        label=labels
-                    ),
-                    link=dict(
-                        source=sources,
-                        target=targets,
-                        value=values
-                    )
-                )])
-                
-                fig_sankey.update_layout(
-                    title_text="Flow of Listings from Neighbourhood Group to Room Type",
-                    font_size=12,
-                    height=600
-                )
-                
-                st.plotly_chart(fig_sankey, use_container_width=True)
-                
-                # Statistics
-                col_stat1, col_stat2 = st.columns(2)
-                col_stat1.metric("Total Flows", f"{len(values):,}")
-                col_stat2.metric("Total Listings (after filters)", f"{len(df_sankey):,}")
+            _keep_widget_state(widget_keys)
     
-    st.divider()
\ No newline at end of file
+    st.divider()
+
+
+def default_figures(ds):
+    """
+    Varsayılan widget durumundaki grafiklerin ön çizim işleri (warmup); durumlar
+    yukarıdaki widget varsayılanlarıyla aynı olmalı. Nokta modundaki dağılım
+    grafiği önbelleğe alınmaz; yalnızca yoğunluk görüntüsü önceden çizilir.
+    """
+    groups = figures.selection(ds.options('neighbourhood_group'))
+    room_types = figures.selection(ds.options('room_type'))
+    price_max = ds.filters.value_range('price')[1]
+    jobs = {}
+    density_state = dict(groups=groups, max_price=500, min_reviews=0, use_log_y=False, sample_rows=None)
+    if ds.count(price=(None, 500), number_of_reviews=(0, None), neighbourhood_group=groups) > SCATTER_POINT_LIMIT:
+        jobs["mehmet_scatter_density"] = figures.prerender("mehmet_scatter_density", ds, _density_figure, density_state)
+    pc_state = dict(dims=_default_dims(ds.numeric_columns()), room_types=room_types, max_rows=1000, min_reviews=0)
+    jobs["mehmet_parallel"] = figures.prerender("mehmet_parallel", ds, _parallel_figure, pc_state)
+    sankey_state = dict(groups=groups, room_types=room_types, max_price=int(min(500, price_max)), min_count=5)
+    jobs["mehmet_sankey"] = figures.prerender("mehmet_sankey", ds, _sankey_figure, sankey_state)
+    return jobs
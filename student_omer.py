@@ -4,18 +4,149 @@ import plotly.graph_objects as go
 import numpy as np
 import pandas as pd
 
-def run_omer_module(df):
-    """
-    Ömer Faruk Dinçoğlu'nun grafiklerini çizen ana fonksiyon.
-    """
-    st.header("Ömer Faruk Dinçoğlu's Analysis")
-    st.markdown("""
-    This section analyzes **Price Distribution**, **Market Hierarchy**, and **Feature Correlations** with interactive controls.
-    """)
-    
-    st.divider()
+import figures
+import profiling
 
-    # --- GRAFİK 1: Fiyat Dağılım Analizi (Histogram) ---
+
+# Grafik kurucuları saftır: sonuç yalnızca veri setine ve verilen widget durumuna
+# bağlıdır; figures.cached_figure bunları (sürüm, grafik, durum) anahtarıyla önbellekler.
+
+def _histogram_figure(ds, bin_count, max_price_filter, use_log_scale, room_types, boroughs, price_percentile):
+    with profiling.stage("omer_histogram.aggregate", rows_in=len(ds)) as stage:
+        # Percentile, aktif oda tipi/ilçe filtrelerinin kantil özetlerinden hesaplanır
+        price_cutoff = ds.price_sketches.quantile(price_percentile / 100, room_types=room_types, boroughs=boroughs)
+        if price_cutoff is None:
+            price_cutoff = max_price_filter
+
+        # Kutular sunucuda, önceden hesaplanmış 1$'lık taban kutulardan birleştirilir
+        hist = ds.price_histogram.query(
+            bin_count,
+            min(max_price_filter, price_cutoff),
+            room_types=room_types,
+            boroughs=boroughs,
+        )
+        stage.set(rows_out=0 if hist is None else len(hist['counts']))
+    if hist is None:
+        return None, None
+
+    color_seq = ['#636EFA']
+    edges = hist['edges']
+    fig_hist = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:] - 1) / 2,
+        y=hist['counts'],
+        customdata=np.column_stack([edges[:-1], edges[1:] - 1]),
+        hovertemplate="price=%{customdata[0]}-%{customdata[1]}<br>count=%{y}<extra></extra>",
+        marker_color=color_seq[0],
+        opacity=0.8
+    ))
+    fig_hist.update_layout(
+        title=f"Price Distribution for Listings under ${max_price_filter}",
+        xaxis_title="Price ($)",
+        yaxis_title="Listing Count (Log Scale)" if use_log_scale else "Listing Count",
+        yaxis_type="log" if use_log_scale else None,
+        bargap=0.1
+    )
+    return fig_hist, {'total': hist['total'], 'mean': hist['mean'], 'median': hist['median']}
+
+
+def _treemap_figure(ds, size_metric, color_metric, boroughs, price_range, room_types, min_listings, selected_groups):
+    # Semt bazlı adet/ortalama, ham satırlar yerine toplam küpünden gelir
+    with profiling.stage("omer_treemap.aggregate", rows_in=len(ds)) as stage:
+        df_tree_cells = ds.cube.rollup(
+            ['neighbourhood_group', 'neighbourhood'],
+            price=price_range,
+            neighbourhood_group=boroughs,
+            room_type=room_types,
+        )
+        stage.set(rows_out=len(df_tree_cells))
+    if df_tree_cells.empty:
+        return None, None
+
+    df_treemap = df_tree_cells[['neighbourhood_group', 'neighbourhood']].copy()
+    if size_metric == "Listing Count":
+        df_treemap['value'] = df_tree_cells['count']
+        df_treemap['label_text'] = "Listings"
+    else:
+        df_treemap['value'] = df_tree_cells['price_mean']
+        df_treemap['label_text'] = "Avg Price ($)"
+
+    df_treemap = df_treemap[df_treemap['value'] >= min_listings]
+
+    if color_metric == "Neighbourhood Group (Categorical)":
+        color_col = 'neighbourhood_group'
+        color_scale = None
+    else:
+        if 'price' not in df_treemap.columns:
+            df_price = ds.cube.rollup(
+                ['neighbourhood_group', 'neighbourhood'],
+                neighbourhood_group=selected_groups,
+            )[['neighbourhood_group', 'neighbourhood', 'price_mean']].rename(columns={'price_mean': 'price'})
+            df_treemap = pd.merge(df_treemap, df_price, on=['neighbourhood_group', 'neighbourhood'])
+        color_col = 'price'
+        color_scale = px.colors.sequential.Viridis
+
+    fig_tree = px.treemap(
+        figures.project(df_treemap, ['neighbourhood_group', 'neighbourhood'], 'value', color_col),
+        path=[px.Constant("NYC"), 'neighbourhood_group', 'neighbourhood'],
+        values='value',
+        color=color_col,
+        color_continuous_scale=color_scale,
+        title=f"Market Hierarchy based on {size_metric}"
+    )
+    fig_tree.update_traces(hovertemplate='<b>%{label}</b><br>%{value}')
+    fig_tree.update_layout(margin=dict(t=50, l=25, r=25, b=25))
+    return fig_tree, None
+
+
+def _heatmap_figure(ds, features, color_scale, show_values, room_types, boroughs, min_reviews, threshold):
+    # Matris hücre istatistiklerinin birleştirilmesiyle kurulur ve önbellekte kalır
+    with profiling.stage("omer_heatmap.aggregate", rows_in=len(ds)) as stage:
+        df_corr, n_heat = ds.correlation_stats.correlation(
+            features,
+            room_types=room_types,
+            boroughs=boroughs,
+            min_reviews=min_reviews,
+        )
+        stage.set(rows_out=n_heat)
+    if n_heat == 0:
+        return None, None
+
+    df_corr_display = df_corr.copy()
+    mask = np.abs(df_corr_display) < threshold
+    df_corr_display[mask] = np.nan
+
+    # Heatmap oluştur
+    fig_heatmap = go.Figure(data=go.Heatmap(
+        z=df_corr_display.values,
+        x=df_corr_display.columns,
+        y=df_corr_display.columns,
+        colorscale=color_scale,
+        zmid=0,
+        text=df_corr_display.values.round(2) if show_values else None,
+        texttemplate='%{text}' if show_values else None,
+        textfont={"size": 10},
+        colorbar=dict(title="Correlation")
+    ))
+    fig_heatmap.update_layout(
+        title="Correlation Matrix of Selected Features",
+        xaxis_title="Features",
+        yaxis_title="Features",
+        height=600,
+        xaxis={'side': 'bottom'},
+        yaxis={'autorange': 'reversed'}
+    )
+    return fig_heatmap, {'n': n_heat}
+
+
+def _default_features(numeric_cols):
+    """Isı haritasında varsayılan olarak seçili özellikler."""
+    default_cols = ['price', 'number_of_reviews', 'reviews_per_month', 
+                   'calculated_host_listings_count', 'availability_365', 'minimum_nights']
+    return [col for col in default_cols if col in numeric_cols][:6]
+
+
+@figures.chart_section("omer_histogram")
+def _histogram_section(ds, room_options, borough_options):
     st.subheader("1. Price Distribution Analysis (Histogram)")
     st.info("""
     **Key Questions:**
@@ -37,16 +168,16 @@ def run_omer_module(df):
         st.markdown("**Additional Filters**")
         room_types_hist = st.multiselect(
             "Room Type:",
-            options=df['room_type'].unique().tolist(),
-            default=df['room_type'].unique().tolist(),
+            options=room_options,
+            default=room_options,
             key="hist_room",
             help="Compare price distributions across different room types"
         )
         
         selected_boroughs_hist = st.multiselect(
             "Borough:",
-            options=df['neighbourhood_group'].unique().tolist(),
-            default=df['neighbourhood_group'].unique().tolist(),
+            options=borough_options,
+            default=borough_options,
             key="hist_borough",
             help="Analyze price distribution by borough"
         )
@@ -62,47 +193,32 @@ def run_omer_module(df):
         )
 
     with col2:
-        # Percentile hesapla
-        price_cutoff = df['price'].quantile(price_percentile / 100)
-        
-        df_hist = df[
-            (df['price'] <= min(max_price_filter, price_cutoff)) &
-            (df['room_type'].isin(room_types_hist)) &
-            (df['neighbourhood_group'].isin(selected_boroughs_hist))
-        ]
+        hist_state = dict(
+            bin_count=bin_count,
+            max_price_filter=max_price_filter,
+            use_log_scale=use_log_scale,
+            room_types=figures.selection(room_types_hist),
+            boroughs=figures.selection(selected_boroughs_hist),
+            price_percentile=price_percentile,
+        )
+        fig_hist, hist_stats = figures.cached_figure(
+            "omer_histogram", ds.version, hist_state, lambda: _histogram_figure(ds, **hist_state)
+        )
         
-        if df_hist.empty:
+        if fig_hist is None:
             st.warning(" No data matches the selected filters. Please adjust.")
         else:
-            color_seq = ['#636EFA']
-        
-            fig_hist = px.histogram(
-                df_hist, 
-                x="price", 
-                nbins=bin_count, 
-                log_y=use_log_scale, 
-                title=f"Price Distribution for Listings under ${max_price_filter}",
-                color_discrete_sequence=color_seq,
-                opacity=0.8
-            )
-            
-            fig_hist.update_layout(
-                xaxis_title="Price ($)", 
-                yaxis_title="Listing Count (Log Scale)" if use_log_scale else "Listing Count",
-                bargap=0.1
-            )
-            
-            
             col_stat1, col_stat2, col_stat3 = st.columns(3)
-            col_stat1.metric("Total Listings", f"{len(df_hist):,}")
-            col_stat2.metric("Average Price", f"${df_hist['price'].mean():.2f}")
-            col_stat3.metric("Median Price", f"${df_hist['price'].median():.2f}")
+            col_stat1.metric("Total Listings", f"{hist_stats['total']:,}")
+            col_stat2.metric("Average Price", f"${hist_stats['mean']:.2f}")
+            col_stat3.metric("Median Price", f"${hist_stats['median']:.2f}")
             
-            st.plotly_chart(fig_hist, use_container_width=True)
+            figures.render_plotly("omer_histogram", fig_hist, use_container_width=True)
 
-    st.divider()
 
-    # --- GRAFİK 2: Pazar Hiyerarşisi (Treemap) ---
+@figures.chart_section("omer_treemap")
+def _treemap_section(ds, room_options, borough_options, selected_groups):
+    price_min, price_max = ds.filters.value_range('price')
     st.subheader("2. Market Hierarchy (Treemap)")
     st.info("""
     **Key Questions:**
@@ -133,24 +249,24 @@ def run_omer_module(df):
         st.markdown("**Additional Filters**")
         selected_boroughs = st.multiselect(
             "Select Boroughs:",
-            options=df['neighbourhood_group'].unique().tolist(),
-            default=df['neighbourhood_group'].unique().tolist(),
+            options=borough_options,
+            default=borough_options,
             key="tree_boroughs"
         )
         
         price_range_tree = st.slider(
             "Price Range ($):",
-            min_value=int(df['price'].min()),
-            max_value=int(df['price'].max()),
-            value=(int(df['price'].min()), 500),
+            min_value=int(price_min),
+            max_value=int(price_max),
+            value=(int(price_min), 500),
             key="tree_price",
             help="Filter by price to compare similar market segments"
         )
         
         room_type_tree = st.multiselect(
             "Room Type:",
-            options=df['room_type'].unique().tolist(),
-            default=df['room_type'].unique().tolist(),
+            options=room_options,
+            default=room_options,
             key="tree_room",
             help="Compare market hierarchy by room type"
         )
@@ -165,53 +281,27 @@ def run_omer_module(df):
         )
 
     with col4:
+        tree_state = dict(
+            size_metric=size_metric,
+            color_metric=color_metric,
+            boroughs=figures.selection(selected_boroughs),
+            price_range=price_range_tree,
+            room_types=figures.selection(room_type_tree),
+            min_listings=min_listings_tree,
+            selected_groups=figures.selection(selected_groups),
+        )
+        fig_tree, _ = figures.cached_figure(
+            "omer_treemap", ds.version, tree_state, lambda: _treemap_figure(ds, **tree_state)
+        )
         
-        df_tree_filtered = df[
-            (df['neighbourhood_group'].isin(selected_boroughs)) &
-            (df['price'] >= price_range_tree[0]) &
-            (df['price'] <= price_range_tree[1]) &
-            (df['room_type'].isin(room_type_tree))
-        ]
-        
-        if df_tree_filtered.empty:
+        if fig_tree is None:
             st.warning(" No data matches the selected filters. Please adjust.")
         else:
-            if size_metric == "Listing Count":
-                df_treemap = df_tree_filtered.groupby(['neighbourhood_group', 'neighbourhood']).size().reset_index(name='value')
-                df_treemap['label_text'] = "Listings"
-            else:
-                df_treemap = df_tree_filtered.groupby(['neighbourhood_group', 'neighbourhood'])['price'].mean().reset_index(name='value')
-                df_treemap['label_text'] = "Avg Price ($)"
-            
-            
-            df_treemap = df_treemap[df_treemap['value'] >= min_listings_tree]
-            
-            if color_metric == "Neighbourhood Group (Categorical)":
-                color_col = 'neighbourhood_group'
-                color_scale = None
-            else:
-                if 'price' not in df_treemap.columns:
-                    df_price = df.groupby(['neighbourhood_group', 'neighbourhood'])['price'].mean().reset_index()
-                    df_treemap = pd.merge(df_treemap, df_price, on=['neighbourhood_group', 'neighbourhood'])
-                color_col = 'price'
-                color_scale = px.colors.sequential.Viridis
-
-            fig_tree = px.treemap(
-                df_treemap,
-                path=[px.Constant("NYC"), 'neighbourhood_group', 'neighbourhood'],
-                values='value',
-                color=color_col,
-                color_continuous_scale=color_scale,
-                title=f"Market Hierarchy based on {size_metric}"
-            )
-            
-            fig_tree.update_traces(hovertemplate='<b>%{label}</b><br>%{value}')
-            fig_tree.update_layout(margin=dict(t=50, l=25, r=25, b=25))
-            st.plotly_chart(fig_tree, use_container_width=True)
+            figures.render_plotly("omer_treemap", fig_tree, use_container_width=True)
 
-    st.divider()
 
-    # --- GRAFİK 3: Korelasyon Isı Haritası (Correlation Heatmap) ---
+@figures.chart_section("omer_heatmap")
+def _heatmap_section(ds, room_options, borough_options):
     st.subheader("3. Feature Correlation Heatmap")
     st.info("""
     **Key Questions:**
@@ -227,17 +317,12 @@ def run_omer_module(df):
         st.markdown("**Chart Controls**")
         
         
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        
-        
-        default_cols = ['price', 'number_of_reviews', 'reviews_per_month', 
-                       'calculated_host_listings_count', 'availability_365', 'minimum_nights']
-        default_cols = [col for col in default_cols if col in numeric_cols]
+        numeric_cols = ds.numeric_columns()
         
         selected_features = st.multiselect(
             "Select Features to Compare:",
             options=numeric_cols,
-            default=default_cols[:6] if len(default_cols) >= 6 else default_cols,
+            default=_default_features(numeric_cols),
             help="Choose at least 2 numerical features to see correlations."
         )
         
@@ -255,16 +340,16 @@ def run_omer_module(df):
         
         room_type_corr = st.multiselect(
             "Room Type:",
-            options=df['room_type'].unique().tolist(),
-            default=df['room_type'].unique().tolist(),
+            options=room_options,
+            default=room_options,
             key="heat_room",
             help="Analyze correlations within specific room types"
         )
         
         borough_corr = st.multiselect(
             "Borough:",
-            options=df['neighbourhood_group'].unique().tolist(),
-            default=df['neighbourhood_group'].unique().tolist(),
+            options=borough_options,
+            default=borough_options,
             key="heat_borough",
             help="Focus on specific boroughs for correlation analysis"
         )
@@ -294,48 +379,96 @@ def run_omer_module(df):
             st.warning(" Please select at least 2 features to display correlations.")
         else:
             
-            df_heat_filtered = df[
-                (df['room_type'].isin(room_type_corr)) &
-                (df['neighbourhood_group'].isin(borough_corr)) &
-                (df['number_of_reviews'] >= min_reviews_corr)
-            ]
+            heat_state = dict(
+                features=selected_features,
+                color_scale=color_scale_option,
+                show_values=show_values,
+                room_types=figures.selection(room_type_corr),
+                boroughs=figures.selection(borough_corr),
+                min_reviews=min_reviews_corr,
+                threshold=corr_threshold,
+            )
+            fig_heatmap, heat_stats = figures.cached_figure(
+                "omer_heatmap", ds.version, heat_state, lambda: _heatmap_figure(ds, **heat_state)
+            )
             
-            if df_heat_filtered.empty:
+            if fig_heatmap is None:
                 st.warning(" No data matches the selected filters. Please adjust.")
             else:
+                figures.render_plotly("omer_heatmap", fig_heatmap, use_container_width=True)
                 
-                df_corr = df_heat_filtered[selected_features].corr()
                 
-                
-                df_corr_display = df_corr.copy()
-                mask = np.abs(df_corr_display) < corr_threshold
-                df_corr_display[mask] = np.nan
-            
-                # Heatmap oluştur
-                fig_heatmap = go.Figure(data=go.Heatmap(
-                    z=df_corr_display.values,
-                    x=df_corr_display.columns,
-                    y=df_corr_display.columns,
-                    colorscale=color_scale_option,
-                    zmid=0,  
-                    text=df_corr_display.values.round(2) if show_values else None,
-                    texttemplate='%{text}' if show_values else None,
-                    textfont={"size": 10},
-                    colorbar=dict(title="Correlation")
-                ))
-                
-                fig_heatmap.update_layout(
-                    title="Correlation Matrix of Selected Features",
-                    xaxis_title="Features",
-                    yaxis_title="Features",
-                    height=600,
-                    xaxis={'side': 'bottom'},
-                    yaxis={'autorange': 'reversed'}  
-                )
-                
-                st.plotly_chart(fig_heatmap, use_container_width=True)
-                
-                
-                st.markdown(f"**Dataset Stats:** {len(df_heat_filtered):,} listings analyzed")
+                st.markdown(f"**Dataset Stats:** {heat_stats['n']:,} listings analyzed")
+
+
+def run_omer_module(ds, selected_groups):
+    """
+    Ömer Faruk Dinçoğlu'nun grafiklerini çizen ana fonksiyon.
+    selected_groups: kenar çubuğunda seçilen ilçeler; bütün grafikler bunlarla sınırlıdır.
+    """
+    # Filtre seçenekleri paylaşılan veri setinden (bitmap indeksi) gelir
+    borough_options = [g for g in ds.options('neighbourhood_group') if g in selected_groups]
+    room_options = ds.options('room_type')
 
-    st.divider()
\ No newline at end of file
+    st.header("Ömer Faruk Dinçoğlu's Analysis")
+    st.markdown("""
+    This section analyzes **Price Distribution**, **Market Hierarchy**, and **Feature Correlations** with interactive controls.
+    """)
+    
+    st.divider()
+
+    # --- GRAFİK 1: Fiyat Dağılım Analizi (Histogram) ---
+    _histogram_section(ds, room_options, borough_options)
+
+    st.divider()
+
+    # --- GRAFİK 2: Pazar Hiyerarşisi (Treemap) ---
+    _treemap_section(ds, room_options, borough_options, selected_groups)
+
+    st.divider()
+
+    # --- GRAFİK 3: Korelasyon Isı Haritası (Correlation Heatmap) ---
+    _heatmap_section(ds, room_options, borough_options)
+
+    st.divider()
+
+
+def default_figures(ds):
+    """
+    Varsayılan widget durumundaki grafiklerin ön çizim işleri (warmup); durumlar
+    yukarıdaki widget varsayılanlarıyla aynı olmalı. Kenar çubuğunda bütün ilçeler seçili.
+    """
+    all_groups = figures.selection(ds.options('neighbourhood_group'))
+    room_options = figures.selection(ds.options('room_type'))
+    price_min = ds.filters.value_range('price')[0]
+    hist_state = dict(
+        bin_count=50,
+        max_price_filter=500,
+        use_log_scale=False,
+        room_types=room_options,
+        boroughs=all_groups,
+        price_percentile=100,
+    )
+    tree_state = dict(
+        size_metric="Listing Count",
+        color_metric="Neighbourhood Group (Categorical)",
+        boroughs=all_groups,
+        price_range=(int(price_min), 500),
+        room_types=room_options,
+        min_listings=5,
+        selected_groups=all_groups,
+    )
+    heat_state = dict(
+        features=_default_features(ds.numeric_columns()),
+        color_scale="RdBu_r",
+        show_values=True,
+        room_types=room_options,
+        boroughs=all_groups,
+        min_reviews=0,
+        threshold=0.0,
+    )
+    return {
+        "omer_histogram": figures.prerender("omer_histogram", ds, _histogram_figure, hist_state),
+        "omer_treemap": figures.prerender("omer_treemap", ds, _treemap_figure, tree_state),
+        "omer_heatmap": figures.prerender("omer_heatmap", ds, _heatmap_figure, heat_state),
+    }
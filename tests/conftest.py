@@ -0,0 +1,29 @@
+"""
+Ortak test verisi: benchmarks/synthetic ile üretilen, uygulamanın temizlik
+kurallarından geçmiş sentetik ilanlar. Motorların sonuçları aynı çerçeve
+üzerinde düz pandas ile karşılaştırılır.
+"""
+import pytest
+
+from benchmarks.synthetic import make_listings
+from data_loader import clean_dataset
+from indexes import FilterEngine
+
+# Aralık sorgularının hem dilim hem tam tarama yolundan geçmesine yetecek kadar satır
+N_ROWS = 20_000
+
+
+@pytest.fixture(scope="session")
+def raw():
+    """Temizlenmemiş sentetik veri (CSV'den okunmuş gibi); testler kopyasını kullanmalı."""
+    return make_listings(N_ROWS)
+
+
+@pytest.fixture(scope="session")
+def frame(raw):
+    return clean_dataset(raw.copy())
+
+
+@pytest.fixture(scope="session")
+def engine(frame):
+    return FilterEngine(frame)
@@ -0,0 +1,25 @@
+"""Motorların karşılaştırıldığı düz pandas hesapları."""
+import pandas as pd
+
+
+def pandas_mask(frame, **criteria):
+    """FilterEngine kriterlerinin düz pandas karşılığı."""
+    mask = pd.Series(True, index=frame.index)
+    for column, condition in criteria.items():
+        if condition is None:
+            continue
+        values = frame[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            mask &= values.isin(list(condition))
+        else:
+            low, high = condition
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+    return mask.to_numpy()
+
+
+def filtered(frame, **criteria):
+    """Kriterleri sağlayan satırlar (FilterEngine.select'in pandas karşılığı)."""
+    return frame[pandas_mask(frame, **criteria)]
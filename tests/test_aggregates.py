@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import (
+    CUBE_MEASURES, HEX_COLOR_RANGE, HEX_ELEVATION_RANGE, AggregateCube, CorrelationStats, HexBins, PriceHistogram,
+)
+from derived import source_columns
+from tests.reference import filtered
+
+
+@pytest.fixture(scope="module")
+def cube(frame, engine):
+    return AggregateCube(frame, engine)
+
+
+def _band_edges(cube):
+    """Bir bandın tam sınırlarında ve içinde kalan fiyat aralıkları."""
+    return [
+        (cube.band_min[10], cube.band_max[20]),
+        (cube.band_max[5], cube.band_max[5]),
+        (cube.band_min[30] + 0.5, cube.band_max[30] - 0.5),
+    ]
+
+
+def _cube_cases(cube):
+    edges = _band_edges(cube)
+    return [
+        (['neighbourhood_group'], None, {}),
+        (['neighbourhood_group', 'room_type'], edges[0], {}),
+        (['neighbourhood_group', 'neighbourhood'], edges[1], {'room_type': ['Private room']}),
+        (['room_type'], edges[2], {'neighbourhood_group': ['Bronx', 'Queens']}),
+        (['neighbourhood'], (None, 80), {'neighbourhood_group': ['Manhattan']}),
+        (['neighbourhood_group'], (500, None), {'room_type': ['Shared room', 'Private room']}),
+    ]
+
+
+def _expected(frame, by, price, filters):
+    rows = filtered(frame, price=price, **filters)
+    values = rows[CUBE_MEASURES].astype(np.float64)
+    grouped = values.assign(**{col: rows[col].astype(str) for col in by}).groupby(by)
+    result = grouped.size().rename('count').to_frame()
+    for m in CUBE_MEASURES:
+        result[f'{m}_sum'] = grouped[m].sum()
+        result[f'{m}_sumsq'] = (values[m] ** 2).groupby([rows[col].astype(str) for col in by]).sum()
+        result[f'{m}_mean'] = grouped[m].mean()
+    return result.sort_index()
+
+
+def test_rollup_matches_groupby(frame, cube):
+    for by, price, filters in _cube_cases(cube):
+        result = cube.rollup(by, price=price, **filters)
+        result = result.assign(**{col: result[col].astype(str) for col in by}).set_index(by).sort_index()
+        expected = _expected(frame, by, price, filters)
+        assert result.index.tolist() == expected.index.tolist(), (by, price, filters)
+        assert (result['count'].to_numpy() == expected['count'].to_numpy()).all()
+        pd.testing.assert_frame_equal(
+            result[expected.columns[1:]], expected[expected.columns[1:]], check_dtype=False, rtol=1e-9,
+        )
+
+
+@pytest.mark.parametrize("price, filters", [
+    (None, {'neighbourhood_group': []}),
+    ((300, 200), {}),
+    (None, {'room_type': ['Castle']}),
+])
+def test_rollup_empty_selection(cube, price, filters):
+    result = cube.rollup(['neighbourhood_group'], price=price, **filters)
+    assert len(result) == 0
+
+
+@pytest.mark.parametrize("bin_count, max_price, room_types, boroughs", [
+    (50, 500, None, None),
+    (30, 10_000, ['Private room'], ['Bronx']),
+    (7, 120.5, ['Entire home/apt', 'Shared room'], None),
+    (100, 30, None, ['Manhattan']),
+])
+def test_price_histogram_matches_pandas(frame, bin_count, max_price, room_types, boroughs):
+    histogram = PriceHistogram(frame)
+    result = histogram.query(bin_count, max_price, room_types, boroughs)
+    upper = min(max_price, histogram.max_price)
+    prices = filtered(frame, price=(0, upper), room_type=room_types, neighbourhood_group=boroughs)['price']
+
+    assert result['total'] == len(prices)
+    assert result['mean'] == pytest.approx(prices.mean())
+    assert result['median'] == prices.median()
+    assert len(result['counts']) <= bin_count
+    assert result['edges'][0] == prices.min() and result['edges'][-1] > prices.max()
+    assert (np.diff(result['edges']) == result['width']).all()
+    np.testing.assert_array_equal(result['counts'], np.histogram(prices, result['edges'])[0])
+
+
+@pytest.mark.parametrize("max_price, room_types, boroughs", [
+    (-1, None, None),
+    (500, [], None),
+    (500, None, ['Atlantis']),
+])
+def test_price_histogram_empty_selection(frame, max_price, room_types, boroughs):
+    assert PriceHistogram(frame).query(20, max_price, room_types, boroughs) is None
+
+
+@pytest.fixture(scope="module")
+def correlation(frame, engine):
+    return CorrelationStats(frame, engine, source_columns(frame.select_dtypes('number').columns))
+
+
+FEATURES = ['price', 'number_of_reviews', 'reviews_per_month', 'availability_365', 'minimum_nights']
+
+
+# Eşikler kova sınırında, kova içinde ve son kovanın (100+) üstünde
+@pytest.mark.parametrize("min_reviews", [0, 5, 7, 100, 103, 250])
+@pytest.mark.parametrize("room_types, boroughs", [
+    (['Entire home/apt', 'Private room', 'Shared room'], ['Manhattan', 'Brooklyn', 'Queens', 'Bronx', 'Staten Island']),
+    (['Private room'], ['Queens', 'Bronx']),
+])
+def test_correlation_matches_pandas(frame, correlation, room_types, boroughs, min_reviews):
+    matrix, n = correlation.correlation(FEATURES, room_types, boroughs, min_reviews)
+    rows = filtered(frame, room_type=room_types, neighbourhood_group=boroughs, number_of_reviews=(min_reviews, None))
+    assert n == len(rows)
+    expected = rows[FEATURES].astype(np.float64).corr()
+    pd.testing.assert_frame_equal(matrix, expected, atol=1e-9)
+
+
+def test_correlation_empty_selection(correlation):
+    matrix, n = correlation.correlation(FEATURES, [], ['Manhattan'])
+    assert n == 0 and matrix.isna().all().all()
+
+
+def test_correlation_cache_is_read_only(correlation):
+    _, merged = correlation._merged(('Private room',), ('Bronx',), 0)
+    with pytest.raises(ValueError):
+        merged['xy'][0, 0] = 0
+
+
+@pytest.fixture(scope="module")
+def hex_bins(frame, engine):
+    return HexBins(frame, engine)
+
+
+@pytest.mark.parametrize("boroughs, room_types, price", [
+    (['Manhattan', 'Brooklyn', 'Queens', 'Bronx', 'Staten Island'], ['Entire home/apt', 'Private room', 'Shared room'], None),
+    (['Bronx'], ['Private room'], (50, 150)),
+])
+def test_hex_cells_match_pandas(frame, hex_bins, boroughs, room_types, price):
+    result = hex_bins.query(boroughs, room_types, price)
+    rows = filtered(frame, neighbourhood_group=boroughs, room_type=room_types, price=price)
+    assert result['count'].sum() == len(rows)
+    assert result['occupied_days'].sum() == pytest.approx(rows['occupied_days'].sum(), rel=1e-6)
+    expected = rows.groupby(hex_bins.cell_of_row[rows.index]).size()
+    assert sorted(result['count']) == sorted(expected)
+    assert result['elevation'].between(0, HEX_ELEVATION_RANGE).all()
+    assert all(color in HEX_COLOR_RANGE for color in result['color'])
+
+
+def test_rows_fall_inside_their_hexagon(frame, hex_bins):
+    # Altıgenin merkezden en uzak noktası köşedir: her satır yarıçap içinde olmalı
+    lat = frame['latitude'].to_numpy().astype(np.float64)
+    lon = frame['longitude'].to_numpy().astype(np.float64)
+    center = hex_bins.centers[hex_bins.cell_of_row]
+    x, y = hex_bins._to_meters(lat, lon)
+    cx, cy = hex_bins._to_meters(center[:, 1], center[:, 0])
+    assert np.hypot(x - cx, y - cy).max() <= hex_bins.radius * (1 + 1e-6)
+
+
+def test_hex_bins_skip_missing_locations(frame, engine):
+    holes = frame.copy()
+    holes.loc[holes.index[:100], 'latitude'] = np.nan
+    result = HexBins(holes, engine).query(['Manhattan', 'Brooklyn', 'Queens', 'Bronx', 'Staten Island'],
+                                          ['Entire home/apt', 'Private room', 'Shared room'])
+    assert result['count'].sum() == len(frame) - 100
+    assert result[['longitude', 'latitude']].notna().all().all()
+
+
+def test_hex_query_returns_a_copy(hex_bins):
+    first = hex_bins.query(['Bronx'], ['Private room'])
+    first['count'] = 0
+    assert (hex_bins.query(['Bronx'], ['Private room'])['count'] > 0).all()
+
+
+@pytest.mark.parametrize("boroughs, room_types, price", [
+    ([], ['Private room'], None),
+    (['Bronx'], ['Castle'], None),
+    (['Bronx'], ['Private room'], (300, 200)),
+])
+def test_hex_empty_selection(hex_bins, boroughs, room_types, price):
+    assert len(hex_bins.query(boroughs, room_types, price)) == 0
@@ -0,0 +1,149 @@
+"""
+Uygulamanın başsız duman testi: sentetik CSV ile her sayfa (ve Mehmet'in her
+sekmesi) AppTest altında açılır, hiçbir çalıştırma hata vermemeli.
+"""
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.synthetic import write_csv
+from data_loader import DATA_PATH
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN_TOKEN = "test-token"
+MEHMET_TABS = ["Price vs Popularity", "Multidimensional Profile", "Category Flow"]
+
+
+@pytest.fixture(scope="module")
+def workdir(tmp_path_factory):
+    """Uygulamanın çalışma dizini: sentetik veri ve style.css."""
+    path = tmp_path_factory.mktemp("app")
+    write_csv(str(path / DATA_PATH), 5_000)
+    os.symlink(os.path.join(ROOT, "style.css"), path / "style.css")
+    return path
+
+
+@pytest.fixture
+def app(workdir, monkeypatch):
+    monkeypatch.chdir(workdir)
+    monkeypatch.setenv("DASHBOARD_WARMUP", "0")
+    monkeypatch.setenv("DASHBOARD_ADMIN_TOKEN", ADMIN_TOKEN)
+    return AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=300)
+
+
+@pytest.mark.parametrize("page", ["Home", "Ömer", "Mehmet", "Student3"])
+def test_page_opens(app, page):
+    app.session_state["current_page"] = page
+    app.run()
+    assert not app.exception, [e.message for e in app.exception]
+    if page != "Home":
+        assert app.get("plotly_chart")
+
+
+@pytest.mark.parametrize("tab", MEHMET_TABS)
+def test_mehmet_tab_opens(app, tab):
+    app.session_state["current_page"] = "Mehmet"
+    app.session_state["mehmet_tab"] = tab
+    app.run()
+    assert not app.exception, [e.message for e in app.exception]
+
+
+def test_mehmet_tabs_keep_widget_values(app):
+    def open_tab(tab):
+        # AppTest sekme seçimini geri göndermez; her çalıştırmadan önce yeniden yazılır
+        app.session_state["mehmet_tab"] = tab
+        return app
+
+    app.session_state["current_page"] = "Mehmet"
+    open_tab("Price vs Popularity").run()
+    open_tab("Price vs Popularity").slider(key="scatter_max_price").set_value(300).run()
+    open_tab("Category Flow").run()
+    assert "scatter_max_price" not in [w.key for w in app.slider]
+    open_tab("Category Flow").slider(key="sankey_min_count").set_value(20).run()
+    open_tab("Price vs Popularity").run()
+    assert not app.exception, [e.message for e in app.exception]
+    # Kapalı sekmeden dönünce iki sekmenin değerleri de korunmuş olmalı
+    assert app.slider(key="scatter_max_price").value == 300
+    assert app.session_state["sankey_min_count"] == 20
+
+
+@pytest.mark.parametrize("token, page", [(ADMIN_TOKEN, "Admin"), ("wrong", "Home"), ("", "Home"), (None, "Home")])
+def test_admin_page_needs_token(app, monkeypatch, token, page):
+    import hmac
+
+    compared = []
+    compare_digest = hmac.compare_digest
+    monkeypatch.setattr(hmac, "compare_digest", lambda a, b: compared.append((a, b)) or compare_digest(a, b))
+    if token is not None:
+        app.query_params["admin"] = token
+    app.run()
+    assert not app.exception, [e.message for e in app.exception]
+    assert app.session_state["current_page"] == page
+    # Belirteç sabit zamanlı karşılaştırılır
+    assert compared and compared[0] == (token or "", ADMIN_TOKEN)
+    assert bool(app.title) == (page == "Admin")
+
+
+def test_admin_page_closed_without_configured_token(app, monkeypatch):
+    monkeypatch.delenv("DASHBOARD_ADMIN_TOKEN")
+    app.query_params["admin"] = ""
+    app.session_state["current_page"] = "Admin"
+    app.run()
+    assert not app.exception, [e.message for e in app.exception]
+    assert [e.value for e in app.error] == ["The admin page requires a valid admin token."]
+    assert not app.title
+
+def test_warmup_prepares_every_default_figure(app):
+    # Ön ısıtma, sayfaların açılışta kullandığı durumların hepsini çizmeli
+    import data_loader
+    import figures
+    import warmup
+
+    # Önceki testlerin çizdiği figürler ıskaları gizlemesin
+    figures.figure_cache.clear()
+    warm = warmup.Warmup(data_loader.get_dataset()).start()
+    assert warm.wait(timeout=120) and not warm.failed()
+    misses = figures.figure_cache().stats()["misses"]
+    for page in ["Ömer", "Mehmet", "Student3"]:
+        app.session_state["current_page"] = page
+        app.run()
+        assert not app.exception, [e.message for e in app.exception]
+    assert figures.figure_cache().stats()["misses"] == misses
+
+
+def _scatter_spec(app):
+    import json
+
+    specs = [json.loads(chart.proto.spec) for chart in app.get("plotly_chart")]
+    return next(s for s in specs if any(t.get("type") in ("scattergl", "heatmap") for t in s["data"]))
+
+
+@pytest.mark.parametrize("limit, mode", [(None, "points"), (100, "density")])
+def test_scatter_switches_to_density_above_the_point_limit(app, monkeypatch, limit, mode):
+    import student_mehmet
+
+    if limit is not None:
+        monkeypatch.setattr(student_mehmet, "SCATTER_POINT_LIMIT", limit)
+    app.session_state["current_page"] = "Mehmet"
+    app.run()
+    assert not app.exception, [e.message for e in app.exception]
+    spec = _scatter_spec(app)
+    types = {t["type"] for t in spec["data"]}
+    if mode == "points":
+        assert types == {"scattergl"} and not spec["layout"].get("images")
+    else:
+        assert "heatmap" in types and spec["layout"]["images"][0]["source"].startswith("data:image/png")
+
+
+def test_memory_budget_switches_scatter_to_density(app, monkeypatch):
+    import session_memory
+
+    # Bütçe noktaları kopyalamaya yetmez: çalıştırma kısıtlı kaydedilir, yoğunluk görüntüsü çizilir
+    monkeypatch.setattr(session_memory, "SESSION_BUDGET_BYTES", 0)
+    app.session_state["current_page"] = "Mehmet"
+    app.run()
+    assert not app.exception, [e.message for e in app.exception]
+    spec = _scatter_spec(app)
+    assert "heatmap" in {t["type"] for t in spec["data"]} and spec["layout"]["images"]
+    assert any(s["page"] == "Mehmet" and s["degraded"] for s in session_memory.sessions())
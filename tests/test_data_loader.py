@@ -0,0 +1,97 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import data_loader
+from benchmarks.synthetic import write_csv
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    return write_csv(str(tmp_path / "AB_NYC_2019.csv"), 2_000)
+
+
+def _no_parse(path):
+    raise AssertionError("CSV yeniden okunmamalıydı")
+
+
+def test_second_load_reads_parquet_cache(csv_path, monkeypatch):
+    first, fingerprint, profile = data_loader._load_frame(csv_path)
+    parquet_path, meta_path = data_loader._cache_paths(csv_path)
+    assert os.path.exists(parquet_path) and os.path.exists(meta_path)
+
+    monkeypatch.setattr(data_loader, "_parse_csv", _no_parse)
+    second, cached_fingerprint, cached_profile = data_loader._load_frame(csv_path)
+    assert cached_fingerprint == fingerprint
+    pd.testing.assert_frame_equal(second, first)
+    assert cached_profile.to_dict() == profile.to_dict()
+
+
+def test_changed_csv_invalidates_cache(csv_path):
+    _, fingerprint, _ = data_loader._load_frame(csv_path)
+    write_csv(csv_path, 2_000, seed=7)
+    df, changed, _ = data_loader._load_frame(csv_path)
+    assert changed["sha256"] != fingerprint["sha256"]
+    expected = data_loader.clean_dataset(pd.read_csv(csv_path))
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_schema_version_invalidates_cache(csv_path, monkeypatch):
+    data_loader._load_frame(csv_path)
+    monkeypatch.setattr(data_loader, "SCHEMA_VERSION", data_loader.SCHEMA_VERSION + 1)
+    calls = []
+    parse = data_loader._parse_csv
+    monkeypatch.setattr(data_loader, "_parse_csv", lambda path: calls.append(path) or parse(path))
+    data_loader._load_frame(csv_path)
+    assert calls == [csv_path]
+
+
+def test_unreadable_cache_falls_back_to_csv(csv_path):
+    first, _, _ = data_loader._load_frame(csv_path)
+    parquet_path, _ = data_loader._cache_paths(csv_path)
+    with open(parquet_path, "wb") as f:
+        f.write(b"not parquet")
+    df, _, _ = data_loader._load_frame(csv_path)
+    pd.testing.assert_frame_equal(df, first)
+
+
+def test_compact_schema_keeps_values(raw, frame, tmp_path):
+    for col in data_loader.CATEGORY_COLUMNS:
+        assert isinstance(frame[col].dtype, pd.CategoricalDtype)
+    for col in data_loader.INTEGER_COLUMNS:
+        assert frame[col].dtype.kind == "i"
+        assert (frame[col].to_numpy() == raw[col].to_numpy()).all()
+    for col in data_loader.FLOAT32_COLUMNS:
+        assert frame[col].dtype == "float32"
+        expected = raw[col].fillna(0) if col == "reviews_per_month" else raw[col]
+        assert (frame[col].to_numpy() == expected.to_numpy().astype("float32")).all()
+    for col in ["neighbourhood_group", "neighbourhood", "room_type"]:
+        assert (frame[col].astype(str) == raw[col].astype(str)).all()
+    assert (frame["host_name"].astype(str) == raw["host_name"].fillna("Unknown").astype(str)).all()
+    # Karşılaştırma, aynı verinin düz pd.read_csv ile okunmuş hâliyle yapılır
+    raw.to_csv(tmp_path / "listings.csv", index=False)
+    plain = pd.read_csv(tmp_path / "listings.csv")
+    assert frame.memory_usage(deep=True).sum() < plain.memory_usage(deep=True).sum()
+
+
+def test_profile_counts_nulls_and_previews_json_values(raw):
+    df = raw.head(50).copy()
+    df.loc[[1, 3], "last_review"] = None
+    frame = data_loader.clean_dataset(df)
+    profile = data_loader.DatasetProfile.from_frame(frame)
+    source = data_loader.source_columns(frame.columns)
+
+    assert profile.rows == 50
+    assert profile.nulls == {col: int(n) for col, n in frame[source].isna().sum().items()}
+    assert profile.nulls["last_review"] == df["last_review"].isna().sum() and profile.nulls["name"] == 0
+    # Önizleme JSON'a birebir yazılabilmeli: eksikler None, tarihler metin
+    assert json.loads(json.dumps(profile.to_dict())) == profile.to_dict()
+    preview = profile.preview_frame()
+    assert preview.columns.tolist() == source and len(preview) == data_loader.PREVIEW_ROWS
+    dates = [row[source.index("last_review")] for row in profile.preview["data"]]
+    expected = frame["last_review"].head(data_loader.PREVIEW_ROWS).dt.strftime("%Y-%m-%d")
+    assert dates == expected.astype(object).where(expected.notna(), None).tolist()
+    assert dates[1] is None and dates[3] is None
+    assert preview["price"].tolist() == frame["price"].head(data_loader.PREVIEW_ROWS).tolist()
@@ -0,0 +1,93 @@
+import base64
+import io
+
+import numpy as np
+import pytest
+
+from aggregates import PriceHistogram
+from density import DensityEngine, binned_kde, density_image, silverman_bandwidth
+from tests.reference import filtered
+
+
+def gaussian_kde(points, at, bandwidth):
+    """Doğrudan toplanan Gauss KDE (kesme ya da FFT yok)."""
+    z = (at[:, None] - points[None, :]) / bandwidth
+    return np.exp(-0.5 * z * z).sum(axis=1) / (len(points) * bandwidth * np.sqrt(2 * np.pi))
+
+
+@pytest.mark.parametrize("bandwidth", [1.0, 3.7, 25.0])
+def test_binned_kde_matches_direct_kde(bandwidth):
+    points = np.random.default_rng(0).integers(0, 300, 2_000)
+    counts = np.bincount(points).astype(np.float64)
+    positions, density = binned_kde(counts, bandwidth)
+    expected = gaussian_kde(points.astype(np.float64), positions.astype(np.float64), bandwidth)
+    # Çekirdek 4 bant genişliğinde kesilir: fark tepe değerinin binde birinden az
+    np.testing.assert_allclose(density, expected, atol=1e-3 * expected.max())
+    assert positions[0] == -int(np.ceil(2 * bandwidth))
+
+
+@pytest.mark.parametrize("room_type, boroughs, low, high", [
+    ('Private room', ('Brooklyn', 'Manhattan'), 0, 500),
+    ('Entire home/apt', ('Bronx',), 100.5, 300),
+    ('Shared room', ('Queens', 'Staten Island'), 0, 2000),
+])
+def test_violin_matches_reference_kde(frame, room_type, boroughs, low, high):
+    violin = DensityEngine(PriceHistogram(frame)).violin(room_type, boroughs, low, high)
+    prices = filtered(frame, room_type=[room_type], neighbourhood_group=list(boroughs),
+                      price=(low, high))['price'].to_numpy().astype(np.float64)
+    assert violin['n'] == len(prices)
+
+    grid, counts = np.unique(prices, return_counts=True)
+    # plotly.js'in bant genişliği; 1$'lık kutulardan dar olamaz
+    assert violin['bandwidth'] == pytest.approx(max(silverman_bandwidth(grid, counts.astype(np.float64)), 1.0))
+    expected = gaussian_kde(prices, violin['y'].astype(np.float64), violin['bandwidth'])
+    np.testing.assert_allclose(violin['density'], expected, rtol=1e-3, atol=1e-3 * expected.max())
+    assert violin['y'].min() <= prices.min() and violin['y'].max() >= prices.max()
+
+
+def test_violin_arrays_are_read_only(frame):
+    violin = DensityEngine(PriceHistogram(frame)).violin('Private room', ('Bronx',), 0, 500)
+    with pytest.raises(ValueError):
+        violin['density'][0] = 0
+
+
+@pytest.mark.parametrize("room_type, boroughs, low, high", [
+    ('Private room', (), 0, 500),
+    ('Castle', ('Bronx',), 0, 500),
+    ('Private room', ('Bronx',), 300, 200),
+])
+def test_violin_empty_selection(frame, room_type, boroughs, low, high):
+    assert DensityEngine(PriceHistogram(frame)).violin(room_type, boroughs, low, high) is None
+
+
+def test_density_image_counts_and_pixels():
+    rng = np.random.default_rng(5)
+    n, width, height = 5_000, 60, 40
+    x, y = rng.uniform(0, 500, n), rng.uniform(0, 100, n)
+    codes = rng.integers(0, 3, n)
+    colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+    source, counts = density_image(x, y, codes, colors, (0, 500), (0, 100), width=width, height=height)
+
+    assert counts.shape == (3, height, width) and counts.sum() == n
+    for code in range(3):
+        expected, _, _ = np.histogram2d(y[codes == code], x[codes == code], bins=(height, width),
+                                        range=((0, 100), (0, 500)))
+        np.testing.assert_array_equal(counts[code], expected)
+
+    from PIL import Image
+
+    assert source.startswith('data:image/png;base64,')
+    image = np.asarray(Image.open(io.BytesIO(base64.b64decode(source.split(',', 1)[1]))))
+    assert image.shape == (height, width, 4)
+    # Görüntünün ilk satırı y ekseninin üstüdür; boş pikseller saydam
+    total = counts.sum(axis=0)[::-1]
+    assert ((image[..., 3] > 0) == (total > 0)).all()
+    single = (counts[0][::-1] > 0) & (total == counts[0][::-1])
+    assert (image[single][:, :3] == colors[0]).all()
+
+
+def test_density_image_clips_points_outside_the_range():
+    x, y = np.array([-10.0, 5.0, 1e9]), np.array([0.5, 1e9, -3.0])
+    _, counts = density_image(x, y, np.zeros(3, dtype=np.int8), [(0, 0, 0)], (0, 10), (0, 1), width=4, height=4)
+    assert counts.sum() == 3
+    assert counts[0, 2, 0] == 1 and counts[0, 3, 2] == 1 and counts[0, 0, 3] == 1
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from aggregates import N_PRICE_BANDS, REVIEW_BUCKET_MAX, REVIEW_BUCKET_WIDTH
+from derived import DERIVED_COLUMNS, occupied_days, price_band, review_bucket, source_columns
+
+
+def test_occupied_days_of_missing_availability_is_zero():
+    df = pd.DataFrame({'availability_365': [0.0, 365.0, np.nan, 100.0]})
+    np.testing.assert_array_equal(occupied_days(df), [365, 0, 0, 265])
+
+
+def test_derived_columns_match_pandas(raw, frame):
+    expected = (365 - raw['availability_365']).fillna(0)
+    assert (frame['occupied_days'].to_numpy() == expected.to_numpy()).all()
+
+    buckets = (raw['number_of_reviews'] // REVIEW_BUCKET_WIDTH).clip(upper=REVIEW_BUCKET_MAX // REVIEW_BUCKET_WIDTH)
+    assert (frame['review_bucket'].to_numpy() == buckets.to_numpy()).all()
+
+    bands = frame.groupby('price_band')['price'].agg(['min', 'max', 'size'])
+    assert bands.index.min() == 0 and bands.index.max() < N_PRICE_BANDS
+    # Bantlar fiyata göre sıralı ve ayrık; kantil bantları kabaca eşit dolulukta
+    assert (bands['min'].to_numpy()[1:] > bands['max'].to_numpy()[:-1]).all()
+    assert bands['size'].max() < 3 * len(frame) / N_PRICE_BANDS
+
+
+def test_price_band_of_empty_frame():
+    assert len(price_band(pd.DataFrame({'price': pd.Series([], dtype='int16')}))) == 0
+
+
+def test_source_columns_hide_derived(frame):
+    assert not set(DERIVED_COLUMNS) & set(source_columns(frame.columns))
+    assert review_bucket(frame).dtype == np.int8
@@ -0,0 +1,171 @@
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+import figures
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = figures.FigureCache(max_bytes=100)
+    monkeypatch.setattr(figures, "figure_cache", lambda: cache)
+    return cache
+
+
+def test_figure_cache_evicts_least_recently_used():
+    cache = figures.FigureCache(max_bytes=100)
+    cache.put("a", 1, 40)
+    cache.put("b", 2, 40)
+    assert cache.get("a") == 1
+    cache.put("c", 3, 40)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    # Sınırdan büyük kayıt hiç saklanmaz; aynı anahtar yeniden yazılınca boyut güncellenir
+    cache.put("d", 4, 101)
+    cache.put("a", 5, 10)
+    assert cache.get("d") is None and cache.get("a") == 5
+    assert cache.stats() == {"entries": 2, "bytes": 50, "hits": 4, "misses": 2, "evictions": 1}
+
+
+def test_selection_order_shares_a_key():
+    first = {"boroughs": figures.selection(["Queens", "Bronx"]), "features": ["price", "id"]}
+    second = {"features": ["price", "id"], "boroughs": figures.selection(["Bronx", "Queens"])}
+    assert figures._state_key(first) == figures._state_key(second)
+    # Sırası anlamlı listeler ayrı kayıt olur
+    assert figures._state_key({"features": ["id", "price"]}) != figures._state_key({"features": ["price", "id"]})
+
+
+def _build(calls):
+    def build():
+        calls.append(1)
+        fig = go.Figure(go.Scatter(x=np.arange(100), y=np.linspace(0, 1, 100)))
+        return fig, {"n": 100, "legend": [["a", "#fff"]]}
+    return build
+
+
+def test_cached_figure_serves_spec_on_hit(cache):
+    cache.max_bytes = figures.FIGURE_CACHE_BYTES
+    calls = []
+    fig, meta = figures.cached_figure("chart", "v1", {"k": [1, 2]}, _build(calls))
+    meta["legend"].append("changed")
+    spec, cached_meta = figures.cached_figure("chart", "v1", {"k": [1, 2]}, _build(calls))
+    assert calls == [1]
+    assert isinstance(spec, figures.FigureSpec)
+    assert spec.to_dict() == json.loads(fig.to_json())
+    # Her çağıran meta'nın kendi kopyasını alır
+    assert cached_meta == {"n": 100, "legend": [["a", "#fff"]]}
+    cached_meta["n"] = 0
+    assert figures.cached_figure("chart", "v1", {"k": [1, 2]}, _build(calls))[1]["n"] == 100
+    # Veri sürümü ya da durum değişince yeniden kurulur
+    figures.cached_figure("chart", "v2", {"k": [1, 2]}, _build(calls))
+    figures.cached_figure("chart", "v1", {"k": [2, 1]}, _build(calls))
+    assert len(calls) == 3
+
+
+def test_cached_figure_keeps_empty_results(cache):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return None, None
+
+    assert figures.cached_figure("chart", "v1", {}, build) == (None, None)
+    assert figures.cached_figure("chart", "v1", {}, build) == (None, None)
+    assert calls == [1]
+
+
+
+def test_narrow_is_lossless():
+    for values in [np.arange(-100, 100), np.arange(70_000), np.linspace(0, 1, 50), np.full(20, 0.1)]:
+        narrowed = figures.narrow(values)
+        assert narrowed.dtype.itemsize <= values.dtype.itemsize
+        np.testing.assert_array_equal(narrowed.astype(values.dtype), values)
+
+
+def test_project_keeps_encoded_columns_only():
+    frame = pd.DataFrame({"latitude": [1.0], "longitude": [2.0], "price": [3], "count": [4], "name": ["a"]})
+    projected = figures.project(frame, "[longitude, latitude]", "Listings: {count}", ["price"], None, "missing")
+    assert list(projected.columns) == ["longitude", "latitude", "count", "price"]
+    # Tekrarlanan adlar bir kez seçilir
+    assert list(figures.project(frame, "price", ["price", "name"]).columns) == ["price", "name"]
+
+
+def test_compact_frame_shortens_floats_within_float32():
+    coords = np.array([40.84492111206055, -73.9, 40.7], dtype=np.float32)
+    frame = pd.DataFrame({"lat": coords, "count": [1.0, 2.0, 3.0], "price": [1.5, np.nan, 2.25], "name": list("abc")})
+    compact = figures.compact_frame(frame)
+    assert compact["count"].dtype == np.int64 and compact["count"].tolist() == [1, 2, 3]
+    assert compact["lat"].tolist()[0] == 40.84492
+    np.testing.assert_array_equal(compact["lat"].to_numpy().astype(np.float32), coords)
+    # float64 sütunlar ve sayısal olmayanlar aynen kalır
+    pd.testing.assert_frame_equal(compact[["price", "name"]], frame[["price", "name"]])
+    subset = frame[["price", "name"]]
+    assert figures.compact_frame(subset) is subset
+
+
+def _render_cached_spec():
+    import numpy as np
+    import plotly.graph_objects as go
+
+    import figures
+
+    def build():
+        fig = go.Figure(go.Scatter(x=np.arange(100), y=np.linspace(0, 1, 100), name="points"))
+        fig.update_layout(title="cached", height=300)
+        return fig, None
+
+    fig, _ = figures.cached_figure("spec_render", "v1", {}, build)
+    spec, _ = figures.cached_figure("spec_render", "v1", {}, build)
+    assert isinstance(spec, figures.FigureSpec)
+    figures.render_plotly("built", fig, key="built")
+    figures.render_plotly("cached", spec, key="cached", on_select="rerun")
+
+
+def test_figure_spec_renders_through_plotly_chart(monkeypatch):
+    # FigureSpec, st.plotly_chart'ın figür nesnelerinden yalnızca to_dict çağırmasına
+    # dayanır; Streamlit ya da plotly bunu değiştirirse bu test kırılmalı
+    from streamlit.testing.v1 import AppTest
+
+    cache = figures.FigureCache()
+    monkeypatch.setattr(figures, "figure_cache", lambda: cache)
+    at = AppTest.from_function(_render_cached_spec)
+    at.run()
+    assert not at.exception, [e.message for e in at.exception]
+    built, cached = (json.loads(chart.proto.spec) for chart in at.get("plotly_chart"))
+    assert cached == built
+
+
+def _section_script():
+    import streamlit as st
+
+    import figures
+
+    @figures.chart_section("demo")
+    def section(label):
+        st.slider(label, 0, 10, 3, key="demo_value")
+
+    section("Value")
+
+
+@pytest.mark.parametrize("fragment", [False, True])
+def test_chart_section_times_full_and_fragment_runs(monkeypatch, fragment):
+    from streamlit.testing.v1 import AppTest
+
+    monkeypatch.setenv("DASHBOARD_DIAGNOSTICS", "1")
+    monkeypatch.setenv("DASHBOARD_PROFILE", "1")
+    # AppTest yalnızca tam çalıştırma yapar; kısmi çalıştırma algısı taklit edilir
+    monkeypatch.setattr(figures, "_fragment_run", lambda: fragment)
+    app = AppTest.from_function(_section_script, default_timeout=30).run()
+    assert not app.exception, [e.message for e in app.exception]
+    assert app.slider(key="demo_value").label == "Value"
+    [stats] = app.session_state[figures._SECTIONS_KEY]
+    assert stats["section"] == "demo" and stats["scope"] == ("fragment" if fragment else "full")
+    # Fragment çalıştırması kendi izini açar; tam çalıştırmada izi app açar
+    traces = app.session_state["_profile_traces"] if "_profile_traces" in app.session_state else []
+    if fragment:
+        [trace] = traces
+        assert trace.scope == "fragment" and [e["name"] for e in trace.events] == ["demo"]
+    else:
+        assert not traces
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indexes import FilterEngine, SortedIndex
+from tests.reference import pandas_mask
+
+
+def _rare_neighbourhoods(frame, k=3):
+    return frame['neighbourhood'].value_counts().index[-k:].tolist()
+
+
+# Her durum çerçeveden kriterleri üretir (seyrek semtler veriye göre seçilir)
+CASES = {
+    "no filter": lambda f: {},
+    "none condition": lambda f: dict(neighbourhood_group=None, price=None),
+    "one borough": lambda f: dict(neighbourhood_group=['Manhattan']),
+    "empty selection": lambda f: dict(neighbourhood_group=[]),
+    "unknown category": lambda f: dict(room_type=['Castle']),
+    "rare neighbourhoods": lambda f: dict(neighbourhood=_rare_neighbourhoods(f)),
+    "categories combined": lambda f: dict(room_type=['Shared room'], neighbourhood_group=['Bronx', 'Staten Island']),
+    "exact price": lambda f: dict(price=(100, 100)),
+    "fractional bounds": lambda f: dict(price=(99.5, 150.2)),
+    "open low": lambda f: dict(price=(None, 40)),
+    "open high": lambda f: dict(price=(1000, None)),
+    "inverted range": lambda f: dict(price=(300, 200)),
+    "whole range": lambda f: dict(price=(0, 10_000)),
+    "below minimum": lambda f: dict(price=(-50, -1)),
+    "unindexed range": lambda f: dict(calculated_host_listings_count=(2, 5)),
+    "narrow range with filters": lambda f: dict(
+        price=(500, 800), number_of_reviews=(1, None), room_type=['Entire home/apt'],
+        neighbourhood=_rare_neighbourhoods(f, 20),
+    ),
+    "wide ranges with filters": lambda f: dict(
+        price=(20, 400), minimum_nights=(1, 30), neighbourhood_group=['Brooklyn', 'Queens'],
+    ),
+}
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_engine_matches_pandas(frame, engine, case):
+    criteria = CASES[case](frame)
+    expected = pandas_mask(frame, **criteria)
+    np.testing.assert_array_equal(engine.mask(**criteria), expected)
+    np.testing.assert_array_equal(engine.select(**criteria), np.flatnonzero(expected))
+    assert engine.count(**criteria) == expected.sum()
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_matches_on_row_subset(frame, engine, case):
+    criteria = CASES[case](frame)
+    ids = np.random.default_rng(0).choice(len(frame), 500, replace=False)
+    np.testing.assert_array_equal(engine.matches(ids, **criteria), pandas_mask(frame, **criteria)[ids])
+
+
+def test_selection_order_does_not_matter(engine):
+    boroughs = ['Queens', 'Bronx', 'Manhattan']
+    np.testing.assert_array_equal(
+        engine.select(neighbourhood_group=boroughs), engine.select(neighbourhood_group=sorted(boroughs)),
+    )
+
+
+def test_column_bitmaps_are_read_only_and_per_engine(frame, engine):
+    bitmap = engine.bitmaps.column_bitmap('room_type', ('Private room',))
+    with pytest.raises(ValueError):
+        bitmap[0] = 0
+    other = FilterEngine(frame.head(100))
+    assert len(other.bitmaps.column_bitmap('room_type', ('Private room',))) == 13
+    # Sonuçlar örneğe bağlı: küçük çerçevenin bitmap'i büyük olanınkini ezmez
+    assert engine.bitmaps.column_bitmap('room_type', ('Private room',)) is bitmap
+
+
+@pytest.mark.parametrize("column, low, high", [
+    ('price', 100, 200),
+    ('price', 99.5, 100.5),
+    ('price', None, None),
+    ('price', 250, 100),
+    # int8 sütunda tipin dışındaki sınırlar kırpılır
+    ('minimum_nights', -1000, 1000),
+    ('minimum_nights', 200, None),
+    ('number_of_reviews', 0, 0),
+    ('availability_365', 364.5, None),
+])
+def test_sorted_index_ranges(frame, engine, column, low, high):
+    values = frame[column]
+    inside = pd.Series(True, index=frame.index)
+    if low is not None:
+        inside &= values >= low
+    if high is not None:
+        inside &= values <= high
+    index = engine.sorted
+    rows = index.rows(column, low, high)
+    np.testing.assert_array_equal(np.sort(rows), np.flatnonzero(inside))
+    assert (np.diff(values.to_numpy()[rows]) >= 0).all()
+    np.testing.assert_array_equal(np.sort(index.outside(column, low, high)), np.flatnonzero(~inside))
+    assert index.value_range(column) == (values.min(), values.max())
+
+
+@pytest.mark.parametrize("low, high", [(2, None), (None, 2), (1.5, 3), (None, None), (10, None)])
+def test_sorted_index_keeps_nan_out_of_ranges(low, high):
+    values = pd.Series([3.0, np.nan, 1.0, 2.0, np.nan, 2.5])
+    index = SortedIndex(pd.DataFrame({"price": values}), columns=["price"])
+    inside = pd.Series(True, index=values.index)
+    if low is not None:
+        inside &= values >= low
+    if high is not None:
+        inside &= values <= high
+    np.testing.assert_array_equal(np.sort(index.rows("price", low, high)), np.flatnonzero(inside))
+    np.testing.assert_array_equal(np.sort(index.outside("price", low, high)), np.flatnonzero(~inside))
+    assert index.value_range("price") == (1.0, 3.0)
+
+
+@pytest.mark.parametrize("price", [(300, None), (None, 40), (50, 60), (None, None)])
+def test_engine_with_missing_prices_matches_pandas(frame, price):
+    # Dilim yolu (dar aralık) ve tam tarama aynı satırları vermeli
+    gappy = frame.assign(price=frame["price"].astype("float32").where(frame.index % 7 != 0))
+    engine = FilterEngine(gappy)
+    expected = pandas_mask(gappy, price=price, room_type=["Private room"])
+    np.testing.assert_array_equal(engine.select(price=price, room_type=["Private room"]), np.flatnonzero(expected))
+    np.testing.assert_array_equal(engine.mask(price=price), pandas_mask(gappy, price=price))
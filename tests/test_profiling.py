@@ -0,0 +1,69 @@
+import json
+import time
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture
+def trace():
+    trace = profiling.Trace("full")
+    profiling._local.trace = trace
+    yield trace
+    profiling._local.trace = None
+
+
+def test_stages_nest_and_count_outer_time_once(trace):
+    with profiling.stage("filter", rows_in=100) as outer:
+        with profiling.stage("filter.bitmap"):
+            profiling.annotate(cache="hit")
+            time.sleep(0.002)
+        outer.set(rows_out=10)
+    with profiling.stage("figure"):
+        pass
+
+    events = {e["name"]: e for e in trace.events}
+    assert {name: e["depth"] for name, e in events.items()} == {"filter": 0, "filter.bitmap": 1, "figure": 0}
+    assert events["filter"]["fields"] == {"rows_in": 100, "rows_out": 10}
+    assert events["filter.bitmap"]["fields"] == {"cache": "hit"}
+    assert events["filter"]["dur"] >= events["filter.bitmap"]["dur"]
+    assert trace.total_ms() == pytest.approx((events["filter"]["dur"] + events["figure"]["dur"]) * 1000)
+    # Tablo başlangıç sırasındadır; iç aşamalar girintilidir
+    assert [row["stage"] for row in trace.table()] == ["filter", "· filter.bitmap", "figure"]
+    assert not trace.open
+
+
+def test_stage_records_on_exception(trace):
+    with pytest.raises(ValueError):
+        with profiling.stage("load"):
+            raise ValueError
+    assert [e["name"] for e in trace.events] == ["load"] and not trace.open
+
+
+def test_chrome_trace_writes_complete_events(trace):
+    with profiling.stage("load.read_cache", rows_out=5, cache=None):
+        pass
+    other = profiling.Trace("fragment")
+    profiling._local.trace = other
+    profiling.profiled("figure.build")(lambda: None)()
+
+    data = json.loads(profiling.chrome_trace([trace, other]))
+    assert data["displayTimeUnit"] == "ms"
+    first, second = data["traceEvents"]
+    assert first["ph"] == "X" and first["cat"] == "load" and first["name"] == "load.read_cache"
+    # Boş alanlar yazılmaz; kapsam her olaya eklenir
+    assert first["args"] == {"scope": "full", "rows_out": 5}
+    assert second["args"] == {"scope": "fragment"} and second["cat"] == "figure"
+    event = trace.events[0]
+    assert first["ts"] == pytest.approx((trace.created + event["start"]) * 1e6, abs=0.1)
+    assert first["dur"] == pytest.approx(event["dur"] * 1e6, abs=0.1)
+
+
+def test_disabled_profiler_records_nothing():
+    profiling._local.trace = None
+    with profiling.stage("load", rows_in=1) as stage:
+        stage.set(rows_out=1)
+        profiling.annotate(cache="hit")
+    assert stage is profiling._NO_STAGE
+    assert profiling.profiled("load")(lambda x: x + 1)(1) == 2
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from sampling import MIN_PER_STRATUM, StratifiedSampler
+from tests.reference import pandas_mask
+
+
+@pytest.fixture(scope="module")
+def sampler(frame, engine):
+    return StratifiedSampler(frame, engine)
+
+
+@pytest.mark.parametrize("room_types, boroughs, criteria", [
+    (None, None, {}),
+    (['Private room', 'Shared room'], ['Bronx', 'Manhattan'], {}),
+    (None, ['Brooklyn'], {'number_of_reviews': (10, None), 'price': (50, 300)}),
+])
+def test_sample_is_filtered_and_stratified(frame, sampler, room_types, boroughs, criteria):
+    size = 1000
+    ids = sampler.sample(size, room_types, boroughs, dimensions=('price',), **criteria)
+    mask = pandas_mask(frame, room_type=room_types, neighbourhood_group=boroughs, **criteria)
+    assert len(ids) <= size and (np.diff(ids) > 0).all()
+    assert mask[ids].all()
+    np.testing.assert_array_equal(sampler.sample(size, room_types, boroughs, dimensions=('price',), **criteria), ids)
+
+    rows = frame[mask]
+    # Uç değerler korunur; her dolu katmandan en az MIN_PER_STRATUM satır (ya da hepsi)
+    assert frame['price'].to_numpy()[ids].max() == rows['price'].max()
+    strata = rows.groupby(['room_type', 'neighbourhood_group'], observed=True).size()
+    sampled = frame.iloc[ids].groupby(['room_type', 'neighbourhood_group'], observed=True).size()
+    for key, total in strata.items():
+        assert sampled.get(key, 0) >= min(MIN_PER_STRATUM, total)
+    # Büyük katmanlarda pay orantılı
+    largest = strata.idxmax()
+    assert sampled[largest] / len(ids) == pytest.approx(strata[largest] / len(rows), abs=0.05)
+
+
+def test_sample_larger_than_selection_returns_all_rows(frame, sampler):
+    mask = pandas_mask(frame, room_type=['Shared room'], neighbourhood_group=['Queens'])
+    ids = sampler.sample(int(mask.sum()) + 10, ['Shared room'], ['Queens'])
+    np.testing.assert_array_equal(ids, np.flatnonzero(mask))
+
+
+@pytest.mark.parametrize("size, room_types, criteria", [
+    (100, [], {}),
+    (100, ['Castle'], {}),
+    (100, None, {'price': (300, 200)}),
+    (0, None, {}),
+])
+def test_sample_empty_selection(sampler, size, room_types, criteria):
+    assert len(sampler.sample(size, room_types, **criteria)) == 0
@@ -0,0 +1,47 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import session_memory
+
+
+@pytest.fixture
+def run(monkeypatch):
+    monkeypatch.setattr(session_memory, "SESSION_BUDGET_BYTES", 1_000)
+    run = {"session": "test-session", "page": "Home", "retained": 200, "transient": 0, "degraded": False}
+    session_memory._local.run = run
+    yield run
+    session_memory._local.run = None
+
+
+def test_estimate_size_counts_frames_and_nested_containers():
+    frame = pd.DataFrame({"price": np.arange(1_000), "name": ["listing"] * 1_000})
+    array = np.zeros(500)
+    assert session_memory.estimate_size(frame) == frame.memory_usage(deep=True).sum()
+    assert session_memory.estimate_size(array) == array.nbytes
+    nested = {"figure": {"rows": [array, frame]}}
+    assert session_memory.estimate_size(nested) > array.nbytes + frame.memory_usage(deep=True).sum()
+    # Derinlik sınırının altındaki kaplar yalnızca kendi boyutuyla sayılır
+    deep = [[[[[array]]]]]
+    assert session_memory.estimate_size(deep) < array.nbytes
+    assert session_memory.estimate_size(deep) >= sys.getsizeof(deep)
+
+
+def test_limit_rows_stays_within_budget(run):
+    # 1000 bayt bütçe - 200 kalıcı = 800 bayt boş
+    assert session_memory.limit_rows(50, 10) == 50 and not run["degraded"]
+    session_memory.charge(500)
+    assert run["transient"] == 500
+    assert session_memory.limit_rows(50, 10) == 30 and run["degraded"]
+    session_memory.charge(1_000)
+    assert session_memory.limit_rows(50, 10) == 0
+    assert session_memory.limit_rows(50, 0) == 50
+
+
+def test_limit_rows_without_a_run_is_unbounded(monkeypatch):
+    monkeypatch.setattr(session_memory, "SESSION_BUDGET_BYTES", 0)
+    session_memory._local.run = None
+    assert session_memory.limit_rows(10_000, 100) == 10_000
+    session_memory.charge(1 << 30)
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from sketches import CellSketches, KLLSketch, weighted_quantile
+from tests.reference import filtered
+
+QS = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+# k=200 ile %99 güvenli sıra hatası ~%1.65
+RANK_ERROR = 0.0165
+
+
+def rank_error(values, estimate, q):
+    """Tahminin gerçek sıra aralığının q'ya uzaklığı (eşit değerler aralık oluşturur)."""
+    values = np.sort(values)
+    low = np.searchsorted(values, estimate, side='left') / len(values)
+    high = np.searchsorted(values, estimate, side='right') / len(values)
+    return 0.0 if low <= q <= high else min(abs(low - q), abs(high - q))
+
+
+def test_small_stream_is_exact():
+    values = np.random.default_rng(1).integers(0, 1000, 150).astype(float)
+    items, weights = KLLSketch().update(values).weighted_items()
+    assert (weights == 1).all() and sorted(items) == sorted(values)
+
+
+def test_large_stream_within_error_bound():
+    values = np.random.default_rng(2).lognormal(4, 1, 50_000)
+    sketch = KLLSketch(seed=3)
+    for chunk in np.array_split(values, 7):
+        sketch.update(chunk)
+    assert sketch.n == len(values)
+    items, weights = sketch.weighted_items()
+    assert len(items) < len(values) / 20
+    for q in QS:
+        assert rank_error(values, weighted_quantile(items, weights, q), q) <= RANK_ERROR
+
+
+def test_merge_keeps_count_and_extremes():
+    rng = np.random.default_rng(4)
+    a, b = rng.normal(0, 1, 20_000), rng.normal(5, 1, 30_000)
+    merged = KLLSketch(seed=1).update(a).merge(KLLSketch(seed=2).update(b))
+    assert merged.n == len(a) + len(b)
+    assert merged.min == min(a.min(), b.min()) and merged.max == max(a.max(), b.max())
+
+
+@pytest.mark.parametrize("room_types, boroughs, low, high", [
+    (None, None, None, None),
+    (['Private room'], ['Brooklyn', 'Manhattan'], None, None),
+    (['Entire home/apt'], None, 50, 400),
+    (None, ['Staten Island'], None, 120),
+])
+def test_cell_quantiles_match_pandas(frame, room_types, boroughs, low, high):
+    sketches = CellSketches.from_frame(frame)
+    prices = filtered(frame, room_type=room_types, neighbourhood_group=boroughs, price=(low, high))['price']
+    result = sketches.quantiles([0] + QS + [1], room_types, boroughs, low, high)
+    # Aralıkla sınırlı kantillerde hata hücrelerin toplam n'ine göredir
+    n_cells = len(filtered(frame, room_type=room_types, neighbourhood_group=boroughs))
+    tolerance = RANK_ERROR * n_cells / len(prices)
+    for q, estimate in zip([0] + QS + [1], result):
+        assert rank_error(prices.to_numpy(), estimate, q) <= tolerance
+    # Sınırsız sorguda uçlar tutulan gerçek min/max'tır
+    if low is None:
+        assert result[0] == prices.min()
+    if high is None:
+        assert result[-1] == prices.max()
+
+    box = sketches.box_stats(room_types, boroughs, low, high)
+    assert box['lowerfence'] <= box['q1'] <= box['median'] <= box['q3'] <= box['upperfence']
+
+
+@pytest.mark.parametrize("room_types, boroughs, low, high", [
+    ([], None, None, None),
+    (['Castle'], None, None, None),
+    (None, None, 300, 200),
+])
+def test_cell_quantiles_empty_selection(frame, room_types, boroughs, low, high):
+    sketches = CellSketches.from_frame(frame)
+    assert sketches.quantiles([0.5], room_types, boroughs, low, high) is None
+    assert sketches.box_stats(room_types, boroughs, low, high) is None
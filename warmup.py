@@ -0,0 +1,159 @@
+"""
+Arka planda ön ısıtma.
+
+Veri seti yüklenince bir iş parçacığı havuzu iki tür iş çalıştırır. Önce
+türetilmiş yapıları kurar: toplam küpü, taban histogramları, kantil özetleri,
+korelasyon istatistikleri, yoğunluklar, altıgen hücreler ve örnekleyici. Sonra
+öğrenci sayfalarındaki her grafiğin varsayılan widget durumundaki figürünü figür
+önbelleğine çizer. Böylece bir sayfayı ilk açan ziyaretçi bu işleri beklemez.
+Filtre indeksleri yüklemede zaten kurulur. Ön ısıtma bitmeden gelen bir oturum
+aynı yapıyı ikinci kez kurmaz, süren kurulumu bekler (Dataset.derived kilidi).
+Durum Ana Sayfa'da gösterilir. Kapatmak için: DASHBOARD_WARMUP=0.
+
+Her sayfa modülü default_figures(ds) ile {grafik kimliği: iş} döndürür. İşlerin
+durumları widget varsayılanlarıyla aynı olmalıdır: farklıysa ön çizilen figür
+hiç kullanılmaz. benchmarks/bench_startup.py ısınmış açılıştaki figür önbelleği
+ıskalarını raporlar.
+"""
+import importlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+log = logging.getLogger(__name__)
+
+# Dataset'in önceden kurulan türetilmiş yapıları (grafik işlerinden önce kuyruğa girer)
+DERIVED_STRUCTURES = [
+    "cube", "price_histogram", "price_sketches", "correlation_stats", "densities", "hex_bins", "sampler",
+]
+PAGE_MODULES = ["student_omer", "student_mehmet", "student_ahmet"]
+WARMUP_WORKERS = min(4, os.cpu_count() or 1)
+# Ön ısıtma sürerken Ana Sayfa'daki durum satırının yenilenme aralığı (saniye)
+POLL_SECONDS = 1.0
+
+
+def enabled():
+    return os.environ.get("DASHBOARD_WARMUP", "1") not in ("", "0")
+
+
+class Warmup:
+    """Ön ısıtma işleri ve durumları; işler havuzda ada göre izlenir."""
+
+    def __init__(self, ds, workers=WARMUP_WORKERS):
+        self.ds = ds
+        self.workers = workers
+        self.started = None
+        self.finished = None
+        self._pool = None
+        self._submitted = False
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="warmup")
+        for name in DERIVED_STRUCTURES:
+            self._submit(f"derived.{name}", lambda name=name: getattr(self.ds, name))
+        # Sayfa modülleri (plotly, pydeck ile) burada, arka planda içe aktarılır;
+        # grafik işleri modül yüklenince kuyruğa girer
+        for module_name in PAGE_MODULES:
+            self._submit(f"{module_name}.import", lambda module_name=module_name: self._page(module_name))
+        with self._lock:
+            self._submitted = True
+        self._check_finished(None)
+        return self
+
+    def _page(self, module_name):
+        module = importlib.import_module(module_name)
+        for chart_id, job in module.default_figures(self.ds).items():
+            self._submit(chart_id, job)
+
+    def _submit(self, name, job):
+        with self._lock:
+            future = self._pool.submit(self._run, name, job)
+            self._futures[name] = future
+        future.add_done_callback(self._check_finished)
+
+    @staticmethod
+    def _run(name, job):
+        start = time.perf_counter()
+        try:
+            job()
+        except Exception:
+            log.exception("Ön ısıtma işi başarısız: %s", name)
+            raise
+        log.debug("Ön ısıtma: %s %.3fs", name, time.perf_counter() - start)
+
+    def _check_finished(self, _future):
+        # Bir modül işi, grafik işlerini kendisi bitmeden kuyruğa koyar; bu yüzden
+        # start() kuyruğu doldurduktan sonra kayıtlı işlerin hepsi bitmişse yeni iş gelmez
+        with self._lock:
+            if not self._submitted or self.finished is not None:
+                return
+            if not all(f.done() for f in self._futures.values()):
+                return
+            self.finished = time.perf_counter()
+        self._pool.shutdown(wait=False)
+        self._done.set()
+        log.info("Ön ısıtma bitti: %d iş, %d hata, %.2fs", len(self._futures), len(self.failed()), self.seconds())
+
+    def progress(self):
+        """(biten iş, toplam iş); toplam, modüller yüklendikçe artar."""
+        with self._lock:
+            futures = list(self._futures.values())
+        return sum(f.done() for f in futures), len(futures)
+
+    def failed(self):
+        with self._lock:
+            return [name for name, f in self._futures.items() if f.done() and f.exception() is not None]
+
+    def ready(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Ön ısıtma bitene kadar bekler; bittiyse True."""
+        return self._done.wait(timeout)
+
+    def seconds(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+
+@st.cache_resource(show_spinner=False)
+def _warmup(version, _ds):
+    return Warmup(_ds).start()
+
+
+def start(ds):
+    """Veri sürümü başına bir kez ön ısıtmayı başlatır; kapalıysa None döndürür."""
+    if not enabled():
+        return None
+    return _warmup(ds.version, ds)
+
+
+def _status(warm, polling):
+    done, total = warm.progress()
+    if not warm.ready():
+        st.progress(done / max(total, 1), text=f"⏳ Preparing charts in the background: {done} of {total} tasks done")
+        return
+    if polling:
+        # Son durumu tam çalıştırma çizer; yenileme orada durur
+        st.rerun()
+    failed = warm.failed()
+    if failed:
+        st.caption(f"⚠️ Charts prepared in {warm.seconds():.1f}s; {len(failed)} will be built on first view.")
+    else:
+        st.caption(f"✅ All charts are ready (prepared in {warm.seconds():.1f}s).")
+
+
+def status(warm):
+    """Ana Sayfa'daki hazırlık durumu; ön ısıtma sürerken saniyede bir yenilenir."""
+    if warm is None:
+        return
+    polling = not warm.ready()
+    st.fragment(_status, run_every=POLL_SECONDS if polling else None)(warm, polling)